@@ -0,0 +1,66 @@
+"""Compare per-instruction conversion with the columnar bulk conversion.
+
+Both are timed up to the JSON text: events built as objects then written
+by JsonArrayWriter, against ChromeTracingConverter.write_table(), which
+formats the events straight from the column arrays.
+
+Usage: python benchmarks/bench_convert.py [--copies N] [--pretty]
+"""
+import argparse
+import io
+import tempfile
+from pathlib import Path
+
+from common import best_of, make_scaled_trace
+
+from uScope.config import load_config
+from uScope.converter import ChromeTracingConverter
+from uScope.parser import MmapPipeViewParser
+from uScope.writer import JsonArrayWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=100,
+                        help="Number of replicas of the reference trace")
+    parser.add_argument("--pretty", action="store_true", help="Time indented JSON")
+    args = parser.parse_args()
+    indent = 2 if args.pretty else None
+
+    config = load_config()
+    with tempfile.TemporaryDirectory() as tmp:
+        trace = make_scaled_trace(Path(tmp, "trace.out"), args.copies)
+        trace_parser = MmapPipeViewParser()
+        trace_parser.parse_file(str(trace))
+    table = trace_parser.to_table()
+
+    def objects(**kwargs):
+        out = io.StringIO()
+        writer = JsonArrayWriter(out, indent=indent)
+        converter = ChromeTracingConverter(trace_parser, config, **kwargs)
+        writer.write(converter.convert_events(progress=False))
+        writer.close()
+        return out.getvalue()
+
+    def columnar():
+        out = io.StringIO()
+        writer = JsonArrayWriter(out, indent=indent)
+        ChromeTracingConverter(trace_parser, config, table=table).write_table(writer, progress=False)
+        writer.close()
+        return out.getvalue()
+
+    assert columnar() == objects()
+    results = {
+        "objects": best_of(objects, repeat=1),
+        "table": best_of(lambda: objects(table=table)),
+        "columnar": best_of(columnar),
+    }
+
+    base = results["objects"]
+    print(f"{len(table)} instructions")
+    for name, elapsed in results.items():
+        print(f"{name:>10}: {elapsed:.3f}s  ({base / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
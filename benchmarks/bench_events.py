@@ -0,0 +1,71 @@
+"""Compare event serialization through dataclasses.asdict() with Event.to_json().
+
+Usage: python benchmarks/bench_events.py [--copies N]
+"""
+import argparse
+import json
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from common import best_of, make_scaled_trace
+
+from uScope.config import load_config
+from uScope.converter import ChromeTracingConverter
+from uScope.events import DurationEvent
+from uScope.parser import MmapPipeViewParser
+
+
+@dataclass
+class DataclassDurationEvent:
+    """The original dataclass event, kept as a baseline."""
+
+    name: str
+    pid: int
+    ts: int
+    dur: int
+    cat: str
+    args: Dict[str, Any]
+    cname: Optional[str] = None
+    ph: str = "X"
+    tid: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+def dump_dicts(events, indent):
+    pad = " " * indent
+    for event in events:
+        json.dumps(event.to_dict(), indent=indent).replace("\n", "\n" + pad)
+
+
+def dump_direct(events, indent):
+    for event in events:
+        event.to_json(indent, level=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=20,
+                        help="Number of replicas of the reference trace")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trace = make_scaled_trace(Path(tmp, "trace.out"), args.copies)
+        trace_parser = MmapPipeViewParser()
+        trace_parser.parse_file(str(trace))
+    converter = ChromeTracingConverter(trace_parser, load_config())
+    events = [e for e in converter.convert_events(progress=False)
+              if isinstance(e, DurationEvent)]
+    baseline = [DataclassDurationEvent(*(getattr(e, f) for f in e._fields())) for e in events]
+
+    dicts = best_of(lambda: dump_dicts(baseline, 2))
+    direct = best_of(lambda: dump_direct(events, 2))
+    print(f"{len(events)} duration events")
+    print(f"asdict+dumps {dicts:.3f}s  to_json {direct:.3f}s  ({dicts / direct:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compare gzip.open with ParallelGzipWriter on the JSON output of a scaled trace.
+
+Usage: python benchmarks/bench_gzip.py [--copies N] [--threads T]
+"""
+import argparse
+import gzip
+import os
+import tempfile
+from pathlib import Path
+
+from common import best_of, make_scaled_trace
+
+from uScope.config import load_config
+from uScope.converter import ChromeTracingConverter
+from uScope.parallel_gzip import ParallelGzipWriter
+from uScope.parser import MmapPipeViewParser
+from uScope.writer import format_events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=20,
+                        help="Number of replicas of the reference trace")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(),
+                        help="Compression threads (default: all CPUs)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trace = make_scaled_trace(Path(tmp, "trace.out"), args.copies)
+        trace_parser = MmapPipeViewParser()
+        trace_parser.parse_file(str(trace))
+        events = ChromeTracingConverter(trace_parser, load_config()).convert_events(progress=False)
+        data = format_events(events).encode()
+        output = str(Path(tmp, "trace.json.gz"))
+
+        def run(open_file):
+            def once():
+                with open_file() as f:
+                    for start in range(0, len(data), 1 << 16):
+                        f.write(data[start : start + (1 << 16)])
+            return best_of(once), os.path.getsize(output)
+
+        print(f"{len(data) / 2**20:.1f} MiB of JSON, {args.threads} threads")
+        base, base_size = run(lambda: gzip.open(output, "wb"))
+        print(f"gzip.open level 9: {base:.3f}s  {base_size / 2**20:.2f} MiB")
+        for level in (9, 6, 1):
+            elapsed, size = run(lambda: ParallelGzipWriter(output, level, args.threads))
+            print(f"  parallel level {level}: {elapsed:.3f}s  {size / 2**20:.2f} MiB  "
+                  f"({base / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
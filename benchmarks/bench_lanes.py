@@ -0,0 +1,65 @@
+"""Compare StageLaneManager with the original linear-scan lane assignment.
+
+Usage: python benchmarks/bench_lanes.py [--intervals N] [--width W]
+"""
+import argparse
+import random
+
+from common import best_of
+
+from uScope.thread_pool import StageLaneManager
+
+
+class LinearScanLaneManager:
+    """The original O(W) allocator, kept as a baseline."""
+
+    def __init__(self, max_width: int):
+        self.max_width = max_width
+        self.pool = [(0, 0)]
+
+    def assign_lane(self, start_time: int, end_time: int):
+        for i, (last_end, tid) in enumerate(self.pool):
+            if last_end <= start_time:
+                self.pool[i] = (end_time, tid)
+                return 0, tid
+        if len(self.pool) < self.max_width:
+            self.pool.append((end_time, len(self.pool)))
+            return 0, len(self.pool) - 1
+        earliest_idx = min(range(len(self.pool)), key=lambda i: self.pool[i][0])
+        _, tid = self.pool[earliest_idx]
+        self.pool[earliest_idx] = (end_time, tid)
+        return 0, tid
+
+
+def make_intervals(count: int, in_flight: int, seed: int = 0):
+    """Intervals with about ``in_flight`` of them overlapping at any time."""
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(count):
+        start = i * 10 + rng.randint(0, 50)
+        intervals.append((start, start + rng.randint(1, 20 * in_flight)))
+    return intervals
+
+
+def run(manager, intervals):
+    assign = manager.assign_lane
+    for start, end in intervals:
+        assign(start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--intervals", type=int, default=200_000)
+    parser.add_argument("--width", type=int, default=256)
+    args = parser.parse_args()
+
+    for in_flight in (4, 32, 128, 512):
+        intervals = make_intervals(args.intervals, in_flight)
+        linear = best_of(lambda: run(LinearScanLaneManager(args.width), intervals))
+        tree = best_of(lambda: run(StageLaneManager(args.width, 0, "bench", []), intervals))
+        print(f"~{in_flight:>3} in flight: linear {linear:.3f}s  tree {tree:.3f}s  "
+              f"({linear / tree:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
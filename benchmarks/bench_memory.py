@@ -0,0 +1,41 @@
+"""Measure the memory held by parsed instructions.
+
+Usage: python benchmarks/bench_memory.py [--copies N]
+"""
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from common import make_scaled_trace
+
+from uScope.parser import MmapPipeViewParser, PipeViewParser
+
+
+def measure(cls, trace: Path):
+    tracemalloc.start()
+    try:
+        parser = cls()
+        parser.parse_file(str(trace))
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current, len(parser.instructions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=300,
+                        help="Number of replicas of the reference trace")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trace = make_scaled_trace(Path(tmp, "trace.out"), args.copies)
+        for cls in (PipeViewParser, MmapPipeViewParser):
+            used, count = measure(cls, trace)
+            print(f"{cls.__name__:>20}: {used / 2**20:.1f} MiB for {count} instructions "
+                  f"({used / count:.0f} bytes each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare PipeViewParser with the mmap-backed MmapPipeViewParser, and report
+the speedup of ParallelPipeViewParser over the latter for each of --jobs.
+
+Usage: python benchmarks/bench_parser.py [--copies N] [--jobs N [N ...]]
+"""
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+from common import best_of, make_scaled_trace
+
+from uScope.parser import MmapPipeViewParser, ParallelPipeViewParser, PipeViewParser
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=300,
+                        help="Number of replicas of the reference trace")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[2, 4],
+                        help="Worker process counts to run ParallelPipeViewParser with")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trace = make_scaled_trace(Path(tmp, "trace.out"), args.copies)
+        size_mb = trace.stat().st_size / 2**20
+
+        results = {}
+        for cls in (PipeViewParser, MmapPipeViewParser):
+            results[cls.__name__] = best_of(lambda: cls().parse_file(str(trace)))
+
+        reference = PipeViewParser()
+        reference.parse_file(str(trace))
+        fast = MmapPipeViewParser()
+        fast.parse_file(str(trace))
+        assert fast.instructions == reference.instructions
+        count = len(reference.instructions)
+
+        # Chunks small enough for every worker to get several at any --copies
+        chunk_size = max(1, trace.stat().st_size // (4 * max(args.jobs)))
+        parallel = {}
+        for jobs in args.jobs:
+            parallel[jobs] = best_of(
+                lambda: ParallelPipeViewParser(jobs, chunk_size).parse_file(str(trace))
+            )
+        check = ParallelPipeViewParser(max(args.jobs), chunk_size)
+        check.parse_file(str(trace))
+        assert check.instructions == reference.instructions
+
+    base = results[PipeViewParser.__name__]
+    print(f"{size_mb:.1f} MiB, {count} instructions")
+    for name, elapsed in results.items():
+        print(f"{name:>20}: {elapsed:.3f}s  ({base / elapsed:.2f}x)")
+
+    mmap_time = results[MmapPipeViewParser.__name__]
+    print(f"ParallelPipeViewParser on {os.cpu_count()} CPUs, against MmapPipeViewParser "
+          "(a single CPU parses serially):")
+    for jobs, elapsed in parallel.items():
+        print(f"{f'--jobs {jobs}':>20}: {elapsed:.3f}s  ({mmap_time / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
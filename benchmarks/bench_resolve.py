@@ -0,0 +1,74 @@
+"""Compare resolving mnemonics and colors per access with the memoized lookups,
+and time the conversion that makes these lookups for every event.
+
+Usage: python benchmarks/bench_resolve.py [--copies N]
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from common import best_of, make_scaled_trace
+
+from uScope import O3
+from uScope.config import Config, load_config
+from uScope.converter import ChromeTracingConverter
+from uScope.parser import MmapPipeViewParser
+from uScope.utils import stable_hash
+
+split_mnemonic = O3.mnemonic_of.__wrapped__
+
+
+def uncached_color(config: Config, instr) -> str:
+    """The original lookup: an MD5 of the freshly split mnemonic per call."""
+    family = config.get_color_for_func_unit(config.get_func_unit(instr.opclass))
+    mnemonic = split_mnemonic(instr.disasm)
+    return family[stable_hash(mnemonic, len(family))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=100,
+                        help="Number of replicas of the reference trace")
+    args = parser.parse_args()
+
+    config = load_config()
+    with tempfile.TemporaryDirectory() as tmp:
+        trace = make_scaled_trace(Path(tmp, "trace.out"), args.copies)
+        trace_parser = MmapPipeViewParser()
+        trace_parser.parse_file(str(trace))
+    instructions = list(trace_parser.instructions.values())
+    static = {(instr.opclass, instr.disasm) for instr in instructions}
+
+    def uncached():
+        for instr in instructions:
+            split_mnemonic(instr.disasm)
+            uncached_color(config, instr)
+
+    def memoized():
+        for instr in instructions:
+            instr.mnemonic
+            config.get_color_for_instr(instr)
+
+    assert all(uncached_color(config, i) == config.get_color_for_instr(i) for i in instructions)
+    print(f"{len(instructions)} instructions, {len(static)} static")
+    base = best_of(uncached)
+    elapsed = best_of(memoized)
+    print(f"{'uncached':>10}: {base:.3f}s")
+    print(f"{'memoized':>10}: {elapsed:.3f}s  ({base / elapsed:.2f}x)")
+
+    def convert():
+        ChromeTracingConverter(trace_parser, config).convert_events(progress=False)
+
+    print(f"{'convert':>10}: {best_of(convert):.3f}s  (memoized)")
+    original = O3.mnemonic_of
+    O3.mnemonic_of = split_mnemonic
+    config.get_color_for_instr = lambda instr: uncached_color(config, instr)
+    try:
+        print(f"{'convert':>10}: {best_of(convert):.3f}s  (uncached)")
+    finally:
+        O3.mnemonic_of = original
+        del config.get_color_for_instr
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measure CLI startup: import time of uScope.main (python -X importtime) and
+wall time of converting a trace small enough for startup to dominate.
+
+To guard against import time regressions, it exits with an error when the
+best wall time of `python -c "import uScope.main"` is more than --max-ratio
+times that of a bare `python -c pass`, or when the import takes longer than
+--max-ms. The ratio holds up on machines of any speed, unlike a fixed limit.
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--max-ratio R] [--max-ms MS]
+"""
+import argparse
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import REFERENCE_TRACE
+
+_IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times():
+    """{module: (self, cumulative)} in microseconds for one import of uScope.main."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import uScope.main"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for match in _IMPORT_TIME.finditer(result.stderr):
+        times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def best_wall(command, repeat: int) -> float:
+    """Best wall time of running command, in seconds."""
+    wall = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True)
+        wall = min(wall, time.perf_counter() - start)
+    return wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs to take the best of")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Fail if importing uScope.main takes longer than this")
+    parser.add_argument("--max-ratio", type=float, default=None,
+                        help="Fail if starting python and importing uScope.main takes longer "
+                             "than this many times starting a bare python")
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.repeat)]
+    best = min(runs, key=lambda times: times["uScope.main"][1])
+    total_ms = best["uScope.main"][1] / 1000
+    print(f"import uScope.main: {total_ms:.1f} ms")
+    print("slowest modules (self time):")
+    for name, (own, _) in sorted(best.items(), key=lambda item: -item[1][0])[:10]:
+        print(f"  {own / 1000:6.1f} ms  {name}")
+
+    bare = best_wall([sys.executable, "-c", "pass"], args.repeat)
+    startup = best_wall([sys.executable, "-c", "import uScope.main"], args.repeat)
+    ratio = startup / bare
+    print(f"python -c pass: {bare * 1000:.1f} ms, with import uScope.main: "
+          f"{startup * 1000:.1f} ms ({ratio:.1f}x)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        command = [sys.executable, "-m", "uScope", "-q", "--no-cache",
+                   "-i", str(REFERENCE_TRACE), "-o", tmp]
+        wall = best_wall(command, args.repeat)
+    print(f"convert {REFERENCE_TRACE.name}: {wall * 1000:.1f} ms")
+
+    if args.max_ratio is not None and ratio > args.max_ratio:
+        sys.exit(f"starting with import uScope.main took {ratio:.1f}x a bare python, "
+                 f"more than {args.max_ratio}x")
+    if args.max_ms is not None and total_ms > args.max_ms:
+        sys.exit(f"import uScope.main took {total_ms:.1f} ms, more than {args.max_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare indented JSON with compact JSON on every installed backend and with
+Perfetto protobuf output.
+
+Usage: python benchmarks/bench_writer.py [--copies N]
+"""
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+from common import best_of, make_scaled_trace
+
+from uScope.config import load_config
+from uScope.converter import ChromeTracingConverter
+from uScope.parser import MmapPipeViewParser
+from uScope.perfetto import PerfettoProtoWriter
+from uScope.writer import TraceFileWriter, compact_dumps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=20,
+                        help="Number of replicas of the reference trace")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trace = make_scaled_trace(Path(tmp, "trace.out"), args.copies)
+        trace_parser = MmapPipeViewParser()
+        trace_parser.parse_file(str(trace))
+        events = ChromeTracingConverter(trace_parser, load_config()).convert_events(progress=False)
+        output = str(Path(tmp, "trace.json"))
+
+        def run(indent, backend=None, make_writer=None):
+            def once():
+                writer = (make_writer or TraceFileWriter)(output, indent=indent, backend=backend)
+                writer.write(events)
+                writer.close()
+            return best_of(once), os.path.getsize(output)
+
+        print(f"{len(events)} events")
+        base, base_size = run(2)
+        print(f"{'pretty':>14}: {base:.3f}s  {base_size / 2**20:7.1f} MiB")
+        for backend in ("json", "ujson", "orjson"):
+            try:
+                compact_dumps(backend)
+            except ImportError:
+                print(f"{'compact ' + backend:>14}: not installed")
+                continue
+            elapsed, size = run(None, backend)
+            print(f"{'compact ' + backend:>14}: {elapsed:.3f}s  {size / 2**20:7.1f} MiB  "
+                  f"({base / elapsed:.2f}x faster, {size / base_size:.0%} of the size)")
+
+        elapsed, size = run(None, make_writer=lambda path, **_: PerfettoProtoWriter(path))
+        print(f"{'perfetto-proto':>14}: {elapsed:.3f}s  {size / 2**20:7.1f} MiB  "
+              f"({base / elapsed:.2f}x faster, {size / base_size:.0%} of the size)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Helpers shared by the benchmark scripts."""
+import re
+import time
+from pathlib import Path
+
+REFERENCE_TRACE = Path(__file__).parent.parent.joinpath("examples/reference/reference.out")
+
+_FETCH = re.compile(r"(O3PipeView:fetch:)(\d+)(:[^:]*:\d+:)(\d+)(:.*)")
+
+
+def make_scaled_trace(path: Path, copies: int, source: Path = REFERENCE_TRACE) -> Path:
+    """Write ``copies`` back-to-back replicas of ``source`` with shifted ticks and seq nums."""
+    lines = source.read_text().splitlines()
+    max_seq = max(int(m.group(4)) for m in map(_FETCH.match, lines) if m)
+    max_tick = max(int(t) for line in lines for t in re.findall(r":(\d+)", line))
+
+    with open(path, "w") as f:
+        for k in range(copies):
+            seq_off, tick_off = k * max_seq, k * max_tick
+            for line in lines:
+                m = _FETCH.match(line)
+                if m:
+                    f.write(f"{m.group(1)}{int(m.group(2)) + tick_off}{m.group(3)}"
+                            f"{int(m.group(4)) + seq_off}{m.group(5)}\n")
+                    continue
+                parts = line.split(":")
+                # Zero ticks mark stages a squashed instruction never reached
+                for i in (2, 4):
+                    if len(parts) > i and parts[i].isdigit() and parts[i] != "0":
+                        parts[i] = str(int(parts[i]) + tick_off)
+                f.write(":".join(parts) + "\n")
+    return path
+
+
+def best_of(func, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
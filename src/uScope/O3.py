@@ -1,6 +1,8 @@
-from dataclasses import dataclass
+from array import array
+from collections.abc import MutableMapping
 from enum import Enum
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 
 class PipelineStage(Enum):
     FETCH = "fetch"
@@ -25,28 +27,227 @@ class PipelineStage(Enum):
     def __str__(self) -> str:
         return self.value
 
-@dataclass
+# Position of each stage in PipelineStage.order() (STORE_COMPLETE comes last).
+# A plain attribute, so hot loops avoid hashing enum members.
+for _ordinal, _stage in enumerate(PipelineStage):
+    _stage.ordinal = _ordinal
+
+STAGES = tuple(PipelineStage.order())
+NUM_STAGES = len(STAGES)
+
+# Stage order is packed into an int, one octal digit (ordinal + 1) per stage,
+# first seen stage in the lowest digit.
+ORDER_BITS = 3
+FULL_ORDER = sum((i + 1) << (ORDER_BITS * i) for i in range(NUM_STAGES))
+
+
+def encode_stage_order(stage_order: Iterable[PipelineStage]) -> int:
+    order = 0
+    for shift, stage in enumerate(stage_order):
+        order |= (stage.ordinal + 1) << (ORDER_BITS * shift)
+    return order
+
+
+def decode_stage_order(order: int) -> List[PipelineStage]:
+    stages = []
+    while order:
+        stages.append(STAGES[(order & 7) - 1])
+        order >>= ORDER_BITS
+    return stages
+
+
+# Packed order -> (bitmask of present stage ordinals, shift of the next digit).
+# A trace only produces a handful of distinct orders.
+_ORDER_INFO: Dict[int, Tuple[int, int]] = {}
+
+
+def _order_info(order: int) -> Tuple[int, int]:
+    info = _ORDER_INFO.get(order)
+    if info is None:
+        stages = decode_stage_order(order)
+        mask = sum(1 << stage.ordinal for stage in stages)
+        info = _ORDER_INFO[order] = (mask, ORDER_BITS * len(stages))
+    return info
+
+
+# Bound on the distinct disassembly strings (static instructions) remembered
+MNEMONIC_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=MNEMONIC_CACHE_SIZE)
+def mnemonic_of(disasm: str) -> str:
+    if not disasm:
+        return Instruction.UNKNOWN
+    return disasm.split()[0].upper()
+
+
+class StageTicks(MutableMapping):
+    """Dict-like view of an instruction's stage ticks, in stage order."""
+
+    __slots__ = ("_instr",)
+
+    def __init__(self, instr: "Instruction"):
+        self._instr = instr
+
+    def __getitem__(self, stage: PipelineStage) -> int:
+        if stage not in self:
+            raise KeyError(stage)
+        return self._instr.ticks[stage.ordinal]
+
+    def __setitem__(self, stage: PipelineStage, tick: int):
+        self._instr.set_stage(stage, tick)
+
+    def __delitem__(self, stage: PipelineStage):
+        instr = self._instr
+        if stage not in self:
+            raise KeyError(stage)
+        instr.order = encode_stage_order(s for s in decode_stage_order(instr.order) if s is not stage)
+        instr.ticks[stage.ordinal] = 0
+
+    def __contains__(self, stage) -> bool:
+        return isinstance(stage, PipelineStage) and self._instr.has_stage(stage)
+
+    def __iter__(self):
+        return iter(decode_stage_order(self._instr.order))
+
+    def __len__(self) -> int:
+        return _order_info(self._instr.order)[1] // ORDER_BITS
+
+    def get(self, stage: PipelineStage, default=None):
+        return self._instr.ticks[stage.ordinal] if stage in self else default
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
 class Instruction:
+    """A single instruction record.
+
+    Stage ticks live in a fixed array indexed by ``PipelineStage.ordinal``
+    (0 for stages that never appeared) and the order the stages were seen in
+    is packed into the ``order`` int. ``stages`` and ``stage_order`` present
+    them as a dict and a list.
+    """
+
     UNKNOWN = "UNKNOWN"
 
-    seq_num: int
-    pc: str
-    disasm: str
-    opclass: str
-    stages: Dict[PipelineStage, int]
-    stage_order: List[PipelineStage]
-    store_tick: int = 0
-    core_id: int = 0
+    __slots__ = ("seq_num", "pc", "disasm", "opclass", "ticks", "order", "store_tick", "core_id")
+
+    def __init__(
+        self,
+        seq_num: int,
+        pc: str,
+        disasm: str,
+        opclass: str,
+        stages: Optional[Dict[PipelineStage, int]] = None,
+        stage_order: Optional[List[PipelineStage]] = None,
+        store_tick: int = 0,
+        core_id: int = 0,
+    ):
+        self.seq_num = seq_num
+        self.pc = pc
+        self.disasm = disasm
+        self.opclass = opclass
+        self.ticks = array("q", bytes(8 * NUM_STAGES))
+        self.order = 0
+        self.store_tick = store_tick
+        self.core_id = core_id
+        stages = stages or {}
+        for stage in list(stage_order or ()) + [s for s in stages if s not in (stage_order or ())]:
+            self.set_stage(stage, stages.get(stage, 0))
+
+    @classmethod
+    def from_ticks(
+        cls,
+        seq_num: int,
+        pc: str,
+        disasm: str,
+        opclass: str,
+        ticks: array,
+        order: int,
+        store_tick: int = 0,
+        core_id: int = 0,
+    ) -> "Instruction":
+        """Build an instruction from an already packed tick array and order."""
+        instr = cls.__new__(cls)
+        instr.seq_num = seq_num
+        instr.pc = pc
+        instr.disasm = disasm
+        instr.opclass = opclass
+        instr.ticks = ticks
+        instr.order = order
+        instr.store_tick = store_tick
+        instr.core_id = core_id
+        return instr
+
+    @property
+    def stages(self) -> StageTicks:
+        return StageTicks(self)
+
+    @property
+    def stage_order(self) -> List[PipelineStage]:
+        return decode_stage_order(self.order)
+
+    def tick(self, stage: PipelineStage) -> int:
+        """Tick of a stage, 0 if the instruction never reached it."""
+        return self.ticks[stage.ordinal]
+
+    def has_stage(self, stage: PipelineStage) -> bool:
+        return bool(_order_info(self.order)[0] >> stage.ordinal & 1)
+
+    def set_stage(self, stage: PipelineStage, tick: int):
+        ordinal = stage.ordinal
+        order = self.order
+        info = _ORDER_INFO.get(order) or _order_info(order)
+        if not info[0] >> ordinal & 1:
+            self.order = order | (ordinal + 1) << info[1]
+        self.ticks[ordinal] = tick
+
+    def active_stages(self) -> List[Tuple[PipelineStage, int]]:
+        """(stage, tick) pairs with a non-zero tick, in the order they were seen."""
+        ticks = self.ticks
+        if self.order == FULL_ORDER:
+            return [(stage, tick) for stage, tick in zip(STAGES, ticks) if tick > 0]
+        return [(stage, ticks[stage.ordinal]) for stage in decode_stage_order(self.order)
+                if ticks[stage.ordinal] > 0]
 
     @property
     def mnemonic(self):
-        if not self.disasm:
-            return Instruction.UNKNOWN
-        return self.disasm.split()[0].upper()
+        return mnemonic_of(self.disasm)
 
     @property
     def is_squashed(self) -> bool:
-        return self.stages.get(PipelineStage.RETIRE, 0) == 0
+        return self.ticks[PipelineStage.RETIRE.ordinal] == 0
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+            self.seq_num == other.seq_num
+            and self.pc == other.pc
+            and self.disasm == other.disasm
+            and self.opclass == other.opclass
+            and self.ticks == other.ticks
+            and self.order == other.order
+            and self.store_tick == other.store_tick
+            and self.core_id == other.core_id
+        )
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __repr__(self) -> str:
+        return (
+            f"Instruction(seq_num={self.seq_num!r}, pc={self.pc!r}, disasm={self.disasm!r}, "
+            f"opclass={self.opclass!r}, stages={dict(self.stages)!r}, "
+            f"store_tick={self.store_tick!r}, core_id={self.core_id!r})"
+        )
 
 # NOTE: https://github.com/gem5/gem5/blob/stable/src/cpu/FuncUnit.py
 class OpClass(Enum):
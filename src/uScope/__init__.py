@@ -1,7 +1,27 @@
 __version__ = "0.1.0"
 
-from .parser import PipeViewParser
-from .converter import ChromeTracingConverter
-from .config import Config
+__all__ = [ "PipeViewParser", "ChromeTracingConverter", "Config", "CompiledConfig" ]
 
-__all__ = [ "PipeViewParser", "ChromeTracingConverter", "Config" ]
+# Public names are imported on first use, so that running the CLI or importing
+# a single submodule does not load the whole package
+_LAZY_IMPORTS = {
+    "PipeViewParser": ".parser",
+    "ChromeTracingConverter": ".converter",
+    "Config": ".config",
+    "CompiledConfig": ".config",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,135 @@
+"""Built-in configuration, generated from configs/*.json; do not edit.
+
+Regenerate with ``python -m uScope.config`` after changing the JSON files.
+"""
+
+
+def builtin_configs() -> dict:
+    # A new copy on every call, so that configs never share state
+    return {
+        "colors": {
+            "IntALU": ["rail_idle", "bad", "thread_state_iowait", "cq_build_failed"],
+            "IntMultDiv": ["rail_animation", "cq_build_attempt_failed", "terrible"],
+            "FP_ALU": ["good", "rail_load", "cq_build_attempt_passed"],
+            "FP_MultDiv": ["good", "rail_load", "cq_build_attempt_passed", "thread_state_running"],
+            "SIMD_Unit": ["thread_state_uninterruptible", "startup", "cq_build_passed", "cq_build_attempt_running", "yellow"],
+            "PredALU": ["grey", "thread_state_sleeping", "cq_build_abandoned", "thread_state_unknown"],
+            "Matrix_Unit": ["bad", "terrible", "thread_state_uninterruptible"],
+            "System_Unit": ["grey", "thread_state_sleeping", "thread_state_unknown"],
+            "ReadPort": ["rail_response", "thread_state_runnable", "background_memory_dump"],
+            "WritePort": ["rail_load", "good", "thread_state_running", "cq_build_attempt_passed"],
+            "RdWrPort": ["startup", "yellow", "cq_build_attempt_running"],
+            "OTHER": ["grey", "thread_state_sleeping", "cq_build_abandoned", "thread_state_unknown"],
+            "No_OpClass": ["grey", "cq_build_abandoned", "thread_state_sleeping", "thread_state_unknown"],
+            "default": ["generic_work", "startup", "good", "rail_idle", "yellow"],
+            "squashed": "grey",
+        },
+        "func_units": {
+            "IntAlu": "IntALU",
+            "IntMult": "IntMultDiv",
+            "IntDiv": "IntMultDiv",
+            "FloatAdd": "FP_ALU",
+            "FloatCmp": "FP_ALU",
+            "FloatCvt": "FP_ALU",
+            "Bf16Cvt": "FP_ALU",
+            "FloatMult": "FP_MultDiv",
+            "FloatMultAcc": "FP_MultDiv",
+            "FloatMisc": "FP_MultDiv",
+            "FloatDiv": "FP_MultDiv",
+            "FloatSqrt": "FP_MultDiv",
+            "SimdAdd": "SIMD_Unit",
+            "SimdAddAcc": "SIMD_Unit",
+            "SimdAlu": "SIMD_Unit",
+            "SimdCmp": "SIMD_Unit",
+            "SimdCvt": "SIMD_Unit",
+            "SimdMisc": "SIMD_Unit",
+            "SimdMult": "SIMD_Unit",
+            "SimdMultAcc": "SIMD_Unit",
+            "SimdMatMultAcc": "SIMD_Unit",
+            "SimdShift": "SIMD_Unit",
+            "SimdShiftAcc": "SIMD_Unit",
+            "SimdDiv": "SIMD_Unit",
+            "SimdSqrt": "SIMD_Unit",
+            "SimdFloatAdd": "SIMD_Unit",
+            "SimdFloatAlu": "SIMD_Unit",
+            "SimdFloatCmp": "SIMD_Unit",
+            "SimdFloatCvt": "SIMD_Unit",
+            "SimdFloatDiv": "SIMD_Unit",
+            "SimdFloatMisc": "SIMD_Unit",
+            "SimdFloatMult": "SIMD_Unit",
+            "SimdFloatMultAcc": "SIMD_Unit",
+            "SimdFloatMatMultAcc": "SIMD_Unit",
+            "SimdFloatSqrt": "SIMD_Unit",
+            "SimdReduceAdd": "SIMD_Unit",
+            "SimdReduceAlu": "SIMD_Unit",
+            "SimdReduceCmp": "SIMD_Unit",
+            "SimdFloatReduceAdd": "SIMD_Unit",
+            "SimdFloatReduceCmp": "SIMD_Unit",
+            "SimdExt": "SIMD_Unit",
+            "SimdFloatExt": "SIMD_Unit",
+            "SimdConfig": "SIMD_Unit",
+            "SimdDotProd": "SIMD_Unit",
+            "SimdAes": "SIMD_Unit",
+            "SimdAesMix": "SIMD_Unit",
+            "SimdSha1Hash": "SIMD_Unit",
+            "SimdSha1Hash2": "SIMD_Unit",
+            "SimdSha256Hash": "SIMD_Unit",
+            "SimdSha256Hash2": "SIMD_Unit",
+            "SimdShaSigma2": "SIMD_Unit",
+            "SimdShaSigma3": "SIMD_Unit",
+            "SimdSha3": "SIMD_Unit",
+            "SimdSm4e": "SIMD_Unit",
+            "SimdCrc": "SIMD_Unit",
+            "SimdBf16Add": "SIMD_Unit",
+            "SimdBf16Cmp": "SIMD_Unit",
+            "SimdBf16Cvt": "SIMD_Unit",
+            "SimdBf16DotProd": "SIMD_Unit",
+            "SimdBf16MatMultAcc": "SIMD_Unit",
+            "SimdBf16Mult": "SIMD_Unit",
+            "SimdBf16MultAcc": "SIMD_Unit",
+            "SimdPredAlu": "PredALU",
+            "Matrix": "Matrix_Unit",
+            "MatrixMov": "Matrix_Unit",
+            "MatrixOP": "Matrix_Unit",
+            "System": "System_Unit",
+            "MemRead": "ReadPort",
+            "FloatMemRead": "ReadPort",
+            "SimdUnitStrideLoad": "ReadPort",
+            "SimdUnitStrideMaskLoad": "ReadPort",
+            "SimdUnitStrideSegmentedLoad": "ReadPort",
+            "SimdStridedLoad": "ReadPort",
+            "SimdIndexedLoad": "ReadPort",
+            "SimdUnitStrideFaultOnlyFirstLoad": "ReadPort",
+            "SimdUnitStrideSegmentedFaultOnlyFirstLoad": "ReadPort",
+            "SimdWholeRegisterLoad": "ReadPort",
+            "SimdStrideSegmentedLoad": "ReadPort",
+            "MemWrite": "WritePort",
+            "FloatMemWrite": "WritePort",
+            "SimdUnitStrideStore": "WritePort",
+            "SimdUnitStrideMaskStore": "WritePort",
+            "SimdUnitStrideSegmentedStore": "WritePort",
+            "SimdStridedStore": "WritePort",
+            "SimdIndexedStore": "WritePort",
+            "SimdWholeRegisterStore": "WritePort",
+            "SimdStrideSegmentedStore": "WritePort",
+            "IprAccess": "RdWrPort",
+            "InstPrefetch": "RdWrPort",
+        },
+        "settings": {
+            "PID_PIPELINE_STAGES_BASE": 100,
+            "PID_FUNC_UNITS_BASE": 200,
+            "PID_STORE_COMPLETIONS_BASE": 300,
+            "MAX_PIPE_WIDTH": 256,
+            "MAX_FUNC_UNITS_WIDTH": 8,
+        },
+        "stage_names": {
+            "fetch": "Fetch",
+            "decode": "Decode",
+            "rename": "Rename",
+            "dispatch": "Dispatch",
+            "issue": "Issue",
+            "complete": "Complete",
+            "retire": "Retire",
+            "store_complete": "Store Complete",
+        },
+    }
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from . import __version__
+from .O3 import NUM_STAGES, STAGES, Instruction
+from .store import InstructionStore
+
+if TYPE_CHECKING:
+    from .table import InstructionTable
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".uscope-cache"
+CACHE_MAGIC = b"USCOPEC\x01"
+CACHE_FORMAT_VERSION = 2
+
+_COLUMNS = (
+    ["core_id", "seq_num", "fetch", "stage_order", "store_tick", "pc", "disasm", "opclass"]
+    + [f"{stage}_offset" for stage in STAGES[1:]]
+)
+
+InstructionMap = Dict[Tuple[int, int], Instruction]
+
+
+def cache_dir() -> Path:
+    """Directory of the parse caches: $XDG_CACHE_HOME/uScope, ~/.cache/uScope by default."""
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(root, "uScope")
+
+
+def cache_path(trace_file: str) -> Path:
+    """Cache of a trace, named after it and a hash of its absolute path."""
+    source = os.path.abspath(trace_file)
+    digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+    return cache_dir().joinpath(f"{os.path.basename(source)}-{digest}{CACHE_SUFFIX}")
+
+
+def _source_key(trace_file: str) -> dict:
+    st = os.stat(trace_file)
+    return {
+        "path": os.path.abspath(trace_file),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "uScope": __version__,
+        "format": CACHE_FORMAT_VERSION,
+    }
+
+
+def _to_bytes(column: array) -> bytes:
+    if sys.byteorder != "little":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_bytes(data: bytes) -> array:
+    column = array("q")
+    column.frombytes(data)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+def save_cache(trace_file: str, instructions: InstructionMap):
+    """Write the parsed instructions next to the trace in a columnar layout.
+
+    Fetch ticks and seq nums are delta-encoded, other stage ticks are stored
+    relative to the fetch tick, stage order is kept in its packed form and
+    strings go through a string table.
+    """
+    strings: Dict[str, int] = {}
+    columns = {name: array("q") for name in _COLUMNS}
+    offsets = [columns[f"{stage}_offset"] for stage in STAGES[1:]]
+
+    prev_seq = prev_fetch = 0
+    for (core_id, _), instr in instructions.items():
+        ticks = instr.ticks
+        fetch = ticks[0]
+        columns["core_id"].append(core_id)
+        columns["seq_num"].append(instr.seq_num - prev_seq)
+        columns["fetch"].append(fetch - prev_fetch)
+        columns["stage_order"].append(instr.order)
+        columns["store_tick"].append(instr.store_tick)
+        for name in ("pc", "disasm", "opclass"):
+            columns[name].append(strings.setdefault(getattr(instr, name), len(strings)))
+        for tick, column in zip(ticks[1:], offsets):
+            column.append(tick - fetch)
+        prev_seq, prev_fetch = instr.seq_num, fetch
+
+    header = json.dumps({
+        "source": _source_key(trace_file),
+        "count": len(instructions),
+        "columns": list(_COLUMNS),
+        "strings": list(strings),
+    }).encode("utf-8")
+    payload = zlib.compress(b"".join(_to_bytes(columns[name]) for name in _COLUMNS), 1)
+
+    path = cache_path(trace_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(CACHE_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _read_cache(trace_file: str) -> Optional[Tuple[Dict[str, array], List[str]]]:
+    """The cached columns and string table, or None if the cache is missing or stale."""
+    path = cache_path(trace_file)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    try:
+        if not data.startswith(CACHE_MAGIC):
+            raise ValueError("bad magic")
+        start = len(CACHE_MAGIC)
+        (header_len,) = struct.unpack_from("<I", data, start)
+        start += 4
+        header = json.loads(data[start : start + header_len])
+        if header["source"] != _source_key(trace_file) or header["columns"] != list(_COLUMNS):
+            logger.debug(f"Cache {path} is stale")
+            return None
+
+        count = header["count"]
+        raw = zlib.decompress(data[start + header_len :])
+        if len(raw) != 8 * count * len(_COLUMNS):
+            raise ValueError("truncated payload")
+        columns = {
+            name: _from_bytes(raw[8 * count * i : 8 * count * (i + 1)])
+            for i, name in enumerate(_COLUMNS)
+        }
+    except (ValueError, KeyError, struct.error, zlib.error) as e:
+        logger.warning(f"Ignoring unreadable cache {path}: {e}")
+        return None
+    return columns, header["strings"]
+
+
+def load_cache(trace_file: str) -> Optional[InstructionStore]:
+    """Return the cached instructions, or None if the cache is missing or stale."""
+    cached = _read_cache(trace_file)
+    if cached is None:
+        return None
+    columns, strings = cached
+    instructions = InstructionStore()
+    rows = zip(
+        columns["core_id"],
+        accumulate(columns["seq_num"]),
+        accumulate(columns["fetch"]),
+        columns["stage_order"],
+        columns["store_tick"],
+        columns["pc"],
+        columns["disasm"],
+        columns["opclass"],
+        *(columns[f"{stage}_offset"] for stage in STAGES[1:]),
+    )
+    for core_id, seq_num, fetch, order, store_tick, pc, disasm, opclass, *offsets in rows:
+        instructions.set_record(
+            core_id,
+            seq_num,
+            strings[pc],
+            strings[disasm],
+            strings[opclass],
+            [fetch] + [fetch + offset for offset in offsets],
+            order,
+            store_tick,
+        )
+    return instructions
+
+
+def load_cache_table(trace_file: str) -> Optional["InstructionTable"]:
+    """Like load_cache(), but straight into an InstructionTable (requires NumPy).
+
+    The columns are decoded with NumPy, without an Instruction per row.
+    """
+    from .table import InstructionTable, np
+
+    cached = _read_cache(trace_file)
+    if cached is None:
+        return None
+    columns, strings = cached
+
+    def column(name: str):
+        return np.frombuffer(columns[name], dtype=np.int64)
+
+    fetch = np.cumsum(column("fetch"))
+    ticks = np.empty((len(fetch), NUM_STAGES), dtype=np.int64)
+    ticks[:, 0] = fetch
+    for stage in STAGES[1:]:
+        ticks[:, stage.ordinal] = fetch + column(f"{stage}_offset")
+    return InstructionTable(
+        np.cumsum(column("seq_num")),
+        column("core_id"),
+        ticks,
+        column("stage_order"),
+        column("store_tick"),
+        column("pc").astype(np.int32),
+        column("disasm").astype(np.int32),
+        column("opclass").astype(np.int32),
+        strings,
+    )
@@ -1,7 +1,7 @@
 import json
 import logging
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, Optional, Tuple
 from abc import ABC, abstractmethod
 
 from .O3 import PipelineStage, OpClass, Instruction
@@ -9,6 +9,9 @@ from .utils import stable_hash
 
 logger = logging.getLogger(__name__)
 
+# Bound on the (opclass, mnemonic) pairs whose color CompiledConfig remembers
+COLOR_CACHE_SIZE = 1 << 16
+
 
 class IConfig(ABC):
     @abstractmethod
@@ -53,6 +56,9 @@ class Config(IConfig):
         self._data = data
 
     def __getattr__(self, name: str):
+        if name == "_data":
+            # Not set yet, e.g. while unpickling; avoid recursing into ourselves
+            raise AttributeError(name)
         key = name.lstrip("_")
         if key in self._data:
             value = self._data[key]
@@ -118,26 +124,151 @@ class Config(IConfig):
         return self._data.copy()
 
 
-def load_config(config_path: Optional[Path] = None) -> Config:
-    config_data = {}
+class CompiledConfig(Config):
+    """Config with the lookups made per event resolved up front.
+
+    Nested access on Config goes through __getattr__ and wraps every dict in
+    a new Config. Here the tables are flattened once into plain dicts and
+    tuples: opclass to functional unit, stage ordinal to stage name, unit to
+    color family, and the integer settings. The flat tables are built from
+    the data at construction time, so it must not be changed afterwards.
+    """
+
+    def __init__(self, data: dict):
+        super().__init__(data)
+        settings = data.get("settings", {})
+        self._pipeline_pid = settings.get("PID_PIPELINE_STAGES_BASE")
+        self._func_units_pid = settings.get("PID_FUNC_UNITS_BASE")
+        self._store_completions_pid = settings.get("PID_STORE_COMPLETIONS_BASE")
+        self._pipeline_width = settings.get("MAX_PIPE_WIDTH")
+        self._func_units_width = settings.get("MAX_FUNC_UNITS_WIDTH")
+
+        self._unit_of_opclass = dict(data.get("func_units", {}))
+        stage_names = data.get("stage_names", {})
+        # Indexed by PipelineStage.ordinal, None for stages without a name
+        self._stage_name_of_ordinal = tuple(stage_names.get(stage.value) for stage in PipelineStage)
+
+        colors = data.get("colors", {})
+        self._default_family = colors.get("default")
+        # Every color key, as Config looks units up there directly, whether or
+        # not an opclass maps to them
+        self._family_of_unit = dict(colors)
+        self._squashed_cname = colors.get("squashed")
+        # (opclass, mnemonic) -> color, so each static instruction is hashed once
+        self._color_of_instr: Dict[Tuple[Any, str], str] = {}
+
+    @property
+    def pipeline_pid(self) -> int:
+        return self._pipeline_pid
+
+    @property
+    def func_units_pid(self) -> int:
+        return self._func_units_pid
+
+    @property
+    def pipeline_width(self) -> int:
+        return self._pipeline_width
+
+    @property
+    def func_units_width(self) -> int:
+        return self._func_units_width
+
+    @property
+    def store_completions_pid(self) -> int:
+        return self._store_completions_pid
+
+    def get_func_unit(self, opclass: Any) -> str:
+        unit = self._unit_of_opclass.get(opclass)
+        if unit is None:
+            unit = self._unit_of_opclass.get(str(opclass), "No_OpClass")
+        return unit
+
+    def get_stage_name(self, stage: PipelineStage) -> str:
+        name = self._stage_name_of_ordinal[stage.ordinal]
+        if name is None:
+            raise KeyError(stage.value)
+        return name
+
+    def get_color_for_func_unit(self, unit) -> str:
+        family = self._family_of_unit.get(unit)
+        return self._default_family if family is None else family
+
+    def get_color_for_instr(self, instr: Instruction) -> str:
+        key = (instr.opclass, instr.mnemonic)
+        color = self._color_of_instr.get(key)
+        if color is None:
+            if len(self._color_of_instr) >= COLOR_CACHE_SIZE:
+                self._color_of_instr.clear()
+            family = self.get_color_for_func_unit(self.get_func_unit(key[0]))
+            color = self._color_of_instr[key] = family[stable_hash(key[1], len(family))]
+        return color
+
+    def get_squashed_cname(self) -> str:
+        return self._squashed_cname
 
-    builtin_dir = Path(__file__).parent.joinpath("configs")
 
-    if builtin_dir.is_dir():
-        for json_file in builtin_dir.glob("*.json"):
-            key = json_file.stem
-            with open(json_file, "r", encoding="utf-8") as f:
-                config_data[key] = json.load(f)
+BUILTIN_CONFIG_DIR = Path(__file__).parent.joinpath("configs")
+BUILTIN_CONFIG_MODULE = Path(__file__).parent.joinpath("builtin_configs.py")
+
+
+def read_config_dir(config_dir: Path) -> dict:
+    """Parse every ``<key>.json`` of a directory into ``{key: data}``."""
+    config_data = {}
+    for json_file in sorted(config_dir.glob("*.json")):
+        with open(json_file, "r", encoding="utf-8") as f:
+            config_data[json_file.stem] = json.load(f)
+    return config_data
+
+
+def _python_literal(value: Any, level: int = 0) -> str:
+    """Python source of JSON data: a key per line in dicts, lists on one line."""
+    if isinstance(value, dict):
+        pad = "    " * (level + 1)
+        items = "".join(
+            f"{pad}{_python_literal(key)}: {_python_literal(item, level + 1)},\n"
+            for key, item in value.items()
+        )
+        return "{\n" + items + "    " * level + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(_python_literal(item, level) for item in value) + "]"
+    if isinstance(value, str):
+        # Double-quoted like the rest of the code base
+        return json.dumps(value, ensure_ascii=False)
+    return repr(value)
+
+
+def builtin_module_source() -> str:
+    """Source of builtin_configs.py, generated from the configs/ directory."""
+    data = _python_literal(read_config_dir(BUILTIN_CONFIG_DIR), level=1)
+    return (
+        '"""Built-in configuration, generated from configs/*.json; do not edit.\n'
+        "\n"
+        "Regenerate with ``python -m uScope.config`` after changing the JSON files.\n"
+        '"""\n'
+        "\n"
+        "\n"
+        "def builtin_configs() -> dict:\n"
+        "    # A new copy on every call, so that configs never share state\n"
+        f"    return {data}\n"
+    )
+
+
+def load_config(config_path: Optional[Path] = None) -> CompiledConfig:
+    # Precompiled from configs/*.json, which saves reading and parsing them
+    from .builtin_configs import builtin_configs
+
+    config_data = builtin_configs()
 
     if config_path is not None:
         if config_path.is_dir():
-            for json_file in config_path.glob("*.json"):
-                key = json_file.stem
-                with open(json_file, "r", encoding="utf-8") as f:
-                    config_data[key] = json.load(f)
+            config_data.update(read_config_dir(config_path))
         else:
             logger.warning(
                 "Config path '%s' is not a directory — ignoring", config_path
             )
 
-    return Config(config_data)
+    return CompiledConfig(config_data)
+
+
+if __name__ == "__main__":
+    BUILTIN_CONFIG_MODULE.write_text(builtin_module_source(), encoding="utf-8")
@@ -1,15 +1,240 @@
-from typing import Dict, List, Optional, Tuple
-
-from tqdm import tqdm
-
-from .O3 import PipelineStage, Instruction
-from .events import MetadataEvent, DurationEvent
-from .thread_pool import StageLaneManager
-from .config import IConfig
+import heapq
+import itertools
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .O3 import STAGES, PipelineStage, Instruction, mnemonic_of
+from .events import Event, MetadataEvent, DurationEvent
+from .thread_pool import StageLaneManager, assign_optimal_lanes
+from .config import CompiledConfig, Config, IConfig
+from .intervals import NUM_SLOTS, SLOT_FUNC_UNIT, SLOT_STORE, stage_intervals
 from .parser import PipeViewParser
+from .writer import JsonArrayWriter, event_format, string_encoder
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .table import InstructionTable
+
+DEFAULT_STREAM_WINDOW = 4096
+
+# Lanes are assigned online as events are produced (greedy), or once the
+# whole trace is known with the fewest lanes possible (optimal)
+LANE_MODE_GREEDY = "greedy"
+LANE_MODE_OPTIMAL = "optimal"
+LANE_MODES = (LANE_MODE_GREEDY, LANE_MODE_OPTIMAL)
+
+
+def _progress(iterable: Iterable, progress: bool, **kwargs) -> Iterable:
+    """Wrap ``iterable`` in a tqdm bar, importing tqdm only when one is shown."""
+    if not progress:
+        return iterable
+    from tqdm import tqdm
+
+    return tqdm(iterable, **kwargs)
+
+
+# Color mappings that depend only on the opclass and the mnemonic
+_BUILTIN_COLOR_MAPPINGS = (Config.get_color_for_instr, CompiledConfig.get_color_for_instr)
+
+
+class SeqNumReorderBuffer:
+    """Restores seq_num order within a bounded window of in-flight instructions.
+
+    gem5 dumps a record when the instruction leaves the pipeline, so records
+    arrive only roughly in program order.
+    """
+
+    def __init__(self, window: int = DEFAULT_STREAM_WINDOW):
+        self.window = window
+        self._heap: List[Tuple[int, int, Instruction]] = []
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, instr: Instruction) -> List[Instruction]:
+        heapq.heappush(self._heap, (instr.seq_num, next(self._counter), instr))
+        released = []
+        while len(self._heap) > self.window:
+            released.append(heapq.heappop(self._heap)[-1])
+        return released
+
+    def flush(self) -> List[Instruction]:
+        released = []
+        while self._heap:
+            released.append(heapq.heappop(self._heap)[-1])
+        return released
+
+
+class _EventWindow(NamedTuple):
+    """A run of table events and the per-row columns they refer to.
+
+    Columns are numpy arrays. ``row`` indexes the per-row columns, which only
+    cover the window's rows; string columns hold codes into ``strings``
+    (``mnemonics`` has the mnemonic of each) and ``cname`` codes into
+    ``cnames``.
+    """
+
+    strings: List[str]
+    mnemonics: List[str]
+    cnames: List[Optional[str]]
+    seq_num: "np.ndarray"
+    pc: "np.ndarray"
+    disasm: "np.ndarray"
+    opclass: "np.ndarray"
+    cname: "np.ndarray"
+    row: "np.ndarray"
+    slot: "np.ndarray"
+    start: "np.ndarray"
+    dur: "np.ndarray"
+    pid: "np.ndarray"
+    tid: "np.ndarray"
+    stage_names: List[str]
+    units: List[Optional[str]]
+    store_name: str
+
+
+# Keys of the args of table events, for pipeline stages, functional units
+# and store completions; and the event column of those that are not per row
+_ARGS_KEYS = (
+    ("PC", "SeqNum", "Stage", "OpClass", "Disasm"),
+    ("PC", "SeqNum", "OpClass", "Unit", "Duration", "Disasm"),
+    ("PC", "SeqNum", "OpClass", "Stage", "Duration", "Disasm"),
+)
+_ARGS_COLUMNS = {"Stage": "cat", "Unit": "cat", "Duration": "dur"}
+
+
+def _build_table_events(window: _EventWindow) -> List[DurationEvent]:
+    strings = window.strings
+    mnemonics = window.mnemonics
+    seq_nums = window.seq_num.tolist()
+    pcs = window.pc.tolist()
+    disasms = window.disasm.tolist()
+    opclasses = window.opclass.tolist()
+    cnames = [window.cnames[code] for code in window.cname.tolist()]
+    stage_names = window.stage_names
+    units = window.units
+    store_name = window.store_name
+
+    events = []
+    append = events.append
+    for row, slot, ts, dur, pid, tid in zip(
+        window.row.tolist(), window.slot.tolist(), window.start.tolist(),
+        window.dur.tolist(), window.pid.tolist(), window.tid.tolist()
+    ):
+        pc = strings[pcs[row]]
+        disasm = strings[disasms[row]]
+        opclass = strings[opclasses[row]]
+        if slot < SLOT_FUNC_UNIT:
+            cat = stage_names[slot]
+            args = {"PC": pc, "SeqNum": seq_nums[row], "Stage": cat,
+                    "OpClass": opclass, "Disasm": disasm}
+        elif slot == SLOT_FUNC_UNIT:
+            cat = units[opclasses[row]]
+            args = {"PC": pc, "SeqNum": seq_nums[row], "OpClass": opclass,
+                    "Unit": cat, "Duration": dur, "Disasm": disasm}
+        else:
+            cat = store_name
+            args = {"PC": pc, "SeqNum": seq_nums[row], "OpClass": opclass,
+                    "Stage": cat, "Duration": dur, "Disasm": disasm}
+
+        append(DurationEvent(mnemonics[disasms[row]], pid, ts, dur, cat, args, cnames[row],
+                             "X", tid))
+    return events
+
+
+def _event_template(args_keys: Tuple[str, ...], cname: bool, indent: Optional[int],
+                    backend: Optional[str]) -> str:
+    """event_format() of the table events with these args, and a cname or not."""
+    fields = ("{%d}" % i for i in itertools.count())
+    name, pid, ts, dur, cat = itertools.islice(fields, 5)
+    args = {key: next(fields) for key in args_keys}
+    event = DurationEvent(name, pid, ts, dur, cat, args, next(fields) if cname else None,
+                          "X", next(fields))
+    return event_format(event, indent, backend)
+
+
+def _format_event_window(window: _EventWindow, indent: Optional[int],
+                         backend: Optional[str] = None) -> Tuple[str, int]:
+    """format_events() of the window's events, straight from its columns.
+
+    Fields are gathered as columns of ints or JSON texts and filled into
+    one template per kind of event, without building the events. Runs of
+    per-row fields are filled in once per instruction.
+    """
+    from .table import np
+
+    encode = string_encoder(indent, backend)
+
+    def encoded(values: List[Optional[str]], codes: "np.ndarray") -> "np.ndarray":
+        """JSON texts of values[code] for every code, None for None."""
+        used, inverse = np.unique(codes, return_inverse=True)
+        texts = np.empty(len(used), dtype=object)
+        texts[:] = [None if values[code] is None else encode(values[code])
+                    for code in used.tolist()]
+        return texts[inverse.reshape(-1)]
+
+    row = window.row
+    slot = window.slot
+    row_columns = {
+        "name": encoded(window.mnemonics, window.disasm),
+        "PC": encoded(window.strings, window.pc),
+        "SeqNum": window.seq_num,
+        "OpClass": encoded(window.strings, window.opclass),
+        "Disasm": encoded(window.strings, window.disasm),
+        "cname": encoded(window.cnames, window.cname),
+    }
+
+    slot_cats: List[Optional[str]] = [None] * NUM_SLOTS
+    slot_cats[:SLOT_FUNC_UNIT] = window.stage_names
+    slot_cats[SLOT_STORE] = window.store_name
+    cat = encoded(slot_cats, slot)
+    unit_events = slot == SLOT_FUNC_UNIT
+    cat[unit_events] = encoded(window.units, window.opclass[row[unit_events]])
+    event_columns = {"pid": window.pid, "ts": window.start, "dur": window.dur, "cat": cat,
+                     "tid": window.tid}
+
+    # Index in _ARGS_KEYS: pipeline stages, functional units, store completions
+    kind = np.clip(slot - (SLOT_FUNC_UNIT - 1), 0, 2)
+    has_cname = np.array([c is not None for c in window.cnames], dtype=bool)[window.cname[row]]
+
+    texts = np.empty(len(row), dtype=object)
+    for event_kind, args_keys in enumerate(_ARGS_KEYS):
+        for with_cname in (True, False):
+            selected = np.flatnonzero((kind == event_kind) & (has_cname == with_cname))
+            if not len(selected):
+                continue
+            names = ["name", "pid", "ts", "dur", "cat"]
+            names += [_ARGS_COLUMNS.get(key, key) for key in args_keys]
+            names += ["cname", "tid"] if with_cname else ["tid"]
+            pieces = _event_template(args_keys, with_cname, indent, backend).split("%s")
+
+            template = pieces[0]
+            fields = []
+            first = 0
+            while first < len(names):
+                end = first + 1
+                if names[first] in row_columns:
+                    while end < len(names) and names[end] in row_columns:
+                        end += 1
+                    run_template = "%s".join(["", *pieces[first + 1:end], ""])
+                    run = zip(*(row_columns[name].tolist() for name in names[first:end]))
+                    run_texts = np.array([run_template % values for values in run], dtype=object)
+                    fields.append(run_texts[row[selected]].tolist())
+                else:
+                    fields.append(event_columns[names[first]][selected].tolist())
+                template += "%s" + pieces[end]
+                first = end
+            texts[selected] = [template % values for values in zip(*fields)]
+    return ",\n".join(texts.tolist()), len(texts)
 
 
 class ChromeTracingConverter:
+    # Windows per worker in write_table(), to even out uneven windows
+    WINDOWS_PER_JOB = 4
+    # Most events per window, which bounds the text held at once
+    WINDOW_EVENTS = 1 << 16
+
     def __init__(
         self,
         parser: PipeViewParser,
@@ -18,8 +243,13 @@ class ChromeTracingConverter:
         exclude_pipeline: bool = False,
         only_committed: bool = False,
         store_completions: bool = True,
+        table: Optional["InstructionTable"] = None,
+        lane_mode: str = LANE_MODE_GREEDY,
     ):
         self.parser: PipeViewParser = parser
+        # When set, instructions are taken from this columnar table instead
+        # of parser.instructions
+        self.table: Optional["InstructionTable"] = table
         if not isinstance(config, IConfig):
             raise TypeError(
                 f"Unexpected Config type {type(config).__name__}. "
@@ -31,6 +261,9 @@ class ChromeTracingConverter:
         self.exclude_pipeline: bool = exclude_pipeline
         self.only_committed: bool = only_committed
         self.store_completions: bool = store_completions
+        if lane_mode not in LANE_MODES:
+            raise ValueError(f"Unknown lane mode {lane_mode!r}, expected one of {LANE_MODES}")
+        self.lane_mode: str = lane_mode
 
         self.metadata_events: List[MetadataEvent] = []
         self.duration_events: List[DurationEvent] = []
@@ -39,34 +272,321 @@ class ChromeTracingConverter:
         self.func_units_managers: Dict[str, StageLaneManager] = {}
         self.store_lane_manager: Optional[StageLaneManager] = None
 
+        self.streaming: bool = False
+
     def convert(self, progress: bool = True) -> List[dict]:
+        return [e.to_dict() for e in self.convert_events(progress)]
+
+    def convert_events(self, progress: bool = True) -> List[Event]:
+        """Like convert(), but returns the Event objects for writers to serialize."""
         self._add_metadata()
+        if self.table is not None:
+            return self._convert_table(progress)
+
         instructions = self.instructions_by_seq_num()
-        for instr in tqdm(
+        for instr in _progress(
             instructions,
+            progress,
             desc="Converting",
             unit="instr",
-            disable=not progress,
             leave=False,
         ):
-            if self.only_committed and instr.is_squashed:
+            self._add_instruction_events(instr)
+
+        if self.lane_mode == LANE_MODE_OPTIMAL:
+            self._assign_optimal_lanes(self.duration_events)
+        return self.metadata_events + self.duration_events
+
+    def _assign_optimal_lanes(self, events: List[DurationEvent]):
+        tids, lanes = assign_optimal_lanes(
+            [e.pid for e in events], [e.ts for e in events], [e.ts + e.dur for e in events]
+        )
+        for event, tid in zip(events, tids):
+            event.tid = tid
+        self._add_lanes(lanes)
+
+    def _add_lanes(self, lanes: Dict[int, int]):
+        """Emit lane metadata for lanes assigned offline, manager by manager."""
+        managers = list(self.stage_managers.values()) + list(self.func_units_managers.values())
+        if self.store_lane_manager is not None:
+            managers.append(self.store_lane_manager)
+        for manager in managers:
+            manager.add_lanes(lanes.get(manager.pid, 0))
+
+    def _convert_table(self, progress: bool) -> List[Event]:
+        """Bulk conversion of the columnar table.
+
+        Event intervals are computed for the whole table at once; only lane
+        assignment, which depends on every earlier event, runs per event.
+        Events come out in the same order and with the same content as the
+        per-instruction path. write_table() skips building them for JSON.
+        """
+        table, intervals = self._table_intervals()
+        pids, tids = self._assign_table_lanes(table, intervals, progress)
+        window = self._event_windows(table, intervals, pids, tids, 1)[0]
+        return self.metadata_events + _build_table_events(window)
+
+    def write_table(self, writer: JsonArrayWriter, jobs: int = 1, progress: bool = True) -> int:
+        """Convert the table and write it, formatting events from its columns.
+
+        Lanes are assigned in one exact serial pass, so the output is
+        identical to convert(). The seq-ordered events are then cut into
+        windows on instruction boundaries, which are formatted straight from
+        the interval, lane and row arrays without building events; in
+        ``jobs`` worker processes when more than one. They are written in
+        order. Returns the number of events written.
+        """
+        self._add_metadata()
+        table, intervals = self._table_intervals()
+        pids, tids = self._assign_table_lanes(table, intervals, progress)
+        writer.write(self.metadata_events)
+
+        count = max(jobs * self.WINDOWS_PER_JOB, -(-len(intervals) // self.WINDOW_EVENTS))
+        windows = self._event_windows(table, intervals, pids, tids, count)
+        options = (itertools.repeat(writer.indent), itertools.repeat(writer.backend))
+        if jobs <= 1:
+            chunks = map(_format_event_window, windows, *options)
+            for chunk, count in _progress(chunks, progress, total=len(windows),
+                                          desc="Writing", unit="window", leave=False):
+                writer.write_chunk(chunk, count)
+            return writer.count
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for chunk, count in pool.map(_format_event_window, windows, *options):
+                writer.write_chunk(chunk, count)
+        return writer.count
+
+    def _table_intervals(self):
+        table = self._table_by_seq_num()
+        intervals = stage_intervals(
+            table,
+            pipeline=not self.exclude_pipeline,
+            func_units=not self.exclude_exec,
+            store_completions=self.store_completions,
+        )
+        return table, intervals
+
+    def _assign_table_lanes(self, table: "InstructionTable", intervals, progress: bool):
+        """pid and lane of every interval, as arrays.
+
+        Lane managers don't share state, so each one assigns its own
+        intervals in a single batch.
+        """
+        if self.lane_mode == LANE_MODE_OPTIMAL:
+            return self._assign_optimal_table_lanes(table, intervals)
+        from .table import np
+
+        # Manager of every slot, then of the functional unit of every opclass code
+        owners = [self.stage_managers.get(stage) for stage in STAGES]
+        owners += [None, self.store_lane_manager]
+        owners += [self.func_units_managers.get(unit) for unit in self._table_units(table)]
+        managers = list({id(m): m for m in owners if m is not None}.values())
+        owner_ids = np.array([managers.index(m) if m is not None else -1 for m in owners])
+
+        slot = intervals.slot
+        unit_events = slot == SLOT_FUNC_UNIT
+        owner = slot.copy()
+        owner[unit_events] = NUM_SLOTS + table.opclass[intervals.row[unit_events]]
+        manager_ids = owner_ids[owner]
+
+        starts = intervals.start
+        ends = starts + intervals.dur
+        pids = np.empty(len(intervals), dtype=np.int64)
+        tids = np.empty(len(intervals), dtype=np.int64)
+        by_manager = np.argsort(manager_ids, kind="stable")
+        bounds = np.searchsorted(manager_ids[by_manager], np.arange(len(managers) + 1))
+        metadata_start = len(self.metadata_events)
+        # Interval that opened the lane of every lane metadata event
+        opened_by: List[int] = []
+        for i, manager in enumerate(_progress(managers, progress, desc="Converting",
+                                              unit="process", leave=False)):
+            selected = by_manager[bounds[i]:bounds[i + 1]]
+            start = starts[selected]
+            end = ends[selected]
+            # An interval finds every lane free unless it starts before some
+            # earlier one ends
+            busy_until = np.maximum.accumulate(np.concatenate(([manager.free_from()], end[:-1])))
+            overlapping = np.flatnonzero(start < busy_until)
+
+            first_new_tid = manager.next_tid
+            metadata_added = len(self.metadata_events)
+            assigned = np.array(
+                manager.assign_lanes(start.tolist(), end.tolist(), overlapping.tolist()),
+                dtype=np.int64,
+            )
+            pids[selected] = manager.pid
+            tids[selected] = assigned
+
+            in_new_lanes = np.flatnonzero(assigned >= first_new_tid)
+            new_tids, first = np.unique(assigned[in_new_lanes], return_index=True)
+            opener = dict(zip(new_tids.tolist(), selected[in_new_lanes[first]].tolist()))
+            opened_by += [opener[event.tid] for event in self.metadata_events[metadata_added:]]
+
+        # Lanes were opened manager by manager; list them in event order as
+        # assigning one event at a time does
+        lane_metadata = self.metadata_events[metadata_start:]
+        order = sorted(range(len(lane_metadata)), key=opened_by.__getitem__)
+        self.metadata_events[metadata_start:] = [lane_metadata[i] for i in order]
+        return pids, tids
+
+    def _assign_optimal_table_lanes(self, table: "InstructionTable", intervals):
+        slot_pids = [
+            self.stage_managers[stage].pid if stage in self.stage_managers else None
+            for stage in STAGES
+        ]
+        unit_pids = [
+            self.func_units_managers[unit].pid if unit in self.func_units_managers else None
+            for unit in self._table_units(table)
+        ]
+        slot_pids.append(None)
+        slot_pids.append(self.config.store_completions_pid)
+
+        opclasses = table.opclass.tolist()
+        pids = [
+            unit_pids[opclasses[row]] if slot == SLOT_FUNC_UNIT else slot_pids[slot]
+            for row, slot in zip(intervals.row.tolist(), intervals.slot.tolist())
+        ]
+        tids, lanes = assign_optimal_lanes(
+            pids, intervals.start.tolist(), (intervals.start + intervals.dur).tolist()
+        )
+        self._add_lanes(lanes)
+        from .table import np
+
+        return np.array(pids, dtype=np.int64), np.array(tids, dtype=np.int64)
+
+    def _table_units(self, table: "InstructionTable") -> List[Optional[str]]:
+        """Functional unit of every string code, None for empty strings."""
+        return [self.config.get_func_unit(s) if s else None for s in table.strings]
+
+    def _event_windows(self, table: "InstructionTable", intervals, pids, tids, count: int):
+        """Cut the events into up to ``count`` windows of whole instructions."""
+        from .table import np
+
+        cnames, cname_codes = self._table_cnames(table)
+        mnemonics = [mnemonic_of(s) for s in table.strings]
+        stage_names = [self.config.get_stage_name(stage) for stage in STAGES]
+        units = self._table_units(table)
+        store_name = self.config.get_stage_name(PipelineStage.STORE_COMPLETE)
+
+        # Cut points are moved back to the first event of their instruction
+        rows = intervals.row
+        total = len(rows)
+        cuts = {int(np.searchsorted(rows, rows[total * k // count])) for k in range(1, count)}
+        bounds = sorted({0, total} | (cuts if total else set()))
+        if len(bounds) == 1:
+            bounds.append(total)
+
+        windows = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            first_row = int(rows[lo]) if hi > lo else 0
+            end_row = int(rows[hi - 1]) + 1 if hi > lo else 0
+            windows.append(_EventWindow(
+                strings=table.strings,
+                mnemonics=mnemonics,
+                cnames=cnames,
+                seq_num=table.seq_num[first_row:end_row],
+                pc=table.pc[first_row:end_row],
+                disasm=table.disasm[first_row:end_row],
+                opclass=table.opclass[first_row:end_row],
+                cname=cname_codes[first_row:end_row],
+                row=rows[lo:hi] - first_row,
+                slot=intervals.slot[lo:hi],
+                start=intervals.start[lo:hi],
+                dur=intervals.dur[lo:hi],
+                pid=pids[lo:hi],
+                tid=tids[lo:hi],
+                stage_names=stage_names,
+                units=units,
+                store_name=store_name,
+            ))
+        return windows
+
+    def _table_cnames(self, table: "InstructionTable") -> Tuple[List[Optional[str]], "np.ndarray"]:
+        """Distinct colors of the table, and the code of every row's color in them."""
+        from .table import np
+
+        codes: Dict[Optional[str], int] = {}
+        rows = [codes.setdefault(cname, len(codes)) for cname in self._row_cnames(table)]
+        return list(codes), np.array(rows, dtype=np.int64)
+
+    def _row_cnames(self, table: "InstructionTable") -> List[Optional[str]]:
+        squashed = table.is_squashed.tolist()
+        squashed_cname = self.config.get_squashed_cname()
+        if type(self.config).get_color_for_instr not in _BUILTIN_COLOR_MAPPINGS:
+            # A custom color mapping may look at any field, so ask per instruction
+            return [
+                squashed_cname if is_squashed else self.config.get_color_for_instr(instr)
+                for instr, is_squashed in zip(table, squashed)
+            ]
+
+        # The built-in mapping only depends on the opclass and the mnemonic
+        colors = {}
+        cnames = []
+        for instr_key, is_squashed in zip(zip(table.opclass.tolist(), table.disasm.tolist()), squashed):
+            if is_squashed:
+                cnames.append(squashed_cname)
                 continue
-            if not self.exclude_pipeline:
-                self._add_pipeline_stage_events(instr)
-            if not self.exclude_exec:
-                self._add_execution_unit_events(instr)
-            if self.store_completions and instr.store_tick > 0:
-                self._add_store_completion_event(instr)
+            color = colors.get(instr_key)
+            if color is None:
+                opclass, disasm = (table.strings[code] for code in instr_key)
+                color = colors[instr_key] = self.config.get_color_for_instr(
+                    Instruction(0, "", disasm, opclass)
+                )
+            cnames.append(color)
+        return cnames
+
+    def start_stream(self) -> List[Event]:
+        """Switch to incremental conversion and return the initial metadata.
+
+        Instructions are then passed one by one to feed(), in seq_num order.
+        Functional unit processes are registered as units are first seen,
+        since the set of units is not known upfront.
+        """
+        if self.lane_mode != LANE_MODE_GREEDY:
+            raise ValueError("Lanes can only be assigned greedily when streaming")
+        self.streaming = True
+        self._add_metadata()
+        return self._drain_events()
+
+    def feed(self, instr: Instruction) -> List[Event]:
+        self._add_instruction_events(instr)
+        return self._drain_events()
 
-        return [e.to_dict() for e in self.metadata_events + self.duration_events]
+    def _drain_events(self) -> List[Event]:
+        events = self.metadata_events + self.duration_events
+        # Lane managers keep a reference to metadata_events, so clear in place.
+        self.metadata_events.clear()
+        self.duration_events.clear()
+        return events
+
+    def _add_instruction_events(self, instr: Instruction):
+        if self.only_committed and instr.is_squashed:
+            return
+        if not self.exclude_pipeline:
+            self._add_pipeline_stage_events(instr)
+        if not self.exclude_exec:
+            self._add_execution_unit_events(instr)
+        if self.store_completions and instr.store_tick > 0:
+            self._add_store_completion_event(instr)
 
     def instructions_by_seq_num(self):
+        if self.table is not None:
+            return list(self.table.sort_by_seq())
         return sorted(self.parser.instructions.values(), key=lambda x: x.seq_num)
 
+    def _table_by_seq_num(self) -> "InstructionTable":
+        # Squashed instructions are filtered up front rather than one by one
+        table = self.table.sort_by_seq()
+        if self.only_committed:
+            table = table.committed()
+        return table
+
     def _add_metadata(self):
         if not self.exclude_pipeline:
             self._add_pipeline_stages_metadata()
-        if not self.exclude_exec:
+        if not self.exclude_exec and not self.streaming:
             self._add_execution_units_metadata()
         if self.store_completions:
             self._add_store_completions_metadata()
@@ -91,37 +611,52 @@ class ChromeTracingConverter:
             )
 
     def _add_execution_units_metadata(self):
+        if self.table is not None:
+            opclasses = self.table.unique_strings("opclass")
+        else:
+            opclasses = (instr.opclass for instr in self.parser.instructions.values())
         unit_names = set()
-        for instr in self.instructions_by_seq_num():
-            if instr.opclass:
-                unit_names.add(self.config.get_func_unit(instr.opclass))
+        for opclass in opclasses:
+            if opclass:
+                unit_names.add(self.config.get_func_unit(opclass))
 
-        for i, unit_name in enumerate(sorted(unit_names)):
-            pid = self.config.func_units_pid + i
+        for unit_name in sorted(unit_names):
+            self._add_func_unit_manager(unit_name)
 
-            manager = StageLaneManager(
-                max_width=self.config.func_units_width,
-                pid=pid,
-                lane_name_prefix=unit_name,
-                metadata_events=self.metadata_events,
-            )
-            self.func_units_managers[unit_name] = manager
+    def _add_func_unit_manager(self, unit_name: str):
+        pid = self.config.func_units_pid + len(self.func_units_managers)
 
-            self.metadata_events.append(
-                MetadataEvent(
-                    name="process_name", pid=pid, args={"name": f"{unit_name}"}
-                )
+        manager = StageLaneManager(
+            max_width=self.config.func_units_width,
+            pid=pid,
+            lane_name_prefix=unit_name,
+            metadata_events=self.metadata_events,
+        )
+        self.func_units_managers[unit_name] = manager
+
+        self.metadata_events.append(
+            MetadataEvent(
+                name="process_name", pid=pid, args={"name": f"{unit_name}"}
             )
+        )
 
     def _assign_lane_for_stage(
         self, stage: PipelineStage, start_time: int, end_time: int
     ) -> Tuple[int, int]:
-        return self.stage_managers[stage].assign_lane(start_time, end_time)
+        return self._assign_lane(self.stage_managers[stage], start_time, end_time)
 
     def _assign_lane_for_func_units(
         self, unit_name: str, start_time: int, end_time: int
     ) -> Tuple[int, int]:
-        return self.func_units_managers[unit_name].assign_lane(start_time, end_time)
+        return self._assign_lane(self.func_units_managers[unit_name], start_time, end_time)
+
+    def _assign_lane(
+        self, manager: StageLaneManager, start_time: int, end_time: int
+    ) -> Tuple[int, int]:
+        if self.lane_mode == LANE_MODE_OPTIMAL:
+            # Placeholder, lanes are assigned once all events are known
+            return manager.pid, 0
+        return manager.assign_lane(start_time, end_time)
 
     def _cname_for(self, instr: Instruction) -> str:
         if instr.is_squashed:
@@ -132,11 +667,7 @@ class ChromeTracingConverter:
         mnemonic = instr.mnemonic
         cname = self._cname_for(instr)
 
-        active = [
-            (st, instr.stages[st])
-            for st in instr.stage_order
-            if instr.stages.get(st, 0) > 0
-        ]
+        active = instr.active_stages()
         if not active:
             return
         active.sort(key=lambda x: x[1])
@@ -145,11 +676,12 @@ class ChromeTracingConverter:
             dur = max(1, active[i + 1][1] - tick) if i < len(active) - 1 else 1
             start, end = tick, tick + dur
             pid, tid = self._assign_lane_for_stage(stage, start, end)
+            stage_name = self.config.get_stage_name(stage)
 
             self.duration_events.append(
                 DurationEvent(
                     name=mnemonic,
-                    cat=self.config.get_stage_name(stage),
+                    cat=stage_name,
                     ts=tick,
                     dur=dur,
                     pid=pid,
@@ -158,7 +690,7 @@ class ChromeTracingConverter:
                     args={
                         "PC": instr.pc,
                         "SeqNum": instr.seq_num,
-                        "Stage": self.config.get_stage_name(stage),
+                        "Stage": stage_name,
                         "OpClass": instr.opclass,
                         "Disasm": instr.disasm,
                     },
@@ -171,14 +703,16 @@ class ChromeTracingConverter:
 
         mnemonic = instr.mnemonic
 
-        issue = instr.stages.get(PipelineStage.ISSUE, 0)
-        complete = instr.stages.get(PipelineStage.COMPLETE, 0)
+        issue = instr.tick(PipelineStage.ISSUE)
+        complete = instr.tick(PipelineStage.COMPLETE)
         if issue <= 0 or complete <= 0 or issue >= complete:
             return
 
         unit = self.config.get_func_unit(instr.opclass)
         if unit not in self.func_units_managers:
-            return
+            if not self.streaming:
+                return
+            self._add_func_unit_manager(unit)
 
         pid, tid = self._assign_lane_for_func_units(unit, issue, complete)
         dur = complete - issue
@@ -225,7 +759,7 @@ class ChromeTracingConverter:
         )
 
     def _add_store_completion_event(self, instr: Instruction):
-        retire_tick = instr.stages.get(PipelineStage.RETIRE, 0)
+        retire_tick = instr.tick(PipelineStage.RETIRE)
         store_tick = instr.store_tick
         if retire_tick <= 0 or store_tick <= 0 or store_tick <= retire_tick:
             return
@@ -236,7 +770,7 @@ class ChromeTracingConverter:
         pid = self.config.store_completions_pid
         tid = 0
         if self.store_lane_manager is not None:
-            _, tid = self.store_lane_manager.assign_lane(retire_tick, store_tick)
+            _, tid = self._assign_lane(self.store_lane_manager, retire_tick, store_tick)
 
         dur = store_tick - retire_tick
         cname = self._cname_for(instr)
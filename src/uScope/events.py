@@ -1,29 +1,143 @@
-from dataclasses import dataclass, asdict
-from typing import Any, Dict, Optional
+import json
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    from _json import encode_basestring_ascii as _encode_str
+except ImportError:  # pragma: no cover - pure-Python interpreters
+    from json.encoder import encode_basestring_ascii as _encode_str
+
+
+def _encode_value(value: Any) -> str:
+    kind = type(value)
+    if kind is str:
+        return _encode_str(value)
+    if kind is int:
+        return int.__repr__(value)
+    return json.dumps(value)
+
+
+def _encode_object(items, indent: Optional[int], item_sep: str, key_sep: str, level: int) -> str:
+    """Encode key/value pairs exactly like json.dumps() with the same options."""
+    parts = [
+        _encode_str(key) + key_sep + (
+            _encode_object(value.items(), indent, item_sep, key_sep, level + 1)
+            if type(value) is dict else _encode_value(value)
+        )
+        for key, value in items
+    ]
+    if not parts:
+        return "{}"
+    if indent is None:
+        return "{" + item_sep.join(parts) + "}"
+    newline = "\n" + " " * (indent * (level + 1))
+    return "{" + newline + (item_sep + newline).join(parts) + "\n" + " " * (indent * level) + "}"
+
 
-@dataclass
 class Event:
-    name: str
-    pid: int
+    """Base of the trace events.
+
+    Events are slotted and serialize themselves: to_json() produces the
+    same text as json.dumps(event.to_dict(), ...) without building the dict
+    or copying ``args``.
+    """
+
+    __slots__ = ("name", "pid")
+
+    def __init__(self, name: str, pid: int):
+        self.name = name
+        self.pid = pid
+
+    def _items(self) -> Iterator[Tuple[str, Any]]:
+        for field in self._fields():
+            value = getattr(self, field)
+            if value is not None:
+                yield field, value
+
+    @classmethod
+    def _fields(cls) -> Tuple[str, ...]:
+        return ("name", "pid")
 
     def to_dict(self) -> Dict[str, Any]:
-        d = asdict(self)
-        return {k: v for k, v in d.items() if v is not None}
+        d = self._dict()
+        if "args" in d:
+            d["args"] = dict(d["args"])
+        return d
+
+    def _dict(self) -> Dict[str, Any]:
+        """Fields that are not None, sharing ``args``; for serializers only."""
+        return dict(self._items())
+
+    def to_json(self, indent: Optional[int] = None, separators: Optional[Tuple[str, str]] = None,
+                level: int = 0) -> str:
+        """Serialize like json.dumps(self.to_dict(), indent=..., separators=...).
+
+        ``level`` is the nesting depth the object is written at, so that an
+        indented event can go straight into an indented array.
+        """
+        if separators is None:
+            separators = (", ", ": ") if indent is None else (",", ": ")
+        return _encode_object(self._items(), indent, separators[0], separators[1], level)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self._fields())
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self._fields())
+        return f"{type(self).__name__}({fields})"
 
 
-@dataclass
 class MetadataEvent(Event):
-    args: Dict[str, Any]
-    ph: str = "M"
-    tid: Optional[int] = None
+    __slots__ = ("args", "ph", "tid")
+
+    def __init__(self, name: str, pid: int, args: Dict[str, Any], ph: str = "M",
+                 tid: Optional[int] = None):
+        self.name = name
+        self.pid = pid
+        self.args = args
+        self.ph = ph
+        self.tid = tid
+
+    @classmethod
+    def _fields(cls) -> Tuple[str, ...]:
+        return ("name", "pid", "args", "ph", "tid")
+
+    def _dict(self) -> Dict[str, Any]:
+        d = {"name": self.name, "pid": self.pid, "args": self.args, "ph": self.ph}
+        if self.tid is not None:
+            d["tid"] = self.tid
+        return d
 
 
-@dataclass
 class DurationEvent(Event):
-    ts: int
-    dur: int
-    cat: str
-    args: Dict[str, Any]
-    cname: Optional[str] = None
-    ph: str = "X"
-    tid: Optional[int] = None
+    __slots__ = ("ts", "dur", "cat", "args", "cname", "ph", "tid")
+
+    def __init__(self, name: str, pid: int, ts: int, dur: int, cat: str, args: Dict[str, Any],
+                 cname: Optional[str] = None, ph: str = "X", tid: Optional[int] = None):
+        self.name = name
+        self.pid = pid
+        self.ts = ts
+        self.dur = dur
+        self.cat = cat
+        self.args = args
+        self.cname = cname
+        self.ph = ph
+        self.tid = tid
+
+    @classmethod
+    def _fields(cls) -> Tuple[str, ...]:
+        return ("name", "pid", "ts", "dur", "cat", "args", "cname", "ph", "tid")
+
+    def _dict(self) -> Dict[str, Any]:
+        # Written out by hand: this is the hot path of the compact writer
+        d = {"name": self.name, "pid": self.pid, "ts": self.ts, "dur": self.dur,
+             "cat": self.cat, "args": self.args}
+        if self.cname is not None:
+            d["cname"] = self.cname
+        d["ph"] = self.ph
+        if self.tid is not None:
+            d["tid"] = self.tid
+        return d
@@ -1,56 +1,708 @@
 #!/usr/bin/env python3
 
 import argparse
+import glob
+import json
 import os
 import sys
-import json
 import logging
-import gzip
+import time
 
+from operator import attrgetter
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
 
 from . import __version__
-from .parser import PipeViewParser
-from .converter import ChromeTracingConverter
+from .parser import (
+    PipeViewParser,
+    MmapPipeViewParser,
+    ParallelPipeViewParser,
+    TraceWindow,
+    STDIN,
+    COMPRESSION_SUFFIXES,
+    DEFAULT_END_TICK_SLACK,
+    is_regular_file,
+)
+from .converter import (
+    ChromeTracingConverter,
+    SeqNumReorderBuffer,
+    DEFAULT_STREAM_WINDOW,
+    LANE_MODE_GREEDY,
+    LANE_MODES,
+)
 from .config import load_config
+from .cache import CACHE_SUFFIX, load_cache, load_cache_table, save_cache
+from .writer import DEFAULT_GZIP_LEVEL, TraceFileWriter, RollingTraceWriter
+from .store import InstructionStore
+
+if TYPE_CHECKING:
+    from .table import InstructionTable
+
+# Modules that only some options need (NumPy, tqdm, multiprocessing and the
+# non-JSON writers) are imported where they are used, to keep startup fast.
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
+FORMAT_JSON = "json"
+FORMAT_PERFETTO_PROTO = "perfetto-proto"
+FORMAT_SQLITE = "sqlite"
+# Extension of the traces picked up from input directories, before any
+# compression suffix
+TRACE_SUFFIX = ".out"
 
-def _make_output_path(output_dir: str, input_stem: str, core_id: int, gzip_enabled: bool) -> str:
-    output = str(Path(output_dir) / f"{input_stem}_{core_id}.json")
+# File extension of every output format
+OUTPUT_FORMATS = {
+    FORMAT_JSON: ".json",
+    FORMAT_PERFETTO_PROTO: ".pftrace",
+    FORMAT_SQLITE: ".sqlite",
+}
+
+
+def _make_output_path(
+    output_dir: str, input_stem: str, core_id: int, gzip_enabled: bool, part: Optional[int] = None,
+    extension: str = ".json",
+) -> str:
+    suffix = extension if part is None else f".{part:04d}{extension}"
+    output = str(Path(output_dir) / f"{input_stem}_{core_id}{suffix}")
     if gzip_enabled:
         output += '.gz'
     return output
 
 
+def _input_stem(input_file: str) -> str:
+    if input_file == STDIN:
+        return "stdin"
+    path = Path(input_file)
+    if path.suffix in COMPRESSION_SUFFIXES:
+        path = path.with_suffix("")
+    return path.stem
+
+
+def _seq_range(value: str):
+    first, sep, last = value.partition(":")
+    try:
+        if not sep:
+            raise ValueError
+        return (int(first) if first else None, int(last) if last else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid sequence range '{value}', expected FIRST:LAST (either side may be empty)"
+        ) from None
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+        if number <= 0:
+            raise ValueError
+        return number
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got '{value}'") from None
+
+
+def _non_negative_int(value: str) -> int:
+    try:
+        number = int(value)
+        if number < 0:
+            raise ValueError
+        return number
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a non-negative integer, got '{value}'") from None
+
+
+def _make_window(args) -> Optional[TraceWindow]:
+    if args.start_tick is None and args.end_tick is None and args.seq_range is None:
+        return None
+    first_seq, last_seq = args.seq_range or (None, None)
+    return TraceWindow(args.start_tick, args.end_tick, first_seq, last_seq, args.end_tick_slack)
+
+
+def _parse_trace(input_file: str, args) -> Tuple[PipeViewParser, Optional["InstructionTable"]]:
+    """Parse a trace, or load it from the cache: into a table with --columnar."""
+    window = _make_window(args)
+    # The cache always holds the full trace, so it is bypassed for windowed
+    # parses, and pipes have no identity to key it on
+    use_cache = args.cache and window is None and is_regular_file(input_file)
+
+    if use_cache and not args.rebuild_cache:
+        if args.columnar:
+            table = load_cache_table(input_file)
+            if table is not None:
+                logger.info(f"Loaded {len(table)} instructions from cache")
+                return PipeViewParser(), table
+        else:
+            instructions = load_cache(input_file)
+            if instructions is not None:
+                logger.info(f"Loaded {len(instructions)} instructions from cache")
+                trace_parser = PipeViewParser()
+                trace_parser.instructions = instructions
+                return trace_parser, None
+
+    logger.info(f"Parsing {input_file}")
+    if args.jobs != 1:
+        trace_parser = ParallelPipeViewParser(args.jobs, window=window)
+    else:
+        trace_parser = MmapPipeViewParser(window)
+    trace_parser.parse_file(input_file)
+
+    if use_cache and trace_parser.instructions:
+        try:
+            save_cache(input_file, trace_parser.instructions)
+        except OSError as e:
+            # e.g. a read-only home directory; the cache is only an optimization
+            logger.debug(f"Could not write parse cache: {e}")
+    return trace_parser, None
+
+
+def _output_indent(args) -> Optional[int]:
+    return 2 if args.pretty else None
+
+
+def _output_path(args, input_stem: str, core_id: int) -> str:
+    return _make_output_path(
+        args.output_dir, input_stem, core_id, args.gzip, extension=OUTPUT_FORMATS[args.format]
+    )
+
+
+def _split_output_path(output_file: str) -> Tuple[str, str]:
+    """Split trace_0.json.gz into ("trace_0", ".json.gz")."""
+    for extension in OUTPUT_FORMATS.values():
+        for suffix in (extension + ".gz", extension):
+            if output_file.endswith(suffix):
+                return output_file[: -len(suffix)], suffix
+    return output_file, ""
+
+
+def _splitting(args) -> bool:
+    return args.split_every_ticks is not None or args.max_events_per_file is not None
+
+
+def _make_file_writer(output_file: str, args):
+    if args.format == FORMAT_PERFETTO_PROTO:
+        from .perfetto import PerfettoProtoWriter
+
+        return PerfettoProtoWriter(output_file, args.gzip, args.gzip_level, args.gzip_threads)
+    if args.format == FORMAT_SQLITE:
+        from .sqlite_export import SqliteTraceWriter
+
+        return SqliteTraceWriter(output_file)
+    return TraceFileWriter(output_file, args.gzip, _output_indent(args),
+                           gzip_level=args.gzip_level, gzip_threads=args.gzip_threads)
+
+
+def _make_writer(output_file: str, args):
+    """Writer for one core's output, split into numbered parts if requested."""
+    if not _splitting(args):
+        return _make_file_writer(output_file, args)
+
+    root, suffix = _split_output_path(output_file)
+
+    def path_for_part(part: int) -> str:
+        part_output = f"{root}.{part:04d}{suffix}"
+        logger.info(f"Writing {part_output}")
+        return part_output
+
+    return RollingTraceWriter(
+        path_for_part, args.max_events_per_file,
+        split_every_ticks=args.split_every_ticks,
+        manifest_path=f"{root}_manifest.json",
+        open_part=lambda path: _make_file_writer(path, args),
+    )
+
+
+def _table_formatting_reason(table, args) -> Optional[str]:
+    """Why the events of a core can't be formatted straight from the table, if so.
+
+    They are then built as objects and formatted in a single process.
+    """
+    if table is None:
+        return "parallel formatting requires --columnar"
+    if args.format != FORMAT_JSON:
+        return f"parallel formatting is not supported for --format {args.format}"
+    if _splitting(args):
+        return "parallel formatting is not supported with split output"
+    return None
+
+
 def _convert_and_dump(
     trace_parser: PipeViewParser,
     config,
     args,
     output_file: str,
     progress: bool,
+    table=None,
+    jobs: int = 1,
 ):
     converter = ChromeTracingConverter(
         trace_parser, config,
         args.exclude_exec, args.exclude_pipeline,
         args.only_committed, args.store_completions,
+        table=table, lane_mode=args.lane_mode,
     )
-    events = converter.convert(progress=progress)
-    logger.info(f"Writing {output_file}")
-    with (gzip.open if args.gzip else open)(output_file, 'wt', encoding='utf-8') as f:
-        json.dump(events, f, indent=2)
+    reason = _table_formatting_reason(table, args)
+    if reason is None:
+        if jobs > 1:
+            logger.info(f"Writing {output_file} with {jobs} processes")
+        else:
+            logger.info(f"Writing {output_file}")
+        writer = _make_file_writer(output_file, args)
+        total = converter.write_table(writer, jobs, progress=progress)
+        writer.close()
+        return total
+    if jobs > 1:
+        logger.info(f"Formatting events in a single process: {reason}")
+
+    events = converter.convert_events(progress=progress)
+    if args.split_every_ticks is not None:
+        # Fill the time windows one after the other
+        events = [e for e in events if e.ph == "M"] + sorted(
+            (e for e in events if e.ph != "M"), key=attrgetter("ts")
+        )
+    if not _splitting(args):
+        logger.info(f"Writing {output_file}")
+    writer = _make_writer(output_file, args)
+    if args.format == FORMAT_SQLITE:
+        _write_instructions(writer, trace_parser, table, args)
+    writer.write(events)
+    writer.close()
     return len(events)
 
+
+def _write_instructions(writer, trace_parser: PipeViewParser, table, args):
+    if table is not None:
+        writer.write_table(table.committed() if args.only_committed else table)
+    else:
+        writer.write_instructions(
+            instr for instr in trace_parser.instructions.values()
+            if not (args.only_committed and instr.is_squashed)
+        )
+
+
+def _shard_by_core(instructions: dict) -> Dict[int, dict]:
+    """Split instructions per core in a single pass, keeping their order."""
+    if isinstance(instructions, InstructionStore):
+        return instructions.split_by_core()
+    shards: Dict[int, dict] = {}
+    for key, instr in instructions.items():
+        shard = shards.get(instr.core_id)
+        if shard is None:
+            shard = shards[instr.core_id] = {}
+        shard[key] = instr
+    return shards
+
+
+def _convert_core(instructions: dict, table, config, args, output_file: str, progress: bool,
+                  jobs: int = 1) -> int:
+    trace_parser = PipeViewParser()
+    trace_parser.instructions = instructions
+    return _convert_and_dump(trace_parser, config, args, output_file, progress, table, jobs)
+
+
+def _convert_cores(trace_parser: PipeViewParser, config, args, input_stem: str,
+                   progress: bool, table=None) -> Dict[int, int]:
+    """Convert every core to its own file, in worker processes when --jobs allows.
+
+    With --columnar, ``table`` holds the instructions when loaded from the cache.
+    """
+    if args.columnar:
+        if table is None:
+            table = trace_parser.to_table()
+        tables = table.split_by_core()
+        shards = {core_id: ({}, table) for core_id, table in tables.items()}
+    else:
+        instructions = _shard_by_core(trace_parser.instructions)
+        shards = {core_id: (shard, None) for core_id, shard in instructions.items()}
+    # The shards replace the parsed instructions from here on
+    trace_parser.instructions = {}
+
+    core_ids = sorted(shards)
+    if len(core_ids) > 1:
+        logger.info(f"Detected {len(core_ids)} cores: {core_ids}")
+    outputs = {core_id: _output_path(args, input_stem, core_id) for core_id in core_ids}
+
+    all_jobs = args.jobs or os.cpu_count() or 1
+    jobs = min(all_jobs, len(core_ids))
+    if len(core_ids) == 1 and all_jobs > 1:
+        # A single core is split into windows of instructions instead, where supported
+        core_id = core_ids[0]
+        totals = {core_id: _convert_core(*shards.pop(core_id), config, args, outputs[core_id],
+                                         progress, all_jobs)}
+    elif jobs > 1:
+        logger.info(f"Converting {len(core_ids)} cores in {jobs} processes")
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                core_id: pool.submit(_convert_core, *shards.pop(core_id), config, args,
+                                     outputs[core_id], False)
+                for core_id in core_ids
+            }
+            totals = {core_id: future.result() for core_id, future in futures.items()}
+    else:
+        totals = {
+            core_id: _convert_core(*shards.pop(core_id), config, args, outputs[core_id], progress)
+            for core_id in core_ids
+        }
+
+    if len(core_ids) == 1:
+        logger.info(f"Total events: {totals[core_ids[0]]}")
+    else:
+        for core_id, total in totals.items():
+            logger.info(f"Core {core_id}: {total} events")
+    return totals
+
+
+class _CoreStream:
+    """Converts and writes one core's instructions as they are parsed."""
+
+    def __init__(self, trace_parser: PipeViewParser, config, args, writer):
+        self.converter = ChromeTracingConverter(
+            trace_parser, config,
+            args.exclude_exec, args.exclude_pipeline,
+            args.only_committed, args.store_completions,
+        )
+        self.reorder = SeqNumReorderBuffer(args.stream_window)
+        self.writer = writer
+        self.instructions = args.format == FORMAT_SQLITE
+        self.writer.write(self.converter.start_stream())
+
+    def push(self, instr):
+        for ready in self.reorder.push(instr):
+            self._write(ready)
+
+    def _write(self, instr):
+        if self.instructions and not (self.converter.only_committed and instr.is_squashed):
+            self.writer.write_instructions((instr,))
+        self.writer.write(self.converter.feed(instr))
+
+    def close(self) -> int:
+        for ready in self.reorder.flush():
+            self._write(ready)
+        self.writer.close()
+        return self.writer.count
+
+
+class _CoreStreams:
+    """Routes parsed instructions to one _CoreStream per core."""
+
+    def __init__(self, trace_parser: PipeViewParser, config, args, input_stem: str, make_writer):
+        self.trace_parser = trace_parser
+        self.config = config
+        self.args = args
+        self.input_stem = input_stem
+        self.make_writer = make_writer
+        self.streams = {}
+
+    def push(self, instr):
+        stream = self.streams.get(instr.core_id)
+        if stream is None:
+            writer = self.make_writer(self.input_stem, instr.core_id)
+            stream = self.streams[instr.core_id] = _CoreStream(
+                self.trace_parser, self.config, self.args, writer
+            )
+        stream.push(instr)
+
+    def flush(self):
+        for stream in self.streams.values():
+            stream.writer.flush()
+
+    def close(self):
+        totals = {core_id: stream.close() for core_id, stream in sorted(self.streams.items())}
+        if not totals:
+            raise ValueError("No instructions with valid timestamps found")
+        for core_id, total in totals.items():
+            logger.info(f"Core {core_id}: {total} events")
+        return totals
+
+
+def _stream_convert_and_dump(input_file: str, config, args, input_stem: str,
+                             progress: bool) -> Dict[int, int]:
+    def make_writer(input_stem: str, core_id: int):
+        core_output = _output_path(args, input_stem, core_id)
+        if not _splitting(args):
+            logger.info(f"Writing {core_output}")
+        return _make_writer(core_output, args)
+
+    trace_parser = PipeViewParser(_make_window(args))
+    streams = _CoreStreams(trace_parser, config, args, input_stem, make_writer)
+    instructions = trace_parser.iter_file(input_file)
+    if progress:
+        from tqdm import tqdm
+
+        instructions = tqdm(instructions, desc="Streaming", unit="instr", leave=False)
+    try:
+        for instr in instructions:
+            streams.push(instr)
+    finally:
+        totals = streams.close()
+    return totals
+
+
+def _follow_convert_and_dump(input_file: str, config, args, input_stem: str) -> Dict[int, int]:
+    def make_writer(input_stem: str, core_id: int):
+        def path_for_part(part: int) -> str:
+            core_output = _make_output_path(args.output_dir, input_stem, core_id, args.gzip, part)
+            logger.info(f"Writing {core_output}")
+            return core_output
+        root, _ = _split_output_path(_output_path(args, input_stem, core_id))
+        return RollingTraceWriter(
+            path_for_part, args.max_events_per_file or args.follow_chunk_events,
+            args.gzip, _output_indent(args),
+            split_every_ticks=args.split_every_ticks,
+            manifest_path=f"{root}_manifest.json",
+            gzip_level=args.gzip_level,
+            gzip_threads=args.gzip_threads,
+        )
+
+    trace_parser = PipeViewParser(_make_window(args))
+    streams = _CoreStreams(trace_parser, config, args, input_stem, make_writer)
+    try:
+        for batch in trace_parser.follow_file(input_file, args.follow_interval, args.follow_timeout):
+            for instr in batch:
+                streams.push(instr)
+            streams.flush()
+    except KeyboardInterrupt:
+        logger.info("Interrupted, finalizing output")
+    finally:
+        last = trace_parser.flush()
+        if last is not None:
+            streams.push(last)
+        totals = streams.close()
+    return totals
+
+
+def _check_input(input_file: str):
+    if input_file != STDIN and not Path(input_file).exists():
+        raise FileNotFoundError(f"Input file not found: {input_file}")
+
+
+def _convert_input(input_file: str, config, args, progress: bool) -> Dict[int, int]:
+    """Convert one trace as the options say; returns the events written per core."""
+    input_stem = _input_stem(input_file)
+
+    if args.follow:
+        logger.info(f"Following {input_file}")
+        return _follow_convert_and_dump(input_file, config, args, input_stem)
+
+    if args.stream:
+        logger.info(f"Streaming {input_file}")
+        return _stream_convert_and_dump(input_file, config, args, input_stem, progress)
+
+    trace_parser, table = _parse_trace(input_file, args)
+
+    if not (trace_parser.instructions or table is not None and len(table)):
+        raise ValueError("No instructions with valid timestamps found")
+
+    return _convert_cores(trace_parser, config, args, input_stem, progress, table)
+
+
+def _is_trace_name(name: str) -> bool:
+    """Whether a file found in an input directory is a trace: *.out, maybe compressed."""
+    for suffix in COMPRESSION_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return name.endswith(TRACE_SUFFIX)
+
+
+def _expand_inputs(inputs: List[str]) -> List[str]:
+    """Input files named by --input-file: paths, directories of traces and globs."""
+    files = []
+    for name in inputs:
+        if os.path.isdir(name):
+            matches = sorted(
+                str(path) for path in Path(name).iterdir()
+                if path.is_file() and _is_trace_name(path.name)
+            )
+        elif name != STDIN and any(c in name for c in "*?["):
+            matches = sorted(path for path in glob.glob(name) if not path.endswith(CACHE_SUFFIX))
+        else:
+            files.append(name)
+            continue
+        if not matches:
+            logger.warning(f"No traces found for {name}")
+        files.extend(matches)
+    # The same trace named twice is converted once
+    return list(dict.fromkeys(files))
+
+
+class BatchResult(NamedTuple):
+    """Outcome of converting one trace of a batch."""
+
+    input_file: str
+    # Events written per core, empty on failure
+    totals: Dict[int, int]
+    seconds: float
+    error: Optional[str] = None
+
+
+# Shared by all the traces a batch worker process converts
+_batch_config = None
+_batch_args = None
+
+
+def _init_batch_worker(config, args):
+    global _batch_config, _batch_args
+    _batch_config, _batch_args = config, args
+
+
+def _convert_batch_input(input_file: str) -> BatchResult:
+    start = time.perf_counter()
+    try:
+        _check_input(input_file)
+        totals = _convert_input(input_file, _batch_config, _batch_args, progress=False)
+    except Exception as e:
+        return BatchResult(input_file, {}, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+    return BatchResult(input_file, totals, time.perf_counter() - start)
+
+
+def _batch_outputs(args, result: BatchResult) -> List[str]:
+    stem = _input_stem(result.input_file)
+    outputs = []
+    for core_id in result.totals:
+        output = _output_path(args, stem, core_id)
+        if _splitting(args) or args.follow:
+            output = _split_output_path(output)[0] + "_manifest.json"
+        outputs.append(output)
+    return outputs
+
+
+def _run_batch(input_files: List[str], config, args) -> List[BatchResult]:
+    """Convert several traces, up to --jobs at a time, each in a single process.
+
+    A trace that fails is reported and the others still get converted.
+    Results are returned in input order.
+    """
+    results: Dict[str, BatchResult] = {}
+    todo = []
+    stems: Dict[str, str] = {}
+    for input_file in input_files:
+        stem = _input_stem(input_file)
+        if stem in stems:
+            # Outputs are named after the input stem, so one would overwrite the other
+            results[input_file] = BatchResult(
+                input_file, {}, 0.0, f"Output names collide with those of {stems[stem]}"
+            )
+        else:
+            stems[stem] = input_file
+            todo.append(input_file)
+
+    def done(result: BatchResult):
+        results[result.input_file] = result
+        if result.error is None:
+            events = sum(result.totals.values())
+            logger.info(f"Converted {result.input_file}: {events} events in {result.seconds:.2f}s")
+        else:
+            logger.error(f"Failed {result.input_file}: {result.error}")
+
+    jobs = min(args.jobs or os.cpu_count() or 1, len(todo)) if todo else 1
+    # Traces are converted in parallel, so each one by a single process
+    worker_args = argparse.Namespace(**{**vars(args), "jobs": 1})
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        logger.info(f"Converting {len(todo)} traces in {jobs} processes")
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_batch_worker, initargs=(config, worker_args)
+        ) as pool:
+            futures = {pool.submit(_convert_batch_input, input_file): input_file
+                       for input_file in todo}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker died, e.g. killed for using too much memory
+                    result = BatchResult(futures[future], {}, 0.0, f"{type(e).__name__}: {e}")
+                done(result)
+    else:
+        _init_batch_worker(config, worker_args)
+        for input_file in todo:
+            done(_convert_batch_input(input_file))
+    return [results[input_file] for input_file in input_files]
+
+
+def _write_batch_report(path: str, results: List[BatchResult], args):
+    report = {
+        "inputs": len(results),
+        "failed": sum(result.error is not None for result in results),
+        "results": [
+            {
+                "input_file": result.input_file,
+                "status": "failed" if result.error else "ok",
+                "events": sum(result.totals.values()),
+                "cores": {str(core_id): total for core_id, total in result.totals.items()},
+                "outputs": _batch_outputs(args, result),
+                "seconds": round(result.seconds, 3),
+                "error": result.error,
+            }
+            for result in results
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def _print_batch_summary(results: List[BatchResult], report_path: str):
+    width = max(len(result.input_file) for result in results)
+    for result in results:
+        if result.error is None:
+            events = sum(result.totals.values())
+            print(f"ok      {result.input_file:<{width}}  {events:>10} events  {result.seconds:8.2f}s")
+        else:
+            print(f"FAILED  {result.input_file:<{width}}  {result.error}")
+    failed = sum(result.error is not None for result in results)
+    print(f"{len(results) - failed} of {len(results)} traces converted, {failed} failed; "
+          f"report written to {report_path}")
+
+
+class _HelpFormatter(argparse.HelpFormatter):
+    """HelpFormatter that reads the terminal width like shutil.get_terminal_size()
+    does, without importing shutil, which imports bz2 and lzma on every run."""
+
+    def __init__(self, prog: str, **kwargs):
+        if kwargs.get("width") is None:
+            kwargs["width"] = _terminal_columns() - 2
+        super().__init__(prog, **kwargs)
+
+
+def _terminal_columns() -> int:
+    try:
+        columns = int(os.environ["COLUMNS"])
+    except (KeyError, ValueError):
+        columns = 0
+    if columns <= 0:
+        try:
+            columns = os.get_terminal_size(sys.__stdout__.fileno()).columns
+        except (AttributeError, ValueError, OSError):
+            columns = 0
+    return columns or 80
+
+
 def main():
     parser = argparse.ArgumentParser(
-        description="Convert gem5 O3PipeView trace to Perfetto / Chrome Tracing JSON format."
+        description="Convert gem5 O3PipeView trace to Perfetto / Chrome Tracing JSON format.",
+        formatter_class=_HelpFormatter,
     )
     parser.add_argument(
         "--input-file", '-i',
+        dest="input_files",
+        nargs="+",
+        action="extend",
         required=True,
-        help="Path to the input trace file (e.g., trace.out)"
+        metavar="INPUT_FILE",
+        help="Path to the input trace file (e.g., trace.out), a named pipe, or '-' for stdin. "
+             "gzip, bzip2, xz and zstd compressed traces are decompressed on the fly. "
+             "Several traces, glob patterns and directories (for their *.out files) "
+             "may be given to convert them all; --jobs of them are converted at a time"
+    )
+    parser.add_argument(
+        "--batch-report",
+        default=None,
+        metavar="PATH",
+        help="Where to write the JSON report of a conversion of several traces "
+             "(default: batch_report.json in the output directory)"
     )
     parser.add_argument(
         "--output-dir", "-o",
@@ -82,6 +734,54 @@ def main():
         action="store_true",
         help="Compress output JSON with gzip"
     )
+    parser.add_argument(
+        "--gzip-level",
+        type=int,
+        choices=range(10),
+        default=DEFAULT_GZIP_LEVEL,
+        metavar="{0-9}",
+        help="gzip compression level: lower is faster, higher is smaller "
+             f"(default: {DEFAULT_GZIP_LEVEL})"
+    )
+    parser.add_argument(
+        "--gzip-threads",
+        type=_positive_int,
+        default=None,
+        help="Threads compressing blocks of each gzip output file "
+             "(default: the CPUs shared among the --jobs processes)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=FORMAT_JSON,
+        help="Output format: Chrome Tracing 'json', or Perfetto's native protobuf "
+             "'perfetto-proto' (.pftrace), which is much smaller and loads faster, or "
+             "'sqlite' (.sqlite), a database of instructions and events for ad-hoc "
+             "queries (default: json)"
+    )
+    parser.add_argument(
+        "--split-every-ticks",
+        type=_positive_int,
+        default=None,
+        metavar="N",
+        help="Start a new output file for every window of N ticks. Files are numbered "
+             "<stem>_<core>.NNNN.<ext> and listed in <stem>_<core>_manifest.json"
+    )
+    parser.add_argument(
+        "--max-events-per-file",
+        type=_positive_int,
+        default=None,
+        metavar="N",
+        help="Start a new output file once the current one holds N duration events "
+             "(overrides --follow-chunk-events)"
+    )
+    parser.add_argument(
+        "--pretty",
+        default=False,
+        action="store_true",
+        help="Indent the output JSON (about twice as large); by default it is "
+             "written compactly, one event per line"
+    )
     parser.add_argument(
         "--version", "-V",
         action="version",
@@ -118,7 +818,114 @@ def main():
         action="store_false",
         help="Disable store completion tick events"
     )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=_non_negative_int,
+        default=1,
+        help="Number of worker processes used to parse the trace and to convert "
+             "cores in parallel. A single core is only split with --columnar JSON "
+             "output, where workers format windows of its events; lanes are still "
+             "assigned in one pass (0 uses all available CPUs; default: 1)"
+    )
+    parser.add_argument(
+        "--start-tick",
+        type=int,
+        default=None,
+        help="Skip instructions fetched before this tick"
+    )
+    parser.add_argument(
+        "--end-tick",
+        type=int,
+        default=None,
+        help="Skip instructions fetched after this tick and stop reading "
+             "once the trace is past it (see --end-tick-slack)"
+    )
+    parser.add_argument(
+        "--end-tick-slack",
+        type=int,
+        default=DEFAULT_END_TICK_SLACK,
+        help="Records are printed out of fetch order; keep reading until a record "
+             f"fetched this many ticks after --end-tick shows up (default: {DEFAULT_END_TICK_SLACK})"
+    )
+    parser.add_argument(
+        "--seq-range",
+        type=_seq_range,
+        default=None,
+        metavar="FIRST:LAST",
+        help="Only keep instructions with FIRST <= seq_num <= LAST (either bound may be omitted)"
+    )
+    parser.add_argument(
+        "--follow", "-f",
+        default=False,
+        action="store_true",
+        help="Keep converting a trace that is still being written by gem5, "
+             "writing events to rolling <stem>_<core>.NNNN.json chunks"
+    )
+    parser.add_argument(
+        "--follow-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between polls for new data in --follow mode (default: 1.0)"
+    )
+    parser.add_argument(
+        "--follow-timeout",
+        type=float,
+        default=None,
+        help="Stop --follow mode after this many seconds without new data "
+             "(default: run until interrupted)"
+    )
+    parser.add_argument(
+        "--follow-chunk-events",
+        type=int,
+        default=1_000_000,
+        help="Duration events per output chunk in --follow mode (default: 1000000)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        default=True,
+        action="store_false",
+        help="Neither read nor write the parsed-trace cache, kept in $XDG_CACHE_HOME/uScope "
+             "(~/.cache/uScope by default)"
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        default=False,
+        action="store_true",
+        help="Ignore an existing parsed-trace cache and write a fresh one"
+    )
+    parser.add_argument(
+        "--stream",
+        default=False,
+        action="store_true",
+        help="Convert instructions while parsing and write events incrementally, "
+             "keeping memory bounded by the in-flight window"
+    )
+    parser.add_argument(
+        "--stream-window",
+        type=int,
+        default=DEFAULT_STREAM_WINDOW,
+        help="Number of instructions buffered to restore seq_num order in --stream mode "
+             f"(default: {DEFAULT_STREAM_WINDOW})"
+    )
 
+    parser.add_argument(
+        "--columnar",
+        default=False,
+        action="store_true",
+        help="Hold parsed instructions in NumPy column arrays, which needs far less "
+             "memory on large traces (requires numpy)"
+    )
+
+    parser.add_argument(
+        "--lane-mode",
+        choices=LANE_MODES,
+        default=LANE_MODE_GREEDY,
+        help="How events are packed into lanes: 'greedy' assigns them as they are "
+             "produced, capped at the configured widths; 'optimal' assigns them once "
+             "the whole trace is known, with the fewest lanes and no overlaps "
+             "(default: greedy)"
+    )
 
     args = parser.parse_args()
 
@@ -127,46 +934,59 @@ def main():
     elif args.quiet:
         logging.getLogger().setLevel(logging.WARNING)
 
-    input_file = args.input_file
     output_dir = args.output_dir
 
     try:
-        if not Path(input_file).exists():
-            raise FileNotFoundError(f"Input file not found: {input_file}")
+        input_files = _expand_inputs(args.input_files)
+        if not input_files:
+            raise FileNotFoundError(f"No input traces found in {' '.join(args.input_files)}")
+        batch = len(input_files) > 1
+        if batch and STDIN in input_files:
+            raise ValueError("stdin cannot be converted along with other traces")
+        if batch and args.follow:
+            raise ValueError("--follow converts a single trace")
+        if not batch:
+            _check_input(input_files[0])
 
         os.makedirs(output_dir, exist_ok=True)
 
-        logger.info(f"Parsing {input_file}")
-        trace_parser = PipeViewParser()
-        trace_parser.parse_file(input_file)
+        progress = not args.quiet
 
-        if not trace_parser.instructions:
-            raise ValueError("No instructions with valid timestamps found")
+        if args.gzip_threads is None:
+            # Every worker process may be writing its own output file
+            cpus = os.cpu_count() or 1
+            args.gzip_threads = max(1, cpus // (args.jobs or cpus))
+
+        if args.columnar:
+            from .table import require_numpy
+
+            require_numpy()
+
+        if args.format != FORMAT_JSON and args.follow:
+            raise ValueError(f"--format {args.format} cannot be used with --follow, "
+                             "which writes rolling JSON chunks")
+
+        if args.format == FORMAT_SQLITE and (args.gzip or _splitting(args)):
+            raise ValueError("--format sqlite writes a single database and cannot be used "
+                             "with --gzip, --split-every-ticks or --max-events-per-file")
+
+        if args.lane_mode != LANE_MODE_GREEDY and (args.stream or args.follow):
+            raise ValueError(f"--lane-mode {args.lane_mode} needs the whole trace "
+                             "and cannot be used with --stream or --follow")
 
         logger.info(f"Loading configuration from {args.config_path if args.config_path else 'default location'}")
         config = load_config(args.config_path)
 
-        all_instructions = trace_parser.instructions
-        core_ids = trace_parser.get_core_ids()
-        input_stem = Path(input_file).stem
-        progress = not args.quiet
+        if batch:
+            results = _run_batch(input_files, config, args)
+            report_path = args.batch_report or str(Path(output_dir, "batch_report.json"))
+            _write_batch_report(report_path, results, args)
+            _print_batch_summary(results, report_path)
+            if any(result.error is not None for result in results):
+                sys.exit(1)
+            return
 
-        if len(core_ids) == 1:
-            core_id = core_ids[0]
-            core_output = _make_output_path(output_dir, input_stem, core_id, args.gzip)
-            total = _convert_and_dump(trace_parser, config, args, core_output, progress)
-            logger.info(f"Total events: {total}")
-        else:
-            logger.info(f"Detected {len(core_ids)} cores: {core_ids}")
-            for core_id in core_ids:
-                trace_parser.instructions = {
-                    seq: instr
-                    for seq, instr in all_instructions.items()
-                    if instr.core_id == core_id
-                }
-                core_output = _make_output_path(output_dir, input_stem, core_id, args.gzip)
-                total = _convert_and_dump(trace_parser, config, args, core_output, progress)
-                logger.info(f"Core {core_id}: {total} events")
+        _convert_input(input_files[0], config, args, progress)
 
     except ValueError as e:
         logging.error(f"Value error: {e}")
@@ -176,5 +996,9 @@ def main():
         logging.error(f"File error: {e}")
         sys.exit(2)
 
+    except ImportError as e:
+        logging.error(f"Missing dependency: {e}")
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
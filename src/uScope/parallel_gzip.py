@@ -0,0 +1,119 @@
+import io
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .writer import DEFAULT_GZIP_LEVEL
+
+# Size of the deflate window, and so of the dictionary a block can refer to
+_WINDOW = 1 << 15
+
+# An empty fixed-Huffman block with the final bit set
+_LAST_BLOCK = b"\x03\x00"
+
+
+def _header(level: int) -> bytes:
+    # Magic, deflate, no flags, no mtime, XFL hint for the level, unknown OS
+    extra_flags = 2 if level == 9 else 4 if level == 1 else 0
+    return b"\x1f\x8b\x08\x00" + b"\x00" * 4 + bytes((extra_flags, 255))
+
+
+def _deflate_block(block: bytes, dictionary: bytes, level: int) -> bytes:
+    """Raw deflate data for ``block``, ending on a byte boundary.
+
+    Seeding the compressor with the end of the previous block keeps the
+    ratio close to that of a single stream. zlib releases the GIL while
+    compressing, so blocks compress in parallel threads.
+    """
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class ParallelGzipWriter(io.BufferedIOBase):
+    """Binary file that gzips what is written to it on several threads.
+
+    Data is cut into ``BLOCK_SIZE`` blocks that are deflated independently,
+    like pigz does, and joined into a single gzip member that any gzip
+    reader accepts. Blocks are written in order; at most two per thread are
+    in flight, which bounds memory use.
+    """
+
+    BLOCK_SIZE = 1 << 20
+
+    def __init__(self, filename: str, compresslevel: int = DEFAULT_GZIP_LEVEL,
+                 threads: Optional[int] = None):
+        super().__init__()
+        if not 0 <= compresslevel <= 9:
+            raise ValueError(f"Invalid gzip level {compresslevel}, expected 0 to 9")
+        self.name = filename
+        self.compresslevel = compresslevel
+        self.threads = threads or os.cpu_count() or 1
+        self._file = open(filename, "wb")
+        self._pool = ThreadPoolExecutor(self.threads) if self.threads > 1 else None
+        self._pending = deque()
+        self._buffer = bytearray()
+        self._dictionary = b""
+        self._crc = 0
+        self._size = 0
+        self._file.write(_header(compresslevel))
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("write to closed file")
+        self._buffer += data
+        block_size = self.BLOCK_SIZE
+        if len(self._buffer) >= block_size:
+            blocks = len(self._buffer) // block_size * block_size
+            view = memoryview(self._buffer)
+            for start in range(0, blocks, block_size):
+                self._submit(bytes(view[start : start + block_size]))
+            view.release()
+            del self._buffer[:blocks]
+        return len(data)
+
+    def _submit(self, block: bytes):
+        # The checksum covers the data in order, so it is kept here
+        self._crc = zlib.crc32(block, self._crc)
+        self._size += len(block)
+        dictionary, self._dictionary = self._dictionary, block[-_WINDOW:]
+        if self._pool is None:
+            self._file.write(_deflate_block(block, dictionary, self.compresslevel))
+            return
+        self._pending.append(
+            self._pool.submit(_deflate_block, block, dictionary, self.compresslevel)
+        )
+        while len(self._pending) > 2 * self.threads:
+            self._file.write(self._pending.popleft().result())
+
+    def flush(self):
+        """Compress and write everything written so far."""
+        if self._file.closed:
+            # IOBase.close() flushes once more after close() is done
+            return
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._file.write(self._pending.popleft().result())
+        self._file.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.flush()
+            self._file.write(_LAST_BLOCK + struct.pack("<II", self._crc, self._size & 0xFFFFFFFF))
+        finally:
+            self._file.close()
+            if self._pool is not None:
+                self._pool.shutdown()
+            super().close()
@@ -1,42 +1,320 @@
-from .O3 import Instruction, PipelineStage
+import io
+import os
+import re
+import sys
+import time
+from array import array
+from typing import Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from .O3 import FULL_ORDER, NUM_STAGES, ORDER_BITS, Instruction, PipelineStage
+from .store import InstructionStore
+
+READ_BUFFER_SIZE = 1 << 20
+
+COMPRESSION_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+COMPRESSION_SUFFIXES = (".gz", ".bz2", ".xz", ".zst")
+
+STDIN = "-"
+
+FETCH_RECORD = b"\nO3PipeView:fetch:"
+ALL_STAGES_SEEN = (1 << NUM_STAGES) - 1
+
+DEFAULT_END_TICK_SLACK = 1_000_000
+
+
+class TraceWindow(NamedTuple):
+    """Region of interest applied while parsing.
+
+    An instruction is kept when its fetch tick lies in [start_tick, end_tick]
+    and its seq_num in [first_seq, last_seq]; unset bounds are open.
+    gem5 prints a record when the instruction leaves the pipeline, so fetch
+    ticks are only roughly increasing through the file: reading stops at
+    the first record fetched more than ``end_tick_slack`` ticks after
+    ``end_tick``.
+    """
+
+    start_tick: Optional[int] = None
+    end_tick: Optional[int] = None
+    first_seq: Optional[int] = None
+    last_seq: Optional[int] = None
+    end_tick_slack: int = DEFAULT_END_TICK_SLACK
+
+    def contains(self, tick: int, seq_num: int) -> bool:
+        return not (
+            (self.start_tick is not None and tick < self.start_tick)
+            or (self.end_tick is not None and tick > self.end_tick)
+            or (self.first_seq is not None and seq_num < self.first_seq)
+            or (self.last_seq is not None and seq_num > self.last_seq)
+        )
+
+    def is_past(self, tick: int) -> bool:
+        return self.end_tick is not None and tick > self.end_tick + self.end_tick_slack
+
+
+def is_regular_file(filename: str) -> bool:
+    """False for stdin and named pipes, which can be neither mapped nor re-read."""
+    return filename != STDIN and os.path.isfile(filename)
+
+
+def _match_magic(head: bytes) -> Optional[str]:
+    for kind, magic in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+_MAGIC_LEN = max(len(magic) for magic in COMPRESSION_MAGIC.values())
+
+
+def detect_compression(filename: str) -> Optional[str]:
+    with open(filename, "rb") as f:
+        return _match_magic(f.read(_MAGIC_LEN))
+
+
+# The decompression modules are only imported for traces that need them
+
+
+def _open_gzip(fileobj):
+    import gzip
+
+    return gzip.GzipFile(fileobj=fileobj, mode="rb")
+
+
+def _open_bz2(fileobj):
+    import bz2
+
+    return bz2.BZ2File(fileobj)
+
+
+def _open_xz(fileobj):
+    import lzma
+
+    return lzma.LZMAFile(fileobj)
+
+
+def _open_zstd(fileobj):
+    try:
+        from compression import zstd
+        return zstd.ZstdFile(fileobj)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(
+            "Input is zstd-compressed; install the 'zstandard' package to read it"
+        ) from None
+    return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
+
+
+_DECOMPRESSORS = {
+    "gzip": _open_gzip,
+    "bz2": _open_bz2,
+    "xz": _open_xz,
+    "zstd": _open_zstd,
+}
+
+
+class _DecompressedText(io.TextIOWrapper):
+    # Decompressors leave the file object they read from open
+    def __init__(self, stream, source):
+        super().__init__(stream, encoding="utf-8")
+        self._source = source
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._source.close()
+
+
+def open_trace(filename: str) -> TextIO:
+    """Open a trace for reading, transparently decompressing it.
+
+    ``filename`` may be a regular file, a named pipe or ``-`` for stdin.
+    Compression is detected from the magic bytes rather than the file name.
+    """
+    if filename == STDIN:
+        source = open(sys.stdin.fileno(), "rb", buffering=READ_BUFFER_SIZE, closefd=False)
+    else:
+        source = open(filename, "rb", buffering=READ_BUFFER_SIZE)
+
+    kind = _match_magic(source.peek(_MAGIC_LEN)[:_MAGIC_LEN])
+    if kind is None:
+        return io.TextIOWrapper(source, encoding="utf-8")
+    stream = io.BufferedReader(_DECOMPRESSORS[kind](source), READ_BUFFER_SIZE)
+    return _DecompressedText(stream, source)
 
 
 class PipeViewParser:
     PREFIX = "O3PipeView:"
 
-    def __init__(self):
-        self.instructions = {}
+    def __init__(self, window: Optional[TraceWindow] = None):
+        self.instructions = InstructionStore()
         self.current_core_id = None
         self.current_seq_num = None
         self.current_instr = None
         self.stage_map = {f"{stage}": stage for stage in PipelineStage.order()}
+        self.window = window
+        self.done = False
 
     def parse_file(self, filename: str):
-        with open(filename, "r") as f:
+        with open_trace(filename) as f:
             for line in f:
                 line = line.strip()
                 if line:
                     self.parse_line(line)
+                    if self.done:
+                        break
 
         if self.current_instr is not None:
             self.instructions[(self.current_core_id, self.current_seq_num)] = self.current_instr
 
+        self._drop_invalid()
+
+    def iter_file(self, filename: str) -> Iterator[Instruction]:
+        with open_trace(filename) as f:
+            yield from self.iter_lines(f)
+
+    def iter_lines(self, lines: Iterable[str]) -> Iterator[Instruction]:
+        """Yield instructions as soon as their trace record is complete.
+
+        Unlike parse_file, nothing is accumulated in ``self.instructions``,
+        so memory stays bounded by a single in-flight record.
+        """
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            finished = self._parse_line(line)
+            if finished is not None and self._has_valid_ticks(finished):
+                yield finished
+            if self.done:
+                break
+
+        finished = self.flush()
+        if finished is not None:
+            yield finished
+
+    def follow_file(
+        self,
+        filename: str,
+        poll_interval: float = 1.0,
+        idle_timeout: Optional[float] = None,
+    ) -> Iterator[List[Instruction]]:
+        """Tail a trace that is still being written, like ``tail -f``.
+
+        Yields a batch of completed instructions each time new data shows up.
+        Only the unread part of the file is read on every poll, and partial
+        lines are kept until their newline arrives. Stops once nothing was
+        appended for ``idle_timeout`` seconds (never, if None); the record
+        still in flight can then be retrieved with flush().
+        """
+        if not is_regular_file(filename):
+            raise ValueError(f"Cannot follow {filename}: not a regular file (pipes are streamed anyway)")
+        if detect_compression(filename) is not None:
+            raise ValueError(f"Cannot follow compressed trace {filename}")
+
+        pending = b""
+        idle = 0.0
+        with open(filename, "rb") as f:
+            while not self.done:
+                data = f.read(READ_BUFFER_SIZE)
+                if not data:
+                    if idle_timeout is not None and idle >= idle_timeout:
+                        break
+                    time.sleep(poll_interval)
+                    idle += poll_interval
+                    continue
+                idle = 0.0
+
+                *lines, pending = (pending + data).split(b"\n")
+                yield list(self._parse_raw_lines(lines))
+
+        if pending and not self.done:
+            yield list(self._parse_raw_lines([pending]))
+
+    def _parse_raw_lines(self, lines: Iterable[bytes]) -> Iterator[Instruction]:
+        for raw in lines:
+            line = raw.decode("utf-8").strip()
+            if not line:
+                continue
+            finished = self._parse_line(line)
+            if finished is not None and self._has_valid_ticks(finished):
+                yield finished
+            if self.done:
+                break
+
+    def flush(self) -> Optional[Instruction]:
+        """Return and clear the in-flight instruction, if it has valid ticks."""
+        finished = self.current_instr
+        self.current_instr = None
+        if finished is not None and self._has_valid_ticks(finished):
+            return finished
+        return None
+
+    def parse_range(self, filename: str, start: int, end: int):
+        """Parse the lines of an uncompressed trace within [start, end) bytes.
+
+        ``start`` must be the beginning of a line. The last instruction is
+        stored, but invalid ones are not filtered out: that happens once
+        all ranges are merged.
+        """
+        with open(filename, "rb", buffering=READ_BUFFER_SIZE) as f:
+            f.seek(start)
+            pos = start
+            for raw in f:
+                if pos >= end:
+                    break
+                pos += len(raw)
+                line = raw.decode("utf-8").strip()
+                if line:
+                    self.parse_line(line)
+                    if self.done:
+                        break
+
+        if self.current_instr is not None:
+            self.instructions[(self.current_core_id, self.current_seq_num)] = self.current_instr
+            self.current_instr = None
+
+    def _drop_invalid(self):
+        if isinstance(self.instructions, InstructionStore):
+            self.instructions.drop_invalid()
+            return
         self.instructions = {
             key: instr
             for key, instr in self.instructions.items()
-            if any(tick > 0 for tick in instr.stages.values())
+            if self._has_valid_ticks(instr)
         }
 
+    @staticmethod
+    def _has_valid_ticks(instr: Optional[Instruction]) -> bool:
+        return instr is not None and max(instr.ticks) > 0
+
     def get_core_ids(self):
         return sorted(set(instr.core_id for instr in self.instructions.values()))
 
+    def to_table(self) -> "InstructionTable":
+        """Columnar copy of the parsed instructions (requires NumPy)."""
+        from .table import InstructionTable
+
+        return InstructionTable.from_instructions(self.instructions.values())
+
     @staticmethod
     def _parse_fetch_line(rest: str):
         parts = rest.split(":", 5)
         if len(parts) != 6:
             return None
         tick_str, pc, core_id_str, seq_str, disasm, opclass = parts
-        return int(tick_str), pc, int(core_id_str), int(seq_str), disasm.strip(), opclass.strip()
+        # Interned, so instructions from the same static instruction share their strings
+        return (int(tick_str), sys.intern(pc), int(core_id_str), int(seq_str),
+                sys.intern(disasm.strip()), sys.intern(opclass.strip()))
 
     @staticmethod
     def _parse_stage_line(rest: str):
@@ -57,19 +335,30 @@ class PipeViewParser:
         return stage_name, tick, store_tick
 
     def parse_line(self, line: str):
+        finished = self._parse_line(line)
+        if finished is not None:
+            self.instructions[(finished.core_id, finished.seq_num)] = finished
+
+    def _parse_line(self, line: str) -> Optional[Instruction]:
+        """Parse a single line, returning the instruction it completes (if any)."""
         if not line.startswith(self.PREFIX):
-            return
+            return None
 
         rest = line[len(self.PREFIX) :]
 
         if rest.startswith("fetch:"):
             result = self._parse_fetch_line(rest[6:])
             if result is None:
-                return
+                return None
             tick, pc, core_id, seq_num, disasm, opclass = result
 
-            if self.current_instr is not None:
-                self.instructions[(self.current_core_id, self.current_seq_num)] = self.current_instr
+            finished = self.current_instr
+
+            if self.window is not None and not self.window.contains(tick, seq_num):
+                # Skipped before allocation; its stage lines are ignored too
+                self.current_instr = None
+                self.done = self.window.is_past(tick)
+                return finished
 
             self.current_core_id = core_id
             self.current_seq_num = seq_num
@@ -78,25 +367,354 @@ class PipeViewParser:
                 pc=pc,
                 disasm=disasm,
                 opclass=opclass,
-                stages={},
-                stage_order=[],
                 core_id=core_id,
             )
-
-            self.current_instr.stages[PipelineStage.FETCH] = tick
-            self.current_instr.stage_order.append(PipelineStage.FETCH)
-            return
+            self.current_instr.set_stage(PipelineStage.FETCH, tick)
+            return finished
 
         if self.current_instr is not None:
             stage_name, tick, store_tick = self._parse_stage_line(rest)
             stage_name = stage_name.lower()
 
             if stage_name in self.stage_map:
-                stage = self.stage_map[stage_name]
-                self.current_instr.stages[stage] = tick
-
-                if stage not in self.current_instr.stage_order:
-                    self.current_instr.stage_order.append(stage)
+                self.current_instr.set_stage(self.stage_map[stage_name], tick)
 
             if stage_name == PipelineStage.RETIRE.value and store_tick > 0:
                 self.current_instr.store_tick = store_tick
+
+        return None
+
+
+def split_trace(filename: str, chunks: int) -> List[Tuple[int, int]]:
+    """Split an uncompressed trace into byte ranges starting at fetch records."""
+    size = os.path.getsize(filename)
+    boundaries = [0]
+    with open(filename, "rb") as f:
+        for i in range(1, chunks):
+            pos = _next_fetch_record(f, max(size * i // chunks, boundaries[-1] + 1), size)
+            if pos >= size:
+                break
+            if pos > boundaries[-1]:
+                boundaries.append(pos)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _next_fetch_record(f, pos: int, size: int) -> int:
+    # Start one byte early so a record beginning exactly at pos is found too
+    pos -= 1
+    while pos < size:
+        f.seek(pos)
+        block = f.read(READ_BUFFER_SIZE + len(FETCH_RECORD))
+        idx = block.find(FETCH_RECORD)
+        if idx != -1:
+            return pos + idx + 1
+        pos += READ_BUFFER_SIZE
+    return size
+
+
+class MmapPipeViewParser(PipeViewParser):
+    """Bytes-level parser over a memory-mapped trace.
+
+    Lines are dispatched on their raw stage token, and an Instruction is only
+    built (with its pc/disasm/opclass decoded) once its record is complete
+    and has valid ticks. Decoded strings are shared between instructions.
+    Produces the same instructions as PipeViewParser; compressed traces are
+    delegated to it.
+    """
+
+    BPREFIX = PipeViewParser.PREFIX.encode()
+
+    # A complete record in the canonical order gem5 prints it, matched in one
+    # go; anything else is handled line by line.
+    RECORD = re.compile(
+        rb"O3PipeView:fetch:(\d+):([^:\n]*):(\d+):(\d+):([^:\n]*):([^\n]*)\n"
+        rb"O3PipeView:decode:(\d+)\n"
+        rb"O3PipeView:rename:(\d+)\n"
+        rb"O3PipeView:dispatch:(\d+)\n"
+        rb"O3PipeView:issue:(\d+)\n"
+        rb"O3PipeView:complete:(\d+)\n"
+        rb"O3PipeView:retire:(\d+)(?::store:(\d+))?\n"
+    )
+    RECORD_TICK_GROUPS = (0, 6, 7, 8, 9, 10, 11)
+
+    def __init__(self, window: Optional[TraceWindow] = None):
+        super().__init__(window)
+        self.stage_tokens = {
+            stage.value.encode(): stage for stage in PipelineStage.order()
+        }
+        self._strings = {}
+
+    def parse_file(self, filename: str):
+        if not is_regular_file(filename) or detect_compression(filename) is not None:
+            return super().parse_file(filename)
+        self.parse_range(filename, 0, os.path.getsize(filename))
+        self._drop_invalid()
+
+    def parse_range(self, filename: str, start: int, end: int):
+        if start >= end:
+            return
+        import mmap
+
+        with open(filename, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                self._parse_buffer(buf, start, end)
+
+    def _parse_buffer(self, buf, start: int, end: int):
+        prefix = self.BPREFIX
+        prefix_len = len(prefix)
+        stage_tokens = self.stage_tokens
+        retire = PipelineStage.RETIRE
+        match_record = self.RECORD.match
+        find = buf.find
+        window = self.window
+
+        # In-flight record: [core_id, seq_num, pc, disasm, opclass, ticks, order, store_tick, seen]
+        # where order is packed as in Instruction.order and seen is a bitmask of stage ordinals
+        record = None
+        pos = start
+        while pos < end:
+            m = match_record(buf, pos, end)
+            if m is not None:
+                if record is not None:
+                    self._store_record(record)
+                groups = m.groups()
+                pos = m.end()
+                if window is not None:
+                    tick, seq_num = int(groups[0]), int(groups[3])
+                    if not window.contains(tick, seq_num):
+                        record = None
+                        if window.is_past(tick):
+                            self.done = True
+                            break
+                        continue
+                ticks = array("q", [int(groups[i]) for i in self.RECORD_TICK_GROUPS])
+                record = [int(groups[2]), int(groups[3]), groups[1], groups[4], groups[5],
+                          ticks, FULL_ORDER, int(groups[12] or 0), ALL_STAGES_SEEN]
+                continue
+
+            nl = find(b"\n", pos, end)
+            if nl == -1:
+                nl = end
+            line = buf[pos:nl]
+            pos = nl + 1
+
+            if not line.startswith(prefix):
+                line = line.strip()
+                if not line.startswith(prefix):
+                    continue
+
+            colon = line.find(b":", prefix_len)
+            token = line[prefix_len:colon] if colon != -1 else line[prefix_len:]
+
+            if token == b"fetch" and colon != -1:
+                parts = line[colon + 1 :].split(b":", 5)
+                if len(parts) != 6:
+                    continue
+                tick = int(parts[0])
+                core_id = int(parts[2])
+                seq_num = int(parts[3])
+                if record is not None:
+                    self._store_record(record)
+                if window is not None and not window.contains(tick, seq_num):
+                    record = None
+                    if window.is_past(tick):
+                        self.done = True
+                        break
+                    continue
+                ticks = array("q", bytes(8 * NUM_STAGES))
+                ticks[0] = tick
+                record = [core_id, seq_num, parts[1], parts[4], parts[5], ticks, 1, 0, 1]
+                continue
+
+            if record is None:
+                continue
+            if colon == -1:
+                raise ValueError(f"Malformed trace line: {line!r}")
+
+            next_colon = line.find(b":", colon + 1)
+            if next_colon == -1:
+                tick = int(line[colon + 1 :])
+                store_tick = 0
+            else:
+                tick = int(line[colon + 1 : next_colon])
+                if line.startswith(b"store:", next_colon + 1):
+                    store_tick = int(line[next_colon + 7 :])
+                else:
+                    store_tick = 0
+
+            stage = stage_tokens.get(token)
+            if stage is None:
+                stage = stage_tokens.get(token.lower())
+            if stage is not None:
+                ordinal = stage.ordinal
+                seen = record[8]
+                if not seen >> ordinal & 1:
+                    shift = ORDER_BITS * bin(seen).count("1")
+                    record[6] |= (ordinal + 1) << shift
+                    record[8] = seen | 1 << ordinal
+                record[5][ordinal] = tick
+                if stage is retire and store_tick > 0:
+                    record[7] = store_tick
+
+        if record is not None:
+            self._store_record(record)
+
+    def _store_record(self, record):
+        core_id, seq_num, pc, disasm, opclass, ticks, order, store_tick, _ = record
+        if max(ticks) <= 0:
+            # Keep the slot so a later duplicate lands where parse_file puts it
+            self.instructions[core_id, seq_num] = None
+            return
+        self.instructions.set_record(
+            core_id,
+            seq_num,
+            self._decode(pc),
+            self._decode(disasm.strip()),
+            self._decode(opclass.strip()),
+            ticks,
+            order,
+            store_tick,
+        )
+
+    def _decode(self, raw: bytes) -> str:
+        text = self._strings.get(raw)
+        if text is None:
+            text = self._strings[raw] = raw.decode("utf-8")
+        return text
+
+
+class ParsedRange(NamedTuple):
+    """Records of one byte range of a trace, in packed columns.
+
+    Pickles as a few flat buffers, which is much cheaper to send back from a
+    worker process than the Instruction objects. Strings are codes into
+    ``strings``; a pc code of -1 marks a record without valid ticks.
+    ``done`` is set when the range reached a record past the TraceWindow,
+    where a serial parse would have stopped reading.
+    """
+
+    core_id: array
+    seq_num: array
+    ticks: array  # NUM_STAGES ticks per record
+    order: array
+    store_tick: array
+    pc: array
+    disasm: array
+    opclass: array
+    strings: List[bytes]
+    done: bool = False
+
+
+class _RangeParser(MmapPipeViewParser):
+    """Collects the records of a byte range into a ParsedRange."""
+
+    def __init__(self, window: Optional[TraceWindow] = None):
+        super().__init__(window)
+        self.parsed = ParsedRange(*(array("q") for _ in range(8)), strings=[])
+        self._codes = {}
+
+    def _store_record(self, record):
+        core_id, seq_num, pc, disasm, opclass, ticks, order, store_tick, _ = record
+        parsed = self.parsed
+        parsed.core_id.append(core_id)
+        parsed.seq_num.append(seq_num)
+        parsed.ticks.extend(ticks)
+        parsed.order.append(order)
+        parsed.store_tick.append(store_tick)
+        if max(ticks) <= 0:
+            # Keeps the slot, like MmapPipeViewParser._store_record
+            parsed.pc.append(-1)
+            parsed.disasm.append(-1)
+            parsed.opclass.append(-1)
+            return
+        parsed.pc.append(self._code(pc))
+        parsed.disasm.append(self._code(disasm.strip()))
+        parsed.opclass.append(self._code(opclass.strip()))
+
+    def _code(self, raw: bytes) -> int:
+        code = self._codes.get(raw)
+        if code is None:
+            code = self._codes[raw] = len(self.parsed.strings)
+            self.parsed.strings.append(raw)
+        return code
+
+
+def _parse_range_worker(window: Optional[TraceWindow], filename: str, start: int,
+                        end: int) -> ParsedRange:
+    parser = _RangeParser(window)
+    parser.parse_range(filename, start, end)
+    return parser.parsed._replace(done=parser.done)
+
+
+class ParallelPipeViewParser(MmapPipeViewParser):
+    """Parses one large trace in a process pool.
+
+    The file is split into byte ranges aligned on fetch records, every range
+    is parsed by a separate worker into a ParsedRange, and the instructions
+    are built from those in file order so the outcome matches
+    PipeViewParser.parse_file. Compressed traces cannot be split and are
+    parsed serially, as is everything on a single CPU.
+    """
+
+    MIN_CHUNK_SIZE = 16 << 20
+    CHUNKS_PER_JOB = 4
+
+    def __init__(
+        self,
+        jobs: Optional[int] = None,
+        min_chunk_size: int = MIN_CHUNK_SIZE,
+        window: Optional[TraceWindow] = None,
+    ):
+        super().__init__(window)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.min_chunk_size = min_chunk_size
+
+    def parse_file(self, filename: str):
+        if not is_regular_file(filename):
+            return super().parse_file(filename)
+        size = os.path.getsize(filename)
+        chunks = min(self.jobs * self.CHUNKS_PER_JOB, size // self.min_chunk_size)
+        if (
+            self.jobs == 1
+            or (os.cpu_count() or 1) < 2
+            or chunks < 2
+            or detect_compression(filename) is not None
+        ):
+            return super().parse_file(filename)
+
+        ranges = split_trace(filename, chunks)
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(self.jobs, len(ranges))) as pool:
+            parts = pool.map(
+                _parse_range_worker,
+                [self.window] * len(ranges),
+                [filename] * len(ranges),
+                *zip(*ranges),
+            )
+            for part in parts:
+                self._add_range(part)
+                if part.done:
+                    # The serial parse stops here, so later ranges are dropped
+                    self.done = True
+                    break
+
+        self._drop_invalid()
+
+    def _add_range(self, part: ParsedRange):
+        strings = [self._decode(raw) for raw in part.strings]
+        instructions = self.instructions
+        ticks = part.ticks
+        set_record = instructions.set_record
+        rows = zip(part.core_id, part.seq_num, part.order, part.store_tick,
+                   part.pc, part.disasm, part.opclass)
+        start = 0
+        for core_id, seq_num, order, store_tick, pc, disasm, opclass in rows:
+            end = start + NUM_STAGES
+            if pc < 0:
+                instructions[core_id, seq_num] = None
+            else:
+                set_record(core_id, seq_num, strings[pc], strings[disasm], strings[opclass],
+                           ticks[start:end], order, store_tick)
+            start = end
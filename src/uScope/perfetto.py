@@ -0,0 +1,336 @@
+"""Writer for Perfetto's native protobuf trace format.
+
+The handful of messages uScope needs (TracePacket, TrackDescriptor,
+TrackEvent, InternedData and DebugAnnotation, see
+https://perfetto.dev/docs/reference/trace-packet-proto) are encoded by
+hand, so no protobuf package is required.
+
+Every process of the JSON output (a pipeline stage, functional unit or the
+store completions) becomes a process track, and each of its lanes a child
+track. Duration events become slice begin/end pairs whose names,
+categories and debug annotation strings are interned. Slices that overlap
+within a lane go to extra tracks nested under the lane.
+"""
+import struct
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .events import DurationEvent, Event, MetadataEvent
+from .writer import DEFAULT_GZIP_LEVEL
+
+# Wire types
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+
+# TracePacket.sequence_flags
+SEQ_INCREMENTAL_STATE_CLEARED = 1
+SEQ_NEEDS_INCREMENTAL_STATE = 2
+
+# TrackEvent.type
+TYPE_SLICE_BEGIN = 1
+TYPE_SLICE_END = 2
+
+# TrackDescriptor.child_ordering
+CHILD_ORDERING_EXPLICIT = 3
+
+
+def _varint(value: int) -> bytes:
+    if value < 0:
+        # Negative int64 values take all ten bytes
+        value += 1 << 64
+    if value < 0x80:
+        return bytes((value,))
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+# Encodings of the small values that make up most lengths and iids
+_SMALL_VARINTS = [_varint(value) for value in range(1 << 14)]
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint(field << 3 | wire_type)
+
+
+def _uint(field: int, value: int) -> bytes:
+    return _key(field, _VARINT) + _varint(value)
+
+
+def _message(field: int, payload: bytes) -> bytes:
+    return _key(field, _LENGTH_DELIMITED) + _varint(len(payload)) + payload
+
+
+def _string(field: int, value: str) -> bytes:
+    return _message(field, value.encode("utf-8"))
+
+
+# Trace
+_TRACE_PACKET = _key(1, _LENGTH_DELIMITED)
+
+# TracePacket
+_TIMESTAMP = _key(8, _VARINT)
+_TRACK_EVENT = _key(11, _LENGTH_DELIMITED)
+_SEQUENCE = _uint(10, 1)  # trusted_packet_sequence_id, a single sequence
+_NEEDS_STATE = _uint(13, SEQ_NEEDS_INCREMENTAL_STATE)
+_INTERNED_DATA = 12
+_TRACK_DESCRIPTOR = 60
+
+# TrackEvent
+_BEGIN = _uint(9, TYPE_SLICE_BEGIN)
+_END = _uint(9, TYPE_SLICE_END)
+_TRACK_UUID = _key(11, _VARINT)
+_NAME_IID = _key(10, _VARINT)
+_CATEGORY_IID = _key(3, _VARINT)
+_DEBUG_ANNOTATION = 4
+_DEBUG_ANNOTATION_KEY = _key(_DEBUG_ANNOTATION, _LENGTH_DELIMITED)
+
+# DebugAnnotation
+_INT_VALUE = _key(4, _VARINT)
+
+_NOTHING: Dict[str, bytes] = {}
+
+# InternedData
+_INTERNED_CATEGORIES = 1
+_INTERNED_NAMES = 2
+_INTERNED_ANNOTATION_NAMES = 3
+_INTERNED_STRING_VALUES = 29
+
+
+class PerfettoProtoWriter:
+    """Writes events as a Perfetto protobuf trace (``.pftrace``).
+
+    Drop-in replacement for TraceFileWriter. Tracks are described lazily,
+    right before their first slice, so that lane names and sort indexes
+    reported by metadata events are known by then. Slice boundaries of each
+    write() are emitted in time order, ends before begins, so back-to-back
+    slices of a lane don't nest.
+
+    A track can only hold slices that nest, while the greedy lane manager
+    puts overlapping events in one lane once it runs out of lanes. A slice
+    that starts before the previous one on the lane's track ends therefore
+    goes to the first child track of the lane that is free by then, or to a
+    new one.
+
+    Timestamps are scaled by ``TIMESTAMP_SCALE`` to nanoseconds, so the
+    timeline reads the same as the JSON output, where ticks are microseconds.
+    """
+
+    TIMESTAMP_SCALE = 1000
+
+    def __init__(self, output_file: str, gzip_enabled: bool = False,
+                 gzip_level: int = DEFAULT_GZIP_LEVEL, gzip_threads: Optional[int] = None):
+        self.output_file = output_file
+        if gzip_enabled:
+            from .parallel_gzip import ParallelGzipWriter
+
+            self.f = ParallelGzipWriter(output_file, gzip_level, gzip_threads)
+        else:
+            self.f = open(output_file, "wb")
+        self.count = 0
+
+        self._process_names: Dict[int, str] = {}
+        self._lane_names: Dict[Tuple[int, int], str] = {}
+        self._lane_ranks: Dict[Tuple[int, int], int] = {}
+        self._processes = set()
+        # Tracks of each lane, the lane's own first: [end tick of the last
+        # slice, encoded track_uuid field, end-of-slice packet tail]
+        self._lanes: Dict[Tuple[int, int], List[list]] = {}
+        self._child_tracks = 0
+
+        # Interned strings per InternedData field, and encoded TrackEvent
+        # fields that refer to them
+        self._iids: Dict[int, Dict[str, int]] = {}
+        self._names: Dict[str, bytes] = {}
+        self._categories: Dict[str, bytes] = {}
+        self._string_annotations: Dict[str, Dict[str, bytes]] = {}
+        # Annotation name and int_value key, to be followed by the value
+        self._int_prefixes: Dict[str, bytes] = {}
+
+        self._write_packet(_SEQUENCE + _uint(13, SEQ_INCREMENTAL_STATE_CLEARED))
+
+    def write(self, events: Iterable[Event]):
+        slices: List[DurationEvent] = []
+        for event in events:
+            self.count += 1
+            if isinstance(event, MetadataEvent):
+                self._add_metadata(event)
+            elif isinstance(event, DurationEvent):
+                slices.append(event)
+        if not slices:
+            return
+
+        # Pick a track for every slice, and (tick, is_begin, index) bounds:
+        # ends sort before begins at the same tick
+        slices.sort(key=attrgetter("ts"))
+        lanes = self._lanes
+        tracks = []
+        bounds = []
+        for i, event in enumerate(slices):
+            key = (event.pid, event.tid or 0)
+            lane = lanes.get(key)
+            if lane is None:
+                lane = self._describe_lane(*key)
+            ts = event.ts
+            end = ts + event.dur
+            for track in lane:
+                if track[0] <= ts:
+                    break
+            else:
+                track = self._add_child_track(*key)
+            track[0] = end
+            tracks.append(track)
+            bounds.append((ts, 1, i))
+            bounds.append((end, 0, i))
+        bounds.sort()
+
+        scale = self.TIMESTAMP_SCALE
+        small = _SMALL_VARINTS
+        begin_packet = self._begin_packet
+        timestamps: Dict[int, bytes] = {}
+        packets = []
+        append = packets.append
+        for ts, is_begin, i in bounds:
+            track = tracks[i]
+            head = timestamps.get(ts)
+            if head is None:
+                head = timestamps[ts] = _TIMESTAMP + _varint(ts * scale)
+            packet = head + (begin_packet(slices[i], track[1]) if is_begin else track[2])
+            size = len(packet)
+            append(_TRACE_PACKET + (small[size] if size < 16384 else _varint(size)) + packet)
+        self.f.write(b"".join(packets))
+
+    def _begin_packet(self, event: DurationEvent, track: bytes) -> bytes:
+        interned: List[bytes] = []
+        name = self._names.get(event.name)
+        if name is None:
+            name = self._names[event.name] = _NAME_IID + _varint(
+                self._intern(_INTERNED_NAMES, event.name, interned)
+            )
+        category = self._categories.get(event.cat)
+        if category is None:
+            category = self._categories[event.cat] = _CATEGORY_IID + _varint(
+                self._intern(_INTERNED_CATEGORIES, event.cat, interned)
+            )
+        fields = [_BEGIN, track, name, category]
+
+        small = _SMALL_VARINTS
+        int_prefixes = self._int_prefixes
+        string_annotations = self._string_annotations
+        for key, value in (event.args or {}).items():
+            kind = type(value)
+            if kind is int and value >= 0 and key in int_prefixes:
+                body = int_prefixes[key] + (small[value] if value < 16384 else _varint(value))
+                fields.append(_DEBUG_ANNOTATION_KEY + small[len(body)] + body)
+                continue
+            if kind is str:
+                annotation = string_annotations.get(key, _NOTHING).get(value)
+                if annotation is not None:
+                    fields.append(annotation)
+                    continue
+            fields.append(self._encode_annotation(key, value, interned))
+
+        track_event = b"".join(fields)
+        size = len(track_event)
+        packet = _TRACK_EVENT + (small[size] if size < 16384 else _varint(size)) + track_event
+        if interned:
+            packet += _message(_INTERNED_DATA, b"".join(interned))
+        return packet + _SEQUENCE + _NEEDS_STATE
+
+    def _intern(self, field: int, value: str, interned: List[bytes]) -> int:
+        table = self._iids.setdefault(field, {})
+        iid = table.get(value)
+        if iid is None:
+            # iids start at 1; 0 means unset
+            iid = table[value] = len(table) + 1
+            # EventName, EventCategory, DebugAnnotationName and InternedString
+            # all are {iid = 1, name/str = 2}
+            interned.append(_message(field, _uint(1, iid) + _string(2, value)))
+        return iid
+
+    def _encode_annotation(self, name: str, value: Any, interned: List[bytes]) -> bytes:
+        annotation = _uint(1, self._intern(_INTERNED_ANNOTATION_NAMES, name, interned))
+        if isinstance(value, bool):
+            annotation += _uint(2, value)
+        elif isinstance(value, int):
+            self._int_prefixes[name] = annotation + _INT_VALUE
+            annotation += _INT_VALUE + _varint(value)
+        elif isinstance(value, float):
+            annotation += _key(5, _FIXED64) + struct.pack("<d", value)
+        else:
+            # Strings repeat (PCs, disassembly), so they are interned and the
+            # whole annotation is kept for reuse
+            iid = self._intern(_INTERNED_STRING_VALUES, str(value), interned)
+            encoded = _message(_DEBUG_ANNOTATION, annotation + _uint(17, iid))
+            if type(value) is str:
+                self._string_annotations.setdefault(name, {})[value] = encoded
+            return encoded
+        return _message(_DEBUG_ANNOTATION, annotation)
+
+    def _add_metadata(self, event: MetadataEvent):
+        args = event.args or {}
+        if event.name == "process_name":
+            self._process_names[event.pid] = args.get("name", "")
+        elif event.name == "thread_name":
+            self._lane_names[(event.pid, event.tid or 0)] = args.get("name", "")
+        elif event.name == "thread_sort_index":
+            self._lane_ranks[(event.pid, event.tid or 0)] = args.get("sort_index", 0)
+
+    def _describe_lane(self, pid: int, tid: int) -> List[list]:
+        process_uuid = (pid + 1) << 32
+        if pid not in self._processes:
+            process = _uint(1, pid)  # ProcessDescriptor.pid
+            name = self._process_names.get(pid)
+            if name is not None:
+                process += _string(6, name)  # ProcessDescriptor.process_name
+            self._write_descriptor(
+                _uint(1, process_uuid) + _message(3, process) + _uint(11, CHILD_ORDERING_EXPLICIT)
+            )
+            self._processes.add(pid)
+
+        uuid = process_uuid | (tid + 1)
+        name = self._lane_names.get((pid, tid), f"{tid:02d}")
+        rank = self._lane_ranks.get((pid, tid), tid)
+        self._write_descriptor(
+            _uint(1, uuid) + _uint(5, process_uuid) + _string(2, name) + _uint(12, rank)
+            + _uint(11, CHILD_ORDERING_EXPLICIT)
+        )
+
+        lane = self._lanes[(pid, tid)] = [self._track(uuid)]
+        return lane
+
+    def _add_child_track(self, pid: int, tid: int) -> list:
+        """Add a track under the lane for slices that overlap its others."""
+        lane = self._lanes[(pid, tid)]
+        # Below 1 << 32, where no process or lane uuid is
+        self._child_tracks += 1
+        uuid = self._child_tracks
+        name = self._lane_names.get((pid, tid), f"{tid:02d}")
+        self._write_descriptor(
+            _uint(1, uuid) + _uint(5, (pid + 1) << 32 | (tid + 1))
+            + _string(2, f"{name} #{len(lane)}") + _uint(12, len(lane))
+        )
+        track = self._track(uuid)
+        lane.append(track)
+        return track
+
+    @staticmethod
+    def _track(uuid: int) -> list:
+        field = _TRACK_UUID + _varint(uuid)
+        return [float("-inf"), field, _message(11, _END + field) + _SEQUENCE + _NEEDS_STATE]
+
+    def _write_descriptor(self, descriptor: bytes):
+        self._write_packet(_message(_TRACK_DESCRIPTOR, descriptor) + _SEQUENCE)
+
+    def _write_packet(self, packet: bytes):
+        self.f.write(_TRACE_PACKET + _varint(len(packet)) + packet)
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
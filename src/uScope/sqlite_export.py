@@ -0,0 +1,171 @@
+"""SQLite export of parsed instructions and trace events, for ad-hoc queries.
+
+Example, the PCs that wait longest between dispatch and issue::
+
+    SELECT pc, mnemonic, SUM(issue_tick - dispatch_tick) AS wait
+    FROM instructions GROUP BY pc ORDER BY wait DESC LIMIT 10;
+"""
+import os
+import sqlite3
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from .O3 import STAGES, Instruction, mnemonic_of
+from .events import DurationEvent, Event, MetadataEvent
+
+if TYPE_CHECKING:
+    from .table import InstructionTable
+
+# Tick of every pipeline stage, NULL where the instruction never reached it
+STAGE_COLUMNS = tuple(f"{stage.value}_tick" for stage in STAGES)
+
+_SCHEMA = f"""
+CREATE TABLE instructions (
+    core_id INTEGER NOT NULL,
+    seq_num INTEGER NOT NULL,
+    pc TEXT,
+    disasm TEXT,
+    mnemonic TEXT,
+    opclass TEXT,
+    {", ".join(f"{column} INTEGER" for column in STAGE_COLUMNS)},
+    store_tick INTEGER,
+    squashed INTEGER NOT NULL
+);
+CREATE TABLE events (
+    name TEXT,
+    category TEXT,
+    pid INTEGER,
+    tid INTEGER,
+    ts INTEGER,
+    dur INTEGER,
+    seq_num INTEGER,
+    pc TEXT
+);
+CREATE TABLE tracks (
+    pid INTEGER NOT NULL,
+    tid INTEGER,
+    name TEXT,
+    sort_index INTEGER
+);
+"""
+
+# Created once the data is in, which is much faster than maintaining them
+_INDEXES = """
+CREATE INDEX instructions_pc ON instructions (pc);
+CREATE INDEX instructions_seq_num ON instructions (seq_num);
+CREATE INDEX instructions_opclass ON instructions (opclass);
+CREATE INDEX instructions_fetch_tick ON instructions (fetch_tick);
+CREATE INDEX events_ts ON events (ts);
+CREATE INDEX events_seq_num ON events (seq_num);
+CREATE INDEX events_category ON events (category);
+"""
+
+_INSERT_INSTRUCTION = (
+    f"INSERT INTO instructions VALUES ({', '.join('?' * (8 + len(STAGE_COLUMNS)))})"
+)
+_INSERT_EVENT = "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_INSERT_TRACK = "INSERT INTO tracks VALUES (?, ?, ?, ?)"
+
+
+class SqliteTraceWriter:
+    """Writes instructions and events into a new SQLite database.
+
+    Rows are buffered and inserted ``BATCH_ROWS`` at a time with
+    executemany() in a single transaction, in WAL mode; indexes are built
+    on close(). Takes events like the other trace writers, plus
+    instructions through write_instructions() or write_table().
+    """
+
+    BATCH_ROWS = 50_000
+
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        for path in (output_file, output_file + "-wal", output_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+        self.db = sqlite3.connect(output_file)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+
+        self.count = 0
+        self.instruction_count = 0
+        self._instructions: List[tuple] = []
+        self._events: List[tuple] = []
+        self._tracks: Dict[Tuple[int, Optional[int]], List] = {}
+
+    def write(self, events: Iterable[Event]):
+        rows = self._events
+        for event in events:
+            self.count += 1
+            if isinstance(event, DurationEvent):
+                args = event.args or {}
+                rows.append((event.name, event.cat, event.pid, event.tid, event.ts, event.dur,
+                             args.get("SeqNum"), args.get("PC")))
+                if len(rows) >= self.BATCH_ROWS:
+                    self._insert_events()
+            elif isinstance(event, MetadataEvent):
+                self._add_track(event)
+
+    def write_instructions(self, instructions: Iterable[Instruction]):
+        rows = self._instructions
+        for instr in instructions:
+            rows.append((
+                instr.core_id, instr.seq_num, instr.pc, instr.disasm,
+                mnemonic_of(instr.disasm), instr.opclass,
+                *[tick or None for tick in instr.ticks],
+                instr.store_tick or None, instr.is_squashed,
+            ))
+            if len(rows) >= self.BATCH_ROWS:
+                self._insert_instructions()
+
+    def write_table(self, table: "InstructionTable"):
+        """Bulk version of write_instructions() for a columnar table."""
+        disasm = table.strings_of(table.disasm)
+        columns = zip(
+            table.core_id.tolist(),
+            table.seq_num.tolist(),
+            table.strings_of(table.pc),
+            disasm,
+            map(mnemonic_of, disasm),
+            table.strings_of(table.opclass),
+            *[[tick or None for tick in column] for column in table.ticks.T.tolist()],
+            [tick or None for tick in table.store_tick.tolist()],
+            table.is_squashed.tolist(),
+        )
+        rows = self._instructions
+        for row in columns:
+            rows.append(row)
+            if len(rows) >= self.BATCH_ROWS:
+                self._insert_instructions()
+
+    def _add_track(self, event: MetadataEvent):
+        args = event.args or {}
+        track = self._tracks.setdefault((event.pid, event.tid), [None, None])
+        if event.name in ("process_name", "thread_name"):
+            track[0] = args.get("name")
+        elif event.name == "thread_sort_index":
+            track[1] = args.get("sort_index")
+
+    def _insert_instructions(self):
+        self.db.executemany(_INSERT_INSTRUCTION, self._instructions)
+        self.instruction_count += len(self._instructions)
+        self._instructions.clear()
+
+    def _insert_events(self):
+        self.db.executemany(_INSERT_EVENT, self._events)
+        self._events.clear()
+
+    def flush(self):
+        self._insert_instructions()
+        self._insert_events()
+        self.db.commit()
+
+    def close(self):
+        self.flush()
+        self.db.executemany(
+            _INSERT_TRACK,
+            [(pid, tid, name, sort_index) for (pid, tid), (name, sort_index) in self._tracks.items()],
+        )
+        self.db.executescript(_INDEXES)
+        self.db.commit()
+        self.db.close()
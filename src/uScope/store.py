@@ -0,0 +1,264 @@
+from array import array
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .O3 import NUM_STAGES, Instruction
+
+# String codes of rows that are not an instruction
+_NONE = -1  # the value None, a record without valid ticks
+_DELETED = -2
+
+# Odd, so that consecutive seq nums land in distinct slots of any table size
+_HASH_MULTIPLIER = 0x9E3779B1
+_CORE_MULTIPLIER = 0x85EBCA77
+_MIN_SLOTS = 8
+_NO_TICKS = array("q", bytes(8 * NUM_STAGES))
+
+Key = Tuple[int, int]
+
+
+class InstructionStore(MutableMapping):
+    """Parsed instructions keyed by (core_id, seq_num), in packed columns.
+
+    Behaves like the dict PipeViewParser used to keep: keys stay in
+    insertion order, storing an existing key overwrites it in place and
+    records without valid ticks are kept as None until drop_invalid().
+    Every instruction is one row of flat arrays, like a ParsedRange:
+    ``ticks`` holds NUM_STAGES ticks per row and ``pc``, ``disasm`` and
+    ``opclass`` are codes into ``strings``. Keys are found through an
+    open-addressing hash table of row numbers, so no Python object is kept
+    per instruction.
+
+    Instructions are built on access, which makes them copies: changing one
+    does not change the store until it is assigned back.
+    """
+
+    def __init__(self, items: Iterable[Tuple[Key, Optional[Instruction]]] = ()):
+        self.core_id = array("i")
+        self.seq_num = array("q")
+        self.ticks = array("q")
+        self.order = array("i")
+        self.store_tick = array("q")
+        self.pc = array("i")
+        self.disasm = array("i")
+        self.opclass = array("i")
+        self.strings: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+        self._live = 0
+        self._reindex(_MIN_SLOTS)
+        self.update(items)
+
+    def set_record(self, core_id: int, seq_num: int, pc: str, disasm: str, opclass: str,
+                   ticks: Sequence[int], order: int, store_tick: int = 0):
+        """``self[core_id, seq_num] = Instruction.from_ticks(...)``, without the Instruction."""
+        codes = self._codes
+        pc = codes[pc] if pc in codes else self._code(pc)
+        disasm = codes[disasm] if disasm in codes else self._code(disasm)
+        opclass = codes[opclass] if opclass in codes else self._code(opclass)
+        self._set_row(core_id, seq_num, pc, disasm, opclass, ticks, order, store_tick)
+
+    def drop_invalid(self):
+        """Remove the None values and the instructions without a positive tick."""
+        ticks = self.ticks
+        keep = [
+            row for row, pc in enumerate(self.pc)
+            if pc >= 0 and max(ticks[row * NUM_STAGES : (row + 1) * NUM_STAGES]) > 0
+        ]
+        if len(keep) < len(self.pc):
+            self._compact(keep)
+
+    def split_by_core(self) -> Dict[int, "InstructionStore"]:
+        """One store per core, keeping the order of the rows and sharing the strings."""
+        rows_by_core: Dict[int, List[int]] = {}
+        for row in self._rows():
+            rows_by_core.setdefault(self.core_id[row], []).append(row)
+        shards = {}
+        for core_id, rows in rows_by_core.items():
+            shard = shards[core_id] = InstructionStore()
+            shard.strings = self.strings
+            shard._codes = self._codes
+            for row in rows:
+                shard._set_row(core_id, self.seq_num[row], self.pc[row], self.disasm[row],
+                               self.opclass[row], self._row_ticks(row), self.order[row],
+                               self.store_tick[row])
+        return shards
+
+    def __getitem__(self, key: Key) -> Optional[Instruction]:
+        row = self._index[self._slot(*_split_key(key))]
+        if row < 0:
+            raise KeyError(key)
+        return self._value(row)
+
+    def __setitem__(self, key: Key, instr: Optional[Instruction]):
+        core_id, seq_num = _split_key(key)
+        if instr is None:
+            self._set_row(core_id, seq_num, _NONE, _NONE, _NONE, _NO_TICKS, 0, 0)
+            return
+        if (instr.core_id, instr.seq_num) != (core_id, seq_num):
+            raise ValueError(
+                f"Instruction of core {instr.core_id}, seq num {instr.seq_num} stored as {key!r}"
+            )
+        self.set_record(core_id, seq_num, instr.pc, instr.disasm, instr.opclass, instr.ticks,
+                        instr.order, instr.store_tick)
+
+    def __delitem__(self, key: Key):
+        slot = self._slot(*_split_key(key))
+        row = self._index[slot]
+        if row < 0:
+            raise KeyError(key)
+        # The slot keeps pointing at the row, so probes still pass over it
+        self.pc[row] = _DELETED
+        self._live -= 1
+
+    def __contains__(self, key) -> bool:
+        try:
+            return self._index[self._slot(*_split_key(key))] >= 0
+        except KeyError:
+            return False
+
+    def __iter__(self) -> Iterator[Key]:
+        core_id = self.core_id
+        seq_num = self.seq_num
+        for row in self._rows():
+            yield core_id[row], seq_num[row]
+
+    def __len__(self) -> int:
+        return self._live
+
+    def values(self) -> "_StoreValues":
+        return _StoreValues(self)
+
+    def items(self) -> "_StoreItems":
+        return _StoreItems(self)
+
+    def __repr__(self) -> str:
+        return f"InstructionStore({dict(self.items())!r})"
+
+    def _rows(self) -> Iterator[int]:
+        pc = self.pc
+        return (row for row in range(len(pc)) if pc[row] != _DELETED)
+
+    def _row_ticks(self, row: int) -> array:
+        start = row * NUM_STAGES
+        return self.ticks[start : start + NUM_STAGES]
+
+    def _value(self, row: int) -> Optional[Instruction]:
+        pc = self.pc[row]
+        if pc == _NONE:
+            return None
+        strings = self.strings
+        return Instruction.from_ticks(
+            self.seq_num[row],
+            strings[pc],
+            strings[self.disasm[row]],
+            strings[self.opclass[row]],
+            self._row_ticks(row),
+            self.order[row],
+            self.store_tick[row],
+            self.core_id[row],
+        )
+
+    def _code(self, value) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def _slot(self, core_id: int, seq_num: int) -> int:
+        """Slot of the key in the index: its row, or the empty slot to put it in."""
+        index = self._index
+        mask = len(index) - 1
+        slot = (seq_num * _HASH_MULTIPLIER + core_id * _CORE_MULTIPLIER) & mask
+        while True:
+            row = index[slot]
+            if row < 0 or (
+                self.seq_num[row] == seq_num
+                and self.core_id[row] == core_id
+                and self.pc[row] != _DELETED
+            ):
+                return slot
+            slot = (slot + 1) & mask
+
+    def _set_row(self, core_id: int, seq_num: int, pc: int, disasm: int, opclass: int,
+                 ticks, order: int, store_tick: int):
+        index = self._index
+        mask = len(index) - 1
+        seq_nums = self.seq_num
+        slot = (seq_num * _HASH_MULTIPLIER + core_id * _CORE_MULTIPLIER) & mask
+        row = index[slot]
+        while row >= 0:
+            if seq_nums[row] == seq_num and self.core_id[row] == core_id and self.pc[row] != _DELETED:
+                self.pc[row] = pc
+                self.disasm[row] = disasm
+                self.opclass[row] = opclass
+                start = row * NUM_STAGES
+                self.ticks[start : start + NUM_STAGES] = array("q", ticks)
+                self.order[row] = order
+                self.store_tick[row] = store_tick
+                return
+            slot = (slot + 1) & mask
+            row = index[slot]
+
+        rows = len(seq_nums)
+        index[slot] = rows
+        self.core_id.append(core_id)
+        seq_nums.append(seq_num)
+        self.pc.append(pc)
+        self.disasm.append(disasm)
+        self.opclass.append(opclass)
+        self.ticks.extend(ticks)
+        self.order.append(order)
+        self.store_tick.append(store_tick)
+        self._live += 1
+        # Deleted rows still take a slot; keep the index at most 2/3 full
+        if 3 * rows >= 2 * mask:
+            self._reindex(2 * len(index))
+
+    def _reindex(self, size: int):
+        rows = list(self._rows())
+        while 3 * len(rows) > 2 * size:
+            size *= 2
+        index = self._index = array("i", [-1]) * size
+        mask = size - 1
+        core_id = self.core_id
+        seq_num = self.seq_num
+        # Live keys are distinct, so every row takes the first free slot
+        for row in rows:
+            slot = (seq_num[row] * _HASH_MULTIPLIER + core_id[row] * _CORE_MULTIPLIER) & mask
+            while index[slot] >= 0:
+                slot = (slot + 1) & mask
+            index[slot] = row
+
+    def _compact(self, keep: List[int]):
+        """Keep only the given rows, in that order."""
+        for name in ("core_id", "seq_num", "order", "store_tick", "pc", "disasm", "opclass"):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, [column[row] for row in keep]))
+        ticks = array("q")
+        for row in keep:
+            ticks.extend(self._row_ticks(row))
+        self.ticks = ticks
+        self._live = len(keep)
+        self._reindex(_MIN_SLOTS)
+
+
+class _StoreValues(ValuesView):
+    def __iter__(self) -> Iterator[Optional[Instruction]]:
+        store = self._mapping
+        return map(store._value, store._rows())
+
+
+class _StoreItems(ItemsView):
+    def __iter__(self) -> Iterator[Tuple[Key, Optional[Instruction]]]:
+        store = self._mapping
+        for row in store._rows():
+            yield (store.core_id[row], store.seq_num[row]), store._value(row)
+
+
+def _split_key(key) -> Key:
+    try:
+        core_id, seq_num = key
+    except (TypeError, ValueError):
+        raise KeyError(key) from None
+    return core_id, seq_num
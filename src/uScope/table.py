@@ -0,0 +1,151 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List
+
+from .O3 import NUM_STAGES, Instruction, PipelineStage
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError(
+            "The columnar backend requires NumPy; install it with `pip install uScope[numpy]`"
+        )
+
+
+class InstructionTable:
+    """Struct-of-arrays store for parsed instructions.
+
+    Every instruction is a row: ``seq_num``, ``core_id``, ``order`` and
+    ``store_tick`` are int64 vectors, ``ticks`` is an int64 matrix with one
+    column per stage (indexed by ``PipelineStage.ordinal``, 0 where a stage
+    never appeared) and ``pc``, ``disasm`` and ``opclass`` are int32 codes
+    into the shared ``strings`` list. Selections return new tables sharing
+    the string list.
+    """
+
+    COLUMNS = ("seq_num", "core_id", "ticks", "order", "store_tick", "pc", "disasm", "opclass")
+
+    def __init__(self, seq_num, core_id, ticks, order, store_tick, pc, disasm, opclass,
+                 strings: List[str]):
+        require_numpy()
+        self.seq_num = seq_num
+        self.core_id = core_id
+        self.ticks = ticks
+        self.order = order
+        self.store_tick = store_tick
+        self.pc = pc
+        self.disasm = disasm
+        self.opclass = opclass
+        self.strings = strings
+
+    @classmethod
+    def from_instructions(cls, instructions: Iterable[Instruction]) -> "InstructionTable":
+        require_numpy()
+        strings: Dict[str, int] = {}
+        seq_num, core_id, order, store_tick, pc, disasm, opclass = (array("q") for _ in range(7))
+        ticks = bytearray()
+        for instr in instructions:
+            seq_num.append(instr.seq_num)
+            core_id.append(instr.core_id)
+            order.append(instr.order)
+            store_tick.append(instr.store_tick)
+            pc.append(strings.setdefault(instr.pc, len(strings)))
+            disasm.append(strings.setdefault(instr.disasm, len(strings)))
+            opclass.append(strings.setdefault(instr.opclass, len(strings)))
+            ticks += instr.ticks.tobytes()
+
+        return cls(
+            _column(seq_num, np.int64),
+            _column(core_id, np.int64),
+            np.frombuffer(ticks, dtype=np.int64).reshape(-1, NUM_STAGES),
+            _column(order, np.int64),
+            _column(store_tick, np.int64),
+            _column(pc, np.int32),
+            _column(disasm, np.int32),
+            _column(opclass, np.int32),
+            list(strings),
+        )
+
+    def __len__(self) -> int:
+        return len(self.seq_num)
+
+    def take(self, rows) -> "InstructionTable":
+        """New table with the rows selected by an index array or boolean mask."""
+        return InstructionTable(
+            *(getattr(self, name)[rows] for name in self.COLUMNS), strings=self.strings
+        )
+
+    def stage_ticks(self, stage: PipelineStage):
+        return self.ticks[:, stage.ordinal]
+
+    @property
+    def is_squashed(self):
+        return self.stage_ticks(PipelineStage.RETIRE) == 0
+
+    def committed(self) -> "InstructionTable":
+        return self.take(~self.is_squashed)
+
+    def sort_by_seq(self) -> "InstructionTable":
+        # Stable, so rows with equal seq nums keep their parse order
+        return self.take(np.argsort(self.seq_num, kind="stable"))
+
+    def core_ids(self) -> List[int]:
+        return np.unique(self.core_id).tolist()
+
+    def split_by_core(self) -> Dict[int, "InstructionTable"]:
+        order = np.argsort(self.core_id, kind="stable")
+        cores, starts = np.unique(self.core_id[order], return_index=True)
+        bounds = list(starts[1:]) + [len(order)]
+        return {
+            int(core): self.take(order[start:end])
+            for core, start, end in zip(cores, starts, bounds)
+        }
+
+    def strings_of(self, codes) -> List[str]:
+        strings = self.strings
+        return [strings[code] for code in codes.tolist()]
+
+    def __iter__(self) -> Iterator[Instruction]:
+        strings = self.strings
+        row_size = 8 * NUM_STAGES
+        ticks = np.ascontiguousarray(self.ticks).tobytes()
+        rows = zip(
+            range(0, row_size * len(self), row_size),
+            self.seq_num.tolist(),
+            self.core_id.tolist(),
+            self.order.tolist(),
+            self.store_tick.tolist(),
+            self.pc.tolist(),
+            self.disasm.tolist(),
+            self.opclass.tolist(),
+        )
+        for offset, seq_num, core_id, order, store_tick, pc, disasm, opclass in rows:
+            yield Instruction.from_ticks(
+                seq_num,
+                strings[pc],
+                strings[disasm],
+                strings[opclass],
+                array("q", ticks[offset : offset + row_size]),
+                order,
+                store_tick,
+                core_id,
+            )
+
+    def to_instructions(self) -> Dict[tuple, Instruction]:
+        return {(instr.core_id, instr.seq_num): instr for instr in self}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+    def unique_strings(self, column: str) -> List[str]:
+        """Distinct values of a string column, in code order."""
+        return self.strings_of(np.unique(getattr(self, column)))
+
+
+def _column(values: array, dtype):
+    return np.frombuffer(values, dtype=np.int64).astype(dtype)
@@ -1,9 +1,25 @@
-from typing import List, Tuple
+import heapq
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
 from .events import MetadataEvent
 
+_NO_LANE = float("inf")
+
 
 class StageLaneManager:
+    """Assigns intervals to lanes (threads) of one Perfetto process.
+
+    An interval goes to the lowest lane that is free at its start. If there
+    is none, a new lane is opened, up to ``max_width``; past that, it goes to
+    the lane that frees up first (the lowest one on ties).
+
+    Once ``TREE_MIN_LANES`` lanes are open, lane ends are kept in a min
+    segment tree over lane ids, so both searches are O(log W). Below that a
+    plain scan of ``pool`` is cheaper.
+    """
+
+    TREE_MIN_LANES = 64
+
     def __init__(self, max_width: int, pid: int, lane_name_prefix: str,
                  metadata_events: List[MetadataEvent]):
         self.max_width = max_width
@@ -14,6 +30,11 @@ class StageLaneManager:
         self.pool: List[Tuple[int, int]] = [(0, 0)]
         self.next_tid = 1
 
+        # Leaves hold the end of lane i at _tree[_size + i]; node j holds
+        # the min of its children 2j and 2j + 1
+        self._size = 0
+        self._tree = None
+
         self.metadata_events.append(MetadataEvent(
             name="thread_name", pid=self.pid, tid=0,
             args={"name": f"00_{self.lane_name_prefix}"}
@@ -24,27 +45,208 @@ class StageLaneManager:
         ))
 
     def assign_lane(self, start_time: int, end_time: int) -> Tuple[int, int]:
-        for i, (last_end, tid) in enumerate(self.pool):
-            if last_end <= start_time:
-                self.pool[i] = (end_time, tid)
-                return self.pid, tid
+        tree = self._tree
+        if tree is None:
+            pool = self.pool
+            for tid, (last_end, _) in enumerate(pool):
+                if last_end <= start_time:
+                    pool[tid] = (end_time, tid)
+                    return self.pid, tid
+            return self._scan_assign_busy(end_time)
+        size = self._size
 
-        if len(self.pool) < self.max_width:
-            new_tid = self.next_tid
-            self.next_tid += 1
-            self.pool.append((end_time, new_tid))
-
-            self.metadata_events.append(MetadataEvent(
-                name="thread_name", pid=self.pid, tid=new_tid,
-                args={"name": f"{new_tid:02d}_{self.lane_name_prefix}"}
-            ))
-            self.metadata_events.append(MetadataEvent(
-                name="thread_sort_index", pid=self.pid, tid=new_tid,
-                args={"sort_index": new_tid + 1}
-            ))
-            return self.pid, new_tid
-
-        earliest_idx = min(range(len(self.pool)), key=lambda i: self.pool[i][0])
-        _, tid = self.pool[earliest_idx]
-        self.pool[earliest_idx] = (end_time, tid)
+        if tree[size] <= start_time:
+            # Lane 0 is free, the common case for narrow stages
+            j = size
+        else:
+            earliest = tree[1]
+            if earliest > start_time and len(self.pool) < self.max_width:
+                return self._open_lane(end_time)
+
+            # Lowest lane free at start_time, or else the lowest one that
+            # frees up first
+            threshold = start_time if earliest <= start_time else earliest
+            j = 1
+            while j < size:
+                j <<= 1
+                if tree[j] > threshold:
+                    j += 1
+        tid = j - size
+
+        self.pool[tid] = (end_time, tid)
+        self._set_end(j, end_time)
+        return self.pid, tid
+
+    def assign_lanes(self, starts: Sequence[int], ends: Sequence[int],
+                     overlapping: Iterable[int]) -> List[int]:
+        """Lanes of a run of intervals, as assign_lane() would pick them in turn.
+
+        Only the intervals at the ``overlapping`` indices, in increasing
+        order, start before an earlier interval (or free_from()) ends. The
+        others find every lane free and take lane 0 without a search.
+        """
+        tids = [0] * len(starts)
+        overlapping = iter(overlapping)
+        done = 0
+        if self._tree is None:
+            done = self._scan_assign_lanes(starts, ends, overlapping, tids)
+        for i in overlapping:
+            if i > done:
+                # Only the last of the intervals since done decides lane 0
+                self._set_lane0_end(ends[i - 1])
+            tids[i] = self.assign_lane(starts[i], ends[i])[1]
+            done = i + 1
+        if len(starts) > done:
+            self._set_lane0_end(ends[-1])
+        return tids
+
+    def _scan_assign_lanes(self, starts: Sequence[int], ends: Sequence[int],
+                           overlapping: Iterator[int], tids: List[int]) -> int:
+        """assign_lanes() while there is no tree, filling ``tids``.
+
+        Works on a plain list of lane ends, written back to ``pool`` before a
+        lane is opened and on return. Stops once opening a lane builds the
+        tree; returns the number of intervals done.
+        """
+        lane_ends = [last_end for last_end, _ in self.pool]
+        done = 0
+        for i in overlapping:
+            if i > done:
+                lane_ends[0] = ends[i - 1]
+            start = starts[i]
+            for tid, last_end in enumerate(lane_ends):
+                if last_end <= start:
+                    lane_ends[tid] = ends[i]
+                    break
+            else:
+                if len(lane_ends) < self.max_width:
+                    self.pool[:] = zip(lane_ends, range(len(lane_ends)))
+                    tid = self._open_lane(ends[i])[1]
+                    lane_ends.append(ends[i])
+                else:
+                    tid = lane_ends.index(min(lane_ends))
+                    lane_ends[tid] = ends[i]
+            tids[i] = tid
+            done = i + 1
+            if self._tree is not None:
+                break
+        self.pool[:] = zip(lane_ends, range(len(lane_ends)))
+        return done
+
+    def free_from(self) -> int:
+        """Time from which every lane is free."""
+        return max(last_end for last_end, _ in self.pool)
+
+    def _set_lane0_end(self, end_time: int):
+        self.pool[0] = (end_time, 0)
+        if self._tree is not None:
+            self._set_end(self._size, end_time)
+
+    def _scan_assign_busy(self, end_time: int) -> Tuple[int, int]:
+        # Every lane is busy and there is no tree yet
+        pool = self.pool
+        if len(pool) < self.max_width:
+            return self._open_lane(end_time)
+
+        tid = min(range(len(pool)), key=lambda i: pool[i][0])
+        pool[tid] = (end_time, tid)
         return self.pid, tid
+
+    def _set_end(self, j: int, end_time: int):
+        tree = self._tree
+        tree[j] = end_time
+        j >>= 1
+        while j:
+            left = tree[2 * j]
+            right = tree[2 * j + 1]
+            smallest = left if left <= right else right
+            if tree[j] == smallest:
+                # Ancestors already hold the right minimum
+                break
+            tree[j] = smallest
+            j >>= 1
+
+    def _open_lane(self, end_time: int) -> Tuple[int, int]:
+        new_tid = self.next_tid
+        self.next_tid += 1
+        self.pool.append((end_time, new_tid))
+
+        if self._tree is not None or len(self.pool) >= self.TREE_MIN_LANES:
+            if new_tid >= self._size:
+                self._grow()
+            else:
+                self._set_end(self._size + new_tid, end_time)
+
+        self._add_lane_metadata(new_tid)
+        return self.pid, new_tid
+
+    def add_lanes(self, count: int):
+        """Declare lanes up to ``count`` assigned elsewhere, e.g. offline."""
+        while self.next_tid < count:
+            self.pool.append((0, self.next_tid))
+            self._add_lane_metadata(self.next_tid)
+            self.next_tid += 1
+
+    def _add_lane_metadata(self, tid: int):
+        self.metadata_events.append(MetadataEvent(
+            name="thread_name", pid=self.pid, tid=tid,
+            args={"name": f"{tid:02d}_{self.lane_name_prefix}"}
+        ))
+        self.metadata_events.append(MetadataEvent(
+            name="thread_sort_index", pid=self.pid, tid=tid,
+            args={"sort_index": tid + 1}
+        ))
+
+    def _grow(self):
+        size = 1
+        while size < len(self.pool):
+            size *= 2
+        tree = [_NO_LANE] * (2 * size)
+        for tid, (last_end, _) in enumerate(self.pool):
+            tree[size + tid] = last_end
+        for j in range(size - 1, 0, -1):
+            tree[j] = min(tree[2 * j], tree[2 * j + 1])
+        self._size = size
+        self._tree = tree
+
+
+def assign_optimal_lanes(
+    pids: Sequence[int], starts: Sequence[int], ends: Sequence[int]
+) -> Tuple[List[int], Dict[int, int]]:
+    """Offline lane assignment with the fewest lanes per process.
+
+    Intervals of each pid are swept in start order (ties keep their input
+    order); each one takes the lowest lane that has freed up, or a new lane.
+    This is interval graph coloring, so the number of lanes equals the
+    maximum overlap and no two intervals in a lane overlap. Returns the lane
+    of every interval and the number of lanes used by every pid.
+    """
+    by_pid: Dict[int, List[int]] = {}
+    for i, pid in enumerate(pids):
+        group = by_pid.get(pid)
+        if group is None:
+            group = by_pid[pid] = []
+        group.append(i)
+
+    tids = [0] * len(pids)
+    lanes: Dict[int, int] = {}
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    for pid, group in by_pid.items():
+        group.sort(key=starts.__getitem__)
+        busy: List[Tuple[int, int]] = []
+        free: List[int] = []
+        used = 0
+        for i in group:
+            start = starts[i]
+            while busy and busy[0][0] <= start:
+                heappush(free, heappop(busy)[1])
+            if free:
+                tid = heappop(free)
+            else:
+                tid = used
+                used += 1
+            heappush(busy, (ends[i], tid))
+            tids[i] = tid
+        lanes[pid] = used
+    return tids, lanes
@@ -0,0 +1,317 @@
+import io
+import json
+import os
+from importlib import import_module
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+from .events import Event, _encode_str
+
+# gzip level of compressed outputs, highest compression like gzip.open
+DEFAULT_GZIP_LEVEL = 9
+
+# Events may be given as Event objects, which serialize themselves, or dicts
+EventLike = Union[Event, Dict[str, Any]]
+
+
+def open_output(output_file: str, gzip_enabled: bool, gzip_level: int = DEFAULT_GZIP_LEVEL,
+                gzip_threads: Optional[int] = None) -> TextIO:
+    if gzip_enabled:
+        # Starts compression threads, so only loaded for compressed outputs
+        from .parallel_gzip import ParallelGzipWriter
+
+        return io.TextIOWrapper(ParallelGzipWriter(output_file, gzip_level, gzip_threads),
+                                encoding='utf-8')
+    return open(output_file, 'wt', encoding='utf-8')
+
+
+# Optional JSON backends by name, None if not installed. They are imported on
+# first use, as orjson alone takes longer to import than the rest of uScope.
+_backends: Dict[str, Any] = {"json": json}
+
+
+def _json_backend(name: str):
+    if name not in _backends:
+        try:
+            _backends[name] = import_module(name)
+        except ImportError:  # pragma: no cover - depends on the environment
+            _backends[name] = None
+    return _backends[name]
+
+
+def _stdlib_dumps(json) -> Callable[[Any], str]:
+    # Without indentation json uses its C encoder; skipping the circular
+    # reference check is safe for events, which are plain trees
+    return json.JSONEncoder(
+        separators=(",", ":"), ensure_ascii=False, check_circular=False
+    ).encode
+
+
+def _orjson_dumps(orjson) -> Callable[[Any], str]:
+    dumps = orjson.dumps
+    return lambda obj: dumps(obj).decode()
+
+
+def _ujson_dumps(ujson) -> Callable[[Any], str]:
+    dumps = ujson.dumps
+    return lambda obj: dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+
+def compact_dumps(backend: Optional[str] = None) -> Callable[[Any], str]:
+    """Fastest available serializer for compact JSON, or the named one.
+
+    orjson is preferred, then ujson, then the standard library. All of them
+    write minimal separators and keep non-ASCII characters as is.
+    """
+    factories = {"orjson": _orjson_dumps, "ujson": _ujson_dumps, "json": _stdlib_dumps}
+    if backend is None:
+        backend = next(name for name in factories if _json_backend(name) is not None)
+    elif backend not in factories:
+        raise ValueError(f"Unknown JSON backend {backend!r}, expected one of {list(factories)}")
+    elif _json_backend(backend) is None:
+        raise ImportError(f"JSON backend {backend!r} is not installed")
+    return factories[backend](_json_backend(backend))
+
+
+def _event_phase(event: EventLike) -> str:
+    return event.ph if isinstance(event, Event) else event.get("ph")
+
+
+def _event_span(event: EventLike) -> Tuple[int, int]:
+    if isinstance(event, Event):
+        return event.ts, event.dur
+    return event.get("ts", 0), event.get("dur", 0)
+
+
+def _event_serializer(indent: Optional[int], backend: Optional[str] = None):
+    """Serializer of one array element, padding included."""
+    if indent is None:
+        dumps = compact_dumps(backend)
+
+        def dump(event: EventLike) -> str:
+            return dumps(event._dict() if isinstance(event, Event) else event)
+        return dump
+
+    pad = " " * indent
+
+    def dump_indented(event: EventLike) -> str:
+        if isinstance(event, Event):
+            return pad + event.to_json(indent, level=1)
+        return pad + json.dumps(event, indent=indent).replace("\n", "\n" + pad)
+    return dump_indented
+
+
+def format_events(events: Iterable[EventLike], indent: Optional[int] = None,
+                  backend: Optional[str] = None) -> str:
+    """Serialize events as JsonArrayWriter does, for JsonArrayWriter.write_chunk()."""
+    return ",\n".join(map(_event_serializer(indent, backend), events))
+
+
+def string_encoder(indent: Optional[int] = None,
+                   backend: Optional[str] = None) -> Callable[[str], str]:
+    """JSON text of a string as JsonArrayWriter writes it inside an event."""
+    if indent is None:
+        return compact_dumps(backend)
+    return _encode_str
+
+
+def event_format(event: EventLike, indent: Optional[int] = None,
+                 backend: Optional[str] = None) -> str:
+    """%-format string of the events shaped like ``event``, padding included.
+
+    The values of ``event`` are the strings "{0}", "{1}"... in field order;
+    each becomes a %s, to be filled with an int or a string_encoder()
+    output. ``format % fields`` is then what format_events() writes for the
+    event holding those fields, without building it.
+    """
+    text = _event_serializer(indent, backend)(event).replace("%", "%%")
+    field = 0
+    while '"{%d}"' % field in text:
+        text = text.replace('"{%d}"' % field, "%s")
+        field += 1
+    return text
+
+
+class JsonArrayWriter:
+    """Incrementally writes events as a JSON array, one event per line.
+
+    With ``indent`` set, the output is byte-identical to
+    ``json.dump(events, f, indent=indent)``; with ``indent=None`` events are
+    written compactly by the fastest available backend (see compact_dumps()).
+    Events are serialized as they arrive, so the full list never has to be
+    materialized, and written to ``f`` in batches of ``BUFFER_EVENTS``.
+    """
+
+    BUFFER_EVENTS = 4096
+
+    def __init__(self, f: TextIO, indent: Optional[int] = None, backend: Optional[str] = None):
+        self.f = f
+        self.indent = indent
+        self.backend = backend
+        self.count = 0
+        self._dump = _event_serializer(indent, backend)
+        self._buffer: List[str] = []
+
+    def write(self, events: Iterable[EventLike]):
+        buffer = self._buffer
+        dump = self._dump
+        for event in events:
+            buffer.append(("[\n" if self.count == 0 else ",\n") + dump(event))
+            self.count += 1
+            if len(buffer) >= self.BUFFER_EVENTS:
+                self._drain()
+
+    def write_chunk(self, chunk: str, count: int):
+        """Write ``count`` events already serialized by format_events()."""
+        if count == 0:
+            return
+        self._drain()
+        self.f.write(("[\n" if self.count == 0 else ",\n") + chunk)
+        self.count += count
+
+    def _drain(self):
+        if self._buffer:
+            self.f.write("".join(self._buffer))
+            self._buffer.clear()
+
+    def flush(self):
+        self._drain()
+        self.f.flush()
+
+    def close(self):
+        self._drain()
+        self.f.write("[]" if self.count == 0 else "\n]")
+
+
+class TraceFileWriter(JsonArrayWriter):
+    """JsonArrayWriter that owns its output file."""
+
+    def __init__(self, output_file: str, gzip_enabled: bool = False, indent: Optional[int] = None,
+                 backend: Optional[str] = None, gzip_level: int = DEFAULT_GZIP_LEVEL,
+                 gzip_threads: Optional[int] = None):
+        super().__init__(open_output(output_file, gzip_enabled, gzip_level, gzip_threads),
+                         indent, backend)
+        self.output_file = output_file
+
+    def close(self):
+        super().close()
+        self.f.close()
+
+
+class RollingTraceWriter:
+    """Spreads events over a sequence of self-contained trace files.
+
+    A new file is started once the current one holds ``max_events`` duration
+    events, or, with ``split_every_ticks``, once an event starts in a later
+    window of that many ticks than the current file. Every file begins with
+    all metadata events seen so far, so each one can be opened in Perfetto
+    on its own.
+
+    Events of an earlier window than the current file's (out-of-order input)
+    go to the current file. The manifest, written next to the parts when
+    ``manifest_path`` is set, records the actual tick range and event counts
+    of every file.
+    """
+
+    def __init__(
+        self,
+        path_for_part: Callable[[int], str],
+        max_events: Optional[int],
+        gzip_enabled: bool = False,
+        indent: Optional[int] = None,
+        split_every_ticks: Optional[int] = None,
+        manifest_path: Optional[str] = None,
+        open_part: Optional[Callable[[str], Any]] = None,
+        gzip_level: int = DEFAULT_GZIP_LEVEL,
+        gzip_threads: Optional[int] = None,
+    ):
+        self.path_for_part = path_for_part
+        self.max_events = max_events
+        self.gzip_enabled = gzip_enabled
+        self.indent = indent
+        self.split_every_ticks = split_every_ticks
+        self.manifest_path = manifest_path
+        self.open_part = open_part or (
+            lambda path: TraceFileWriter(path, gzip_enabled, indent, gzip_level=gzip_level,
+                                         gzip_threads=gzip_threads)
+        )
+        self.metadata: List[EventLike] = []
+        self.files: List[str] = []
+        self.parts: List[Dict[str, Any]] = []
+        self.count = 0
+        self._current = None
+        self._current_events = 0
+        self._window = None
+
+    def write(self, events: Iterable[EventLike]):
+        # Events are handed to the current part in runs, so that a part
+        # writer sees them together
+        run: List[EventLike] = []
+        for event in events:
+            if _event_phase(event) == "M":
+                self.metadata.append(event)
+                if self._current is not None:
+                    run.append(event)
+            else:
+                ts, dur = _event_span(event)
+                window = None if self.split_every_ticks is None else ts // self.split_every_ticks
+                if (
+                    self._current is None
+                    or (self.max_events is not None and self._current_events >= self.max_events)
+                    or (window is not None and window > self._window)
+                ):
+                    if run:
+                        self._current.write(run)
+                        run = []
+                    self._roll(window)
+                run.append(event)
+                self._current_events += 1
+                part = self.parts[-1]
+                if part["first_tick"] is None or ts < part["first_tick"]:
+                    part["first_tick"] = ts
+                if part["last_tick"] is None or ts + dur > part["last_tick"]:
+                    part["last_tick"] = ts + dur
+            self.count += 1
+        if run:
+            self._current.write(run)
+
+    def _roll(self, window: Optional[int] = None):
+        if self._current is not None:
+            self._close_part()
+        path = self.path_for_part(len(self.files))
+        self.files.append(path)
+        self.parts.append({"file": os.path.basename(path), "first_tick": None, "last_tick": None})
+        if window is not None:
+            self._window = window
+            self.parts[-1]["window"] = [
+                window * self.split_every_ticks, (window + 1) * self.split_every_ticks
+            ]
+        self._current = self.open_part(path)
+        self._current.write(self.metadata)
+        self._current_events = 0
+
+    def _close_part(self):
+        self._current.close()
+        self.parts[-1]["events"] = self._current.count
+        self.parts[-1]["duration_events"] = self._current_events
+        self.write_manifest()
+
+    def write_manifest(self):
+        if self.manifest_path is None:
+            return
+        manifest = {
+            "split_every_ticks": self.split_every_ticks,
+            "max_events_per_file": self.max_events,
+            "files": self.parts,
+        }
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    def flush(self):
+        if self._current is not None:
+            self._current.flush()
+
+    def close(self):
+        if self._current is None:
+            self._roll()
+        self._close_part()
+        self._current = None
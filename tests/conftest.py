@@ -7,6 +7,14 @@ from uScope.parser import PipeViewParser
 from uScope.O3 import Instruction, PipelineStage
 
 
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path_factory, monkeypatch) -> Path:
+    """Keeps parse caches written by the tests out of the user's cache directory."""
+    path = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(path))
+    return path
+
+
 @pytest.fixture(scope="session")
 def config() -> Config:
     config_dir = Path(__file__).parent.parent.joinpath("src/uScope/configs")
@@ -244,3 +252,30 @@ O3PipeView:retire:141000:store:0
     trace_file = tmp_path.joinpath("trace_with_unordered.out")
     trace_file.write_text(content)
     return trace_file
+
+
+@pytest.fixture
+def large_trace(tmp_path: Path) -> Path:
+    lines = []
+    opclasses = ["IntAlu", "MemRead", "MemWrite", "IntMult", "FloatAdd"]
+    for seq in range(1, 2001):
+        fetch = 1000 + (seq // 4) * 500
+        # Every 7th instruction is squashed, every 5th record is printed late
+        squashed = seq % 7 == 0
+        ticks = [0] * 6 if squashed else [fetch + 500 * i for i in range(1, 7)]
+        store = ticks[5] + 1500 if not squashed and seq % 5 == 2 else 0
+        lines.append(
+            f"O3PipeView:fetch:{fetch}:0x{0x10000 + 4 * (seq % 97):08x}:{seq % 2}:{seq}:"
+            f"op{seq % 13} a{seq % 8}, a{seq % 5}:{opclasses[seq % len(opclasses)]}"
+        )
+        for stage, tick in zip(["decode", "rename", "dispatch", "issue", "complete"], ticks):
+            lines.append(f"O3PipeView:{stage}:{tick}")
+        lines.append(f"O3PipeView:retire:{ticks[5]}:store:{store}")
+
+    records = [lines[i:i + 7] for i in range(0, len(lines), 7)]
+    for i in range(0, len(records) - 1, 5):
+        records[i], records[i + 1] = records[i + 1], records[i]
+
+    trace_file = tmp_path.joinpath("large_trace.out")
+    trace_file.write_text("\n".join(line for record in records for line in record) + "\n")
+    return trace_file
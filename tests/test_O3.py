@@ -0,0 +1,62 @@
+import pickle
+
+import pytest
+
+from uScope.O3 import Instruction, PipelineStage
+
+
+def make_instruction(**kwargs) -> Instruction:
+    return Instruction(seq_num=7, pc="0x1000", disasm="ld x1, 0(x2)", opclass="MemRead", **kwargs)
+
+
+def test_stage_order_preserved():
+    order = [PipelineStage.FETCH, PipelineStage.RENAME, PipelineStage.DECODE, PipelineStage.RETIRE]
+    instr = make_instruction(
+        stages={stage: 100 * (i + 1) for i, stage in enumerate(order)},
+        stage_order=order,
+    )
+
+    assert instr.stage_order == order
+    assert list(instr.stages) == order
+    assert dict(instr.stages) == {stage: 100 * (i + 1) for i, stage in enumerate(order)}
+    assert PipelineStage.ISSUE not in instr.stages
+    assert instr.tick(PipelineStage.ISSUE) == 0
+    assert instr.stages.get(PipelineStage.ISSUE, -1) == -1
+    with pytest.raises(KeyError):
+        instr.stages[PipelineStage.ISSUE]
+
+
+def test_zero_tick_stage_is_present():
+    instr = make_instruction()
+    instr.set_stage(PipelineStage.FETCH, 1000)
+    instr.set_stage(PipelineStage.RETIRE, 0)
+
+    assert PipelineStage.RETIRE in instr.stages
+    assert instr.stages[PipelineStage.RETIRE] == 0
+    assert instr.is_squashed
+    assert instr.active_stages() == [(PipelineStage.FETCH, 1000)]
+
+
+def test_set_stage_overwrites_without_reordering():
+    instr = make_instruction()
+    instr.stages[PipelineStage.FETCH] = 1000
+    instr.stages[PipelineStage.DECODE] = 1100
+    instr.stages[PipelineStage.FETCH] = 900
+
+    assert instr.stage_order == [PipelineStage.FETCH, PipelineStage.DECODE]
+    assert instr.tick(PipelineStage.FETCH) == 900
+
+    del instr.stages[PipelineStage.FETCH]
+    assert instr.stage_order == [PipelineStage.DECODE]
+    assert len(instr.stages) == 1
+
+
+def test_equality_and_pickle():
+    stages = {stage: 1000 + i for i, stage in enumerate(PipelineStage.order())}
+    instr = make_instruction(stages=stages, stage_order=PipelineStage.order(), store_tick=2000)
+
+    assert instr == make_instruction(stages=stages, stage_order=PipelineStage.order(), store_tick=2000)
+    assert instr != make_instruction(stages=stages, stage_order=PipelineStage.order())
+    assert pickle.loads(pickle.dumps(instr)) == instr
+    assert not instr.is_squashed
+    assert instr.mnemonic == "LD"
@@ -0,0 +1,71 @@
+import pytest
+
+from uScope.cache import cache_dir, cache_path, load_cache, load_cache_table, save_cache
+from uScope.parser import PipeViewParser
+
+
+@pytest.mark.parametrize("trace", ["large_trace", "trace_with_missing_stages", "trace_with_in_order"])
+def test_cache_roundtrip(request, trace):
+    trace_file = str(request.getfixturevalue(trace))
+    parser = PipeViewParser()
+    parser.parse_file(trace_file)
+
+    save_cache(trace_file, parser.instructions)
+    cached = load_cache(trace_file)
+
+    assert cache_path(trace_file).exists()
+    assert list(cached.items()) == list(parser.instructions.items())
+    for key, instr in cached.items():
+        assert instr.stage_order == parser.instructions[key].stage_order
+
+
+def test_cache_location(trace_with_pipelined, cache_home):
+    trace_file = str(trace_with_pipelined)
+    assert cache_dir() == cache_home.joinpath("uScope")
+    assert cache_path(trace_file).parent == cache_dir()
+    assert cache_path(trace_file).name.startswith("trace_with_pipelined.out-")
+    # Traces of the same name in different directories get their own caches
+    assert cache_path(trace_file) != cache_path("elsewhere/trace_with_pipelined.out")
+
+
+@pytest.mark.parametrize("trace", ["large_trace", "trace_with_missing_stages", "trace_with_in_order"])
+def test_cache_table(request, trace):
+    pytest.importorskip("numpy")
+    trace_file = str(request.getfixturevalue(trace))
+    parser = PipeViewParser()
+    parser.parse_file(trace_file)
+    save_cache(trace_file, parser.instructions)
+
+    table = load_cache_table(trace_file)
+    expected = parser.to_table()
+    for name in expected.COLUMNS:
+        assert (getattr(table, name) == getattr(expected, name)).all(), name
+    assert list(table) == list(parser.instructions.values())
+
+
+def test_cache_missing(trace_with_pipelined):
+    assert load_cache(str(trace_with_pipelined)) is None
+
+
+def test_cache_stale_after_modification(trace_with_pipelined):
+    trace_file = str(trace_with_pipelined)
+    parser = PipeViewParser()
+    parser.parse_file(trace_file)
+    save_cache(trace_file, parser.instructions)
+
+    with open(trace_file, "a") as f:
+        f.write("O3PipeView:fetch:300000:0x2000:0:56:nop:IntAlu\n")
+
+    assert load_cache(trace_file) is None
+
+
+def test_cache_corrupt(trace_with_pipelined):
+    trace_file = str(trace_with_pipelined)
+    parser = PipeViewParser()
+    parser.parse_file(trace_file)
+    save_cache(trace_file, parser.instructions)
+
+    path = cache_path(trace_file)
+    path.write_bytes(path.read_bytes()[:-10])
+
+    assert load_cache(trace_file) is None
@@ -2,7 +2,16 @@ import pytest, json
 from pathlib import Path
 
 from uScope.O3 import PipelineStage, OpClass
-from uScope.config import Config, load_config
+from uScope.builtin_configs import builtin_configs
+from uScope.config import (
+    BUILTIN_CONFIG_DIR,
+    BUILTIN_CONFIG_MODULE,
+    CompiledConfig,
+    Config,
+    builtin_module_source,
+    load_config,
+    read_config_dir,
+)
 
 
 def test_colors(minimal_parser, config: Config):
@@ -35,3 +44,63 @@ def test_config_load_from_nonexist_dir(tmp_path: Path):
     nonexist = tmp_path.joinpath("nonexist")
     config = load_config(nonexist)
     assert config.get_stage_name(PipelineStage.FETCH) is not None
+
+
+def test_config_pickle(config: Config):
+    import pickle
+
+    restored = pickle.loads(pickle.dumps(config))
+    assert restored.as_dict() == config.as_dict()
+    assert restored.pipeline_width == config.pipeline_width
+
+
+def test_compiled_config_matches_config(minimal_parser, config: Config):
+    assert isinstance(config, CompiledConfig)
+    plain = Config(config.as_dict())
+    for name in ("pipeline_pid", "func_units_pid", "store_completions_pid",
+                 "pipeline_width", "func_units_width"):
+        assert getattr(config, name) == getattr(plain, name)
+    for stage in PipelineStage:
+        assert config.get_stage_name(stage) == plain.get_stage_name(stage)
+    for opclass in list(OpClass) + ["IntAlu", "NotAnOpClass"]:
+        assert config.get_func_unit(opclass) == plain.get_func_unit(opclass)
+    for unit in ("IntALU", "NoSuchUnit"):
+        assert config.get_color_for_func_unit(unit) == plain.get_color_for_func_unit(unit)
+    for instr in minimal_parser.instructions.values():
+        assert config.get_color_for_instr(instr) == plain.get_color_for_instr(instr)
+    assert config.get_squashed_cname() == plain.get_squashed_cname()
+
+
+def test_compiled_config_matches_config_on_builtin_keys(config: Config):
+    plain = Config(config.as_dict())
+    for section in builtin_configs().values():
+        for key, value in section.items():
+            for name in (key, value):
+                if not isinstance(name, str):
+                    continue
+                assert config.get_func_unit(name) == plain.get_func_unit(name)
+                assert config.get_color_for_func_unit(name) == plain.get_color_for_func_unit(name)
+
+
+def test_compiled_config_missing_stage_name(tmp_path: Path):
+    (tmp_path.joinpath("stage_names.json")).write_text(json.dumps({"fetch": "MY_FETCH"}))
+    config = load_config(tmp_path)
+    assert config.get_stage_name(PipelineStage.FETCH) == "MY_FETCH"
+    with pytest.raises(KeyError):
+        config.get_stage_name(PipelineStage.DECODE)
+
+
+def test_compiled_config_color_cache(minimal_parser, config: Config, monkeypatch):
+    monkeypatch.setattr("uScope.config.COLOR_CACHE_SIZE", 2)
+    plain = Config(config.as_dict())
+    instructions = list(minimal_parser.instructions.values())
+    for instr in instructions * 2:
+        assert config.get_color_for_instr(instr) == plain.get_color_for_instr(instr)
+        assert len(config._color_of_instr) <= 2
+
+
+def test_builtin_module_in_sync():
+    # Regenerate with `python -m uScope.config` after editing configs/*.json
+    assert BUILTIN_CONFIG_MODULE.read_text(encoding="utf-8") == builtin_module_source()
+    assert builtin_configs() == read_config_dir(BUILTIN_CONFIG_DIR)
+    assert builtin_configs() is not builtin_configs()
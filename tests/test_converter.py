@@ -2,7 +2,7 @@ import pytest
 from typing import List, Tuple
 
 from uScope.O3 import PipelineStage
-from uScope.converter import ChromeTracingConverter
+from uScope.converter import ChromeTracingConverter, SeqNumReorderBuffer
 from uScope.parser import PipeViewParser
 from uScope.config import Config
 
@@ -235,3 +235,47 @@ def test_convert_unordered(trace_with_unordered, config: Config):
     )
 
     assert_seq_nums(events, [2, 4, 5, 7])
+
+
+def test_reorder_buffer_restores_seq_order(trace_with_unordered):
+    buffer = SeqNumReorderBuffer(window=2)
+    released = []
+    for instr in PipeViewParser().iter_file(str(trace_with_unordered)):
+        released.extend(buffer.push(instr))
+    released.extend(buffer.flush())
+
+    assert [instr.seq_num for instr in released] == [2, 4, 5, 7]
+
+
+def test_stream_matches_convert(trace_with_pipelined, config: Config):
+    parser = PipeViewParser()
+    parser.parse_file(str(trace_with_pipelined))
+    expected = ChromeTracingConverter(parser, config, exclude_exec=True).convert()
+
+    converter = ChromeTracingConverter(PipeViewParser(), config, exclude_exec=True)
+    events = converter.start_stream()
+    for instr in PipeViewParser().iter_file(str(trace_with_pipelined)):
+        events.extend(converter.feed(instr))
+    events = [e.to_dict() for e in events]
+
+    duration_events = lambda evs: [e for e in evs if e["ph"] == "X"]
+    assert len(events) == len(expected)
+    assert duration_events(events) == duration_events(expected)
+
+
+def test_optimal_lane_mode(trace_with_pipelined, config: Config):
+    parser = PipeViewParser()
+    parser.parse_file(str(trace_with_pipelined))
+    greedy = ChromeTracingConverter(parser, config).convert(progress=False)
+    optimal = ChromeTracingConverter(parser, config, lane_mode="optimal").convert(progress=False)
+
+    def strip_lanes(events):
+        return [{k: v for k, v in e.items() if k != "tid"} for e in events if e["ph"] == "X"]
+
+    assert strip_lanes(optimal) == strip_lanes(greedy)
+    lanes = {(e["pid"], e["tid"]) for e in optimal if e["ph"] == "X"}
+    declared = {(e["pid"], e["tid"]) for e in optimal if e["name"] == "thread_name"}
+    assert lanes <= declared
+
+    with pytest.raises(ValueError):
+        ChromeTracingConverter(parser, config, lane_mode="optimal").start_stream()
@@ -1,3 +1,4 @@
+import json
 import pytest
 from typing import List, Dict, Any
 
@@ -5,6 +6,7 @@ from uScope.O3 import PipelineStage, OpClass
 from uScope.converter import ChromeTracingConverter
 from uScope.parser import PipeViewParser
 from uScope.config import Config
+from uScope.events import DurationEvent, MetadataEvent
 
 
 def filter_events_by_category(
@@ -105,3 +107,22 @@ def test_convert_in_order(trace_with_in_order, config: Config):
     )
 
     # TODO: Test Func Units Events
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"indent": 2},
+    {"separators": (",", ":")},
+    {"indent": 4, "separators": (",", ":")},
+])
+def test_to_json_matches_json_dumps(options):
+    events = [
+        MetadataEvent(name="process_name", pid=100, args={"name": "Fetch"}),
+        MetadataEvent(name="thread_sort_index", pid=100, tid=3, args={"sort_index": 4}),
+        DurationEvent(name="LW", pid=104, ts=2300, dur=100, cat="Issue", tid=1,
+                      args={"PC": "0x80000000", "SeqNum": 2, "Disasm": 'lw a0, 0(a1) "\\x"'}),
+        DurationEvent(name="ADD", pid=104, ts=1, dur=1, cat="Issue", cname="good", args={}),
+    ]
+    for event in events:
+        assert event.to_json(**options) == json.dumps(event.to_dict(), **options)
+    assert "cname" not in events[2].to_dict()
@@ -1,9 +1,15 @@
 import pytest
 import sys
 import json
+import gzip
+import logging
+import os
+import subprocess
 from pathlib import Path
 
+from uScope.cache import cache_path
 from uScope.main import main
+from uScope.parallel_gzip import ParallelGzipWriter
 
 
 def test_main_basic(tmp_path: Path, monkeypatch):
@@ -34,3 +40,327 @@ O3PipeView:retire:1500:store:0
     assert output_file.exists()
     data = json.loads(output_file.read_text())
     assert isinstance(data, list)
+
+
+def test_main_stream(tmp_path: Path, monkeypatch, trace_with_pipelined):
+    output_dir = tmp_path.joinpath("output")
+    stream_dir = tmp_path.joinpath("stream")
+
+    monkeypatch.setattr(
+        sys, "argv",
+        ["uscope", "-i", str(trace_with_pipelined), "-o", str(output_dir), "--exclude-exec"],
+    )
+    main()
+    monkeypatch.setattr(
+        sys, "argv",
+        ["uscope", "-i", str(trace_with_pipelined), "-o", str(stream_dir), "--exclude-exec", "--stream"],
+    )
+    main()
+
+    name = "trace_with_pipelined_0.json"
+    expected = json.loads(output_dir.joinpath(name).read_text())
+    streamed = json.loads(stream_dir.joinpath(name).read_text())
+    assert sorted(map(json.dumps, streamed)) == sorted(map(json.dumps, expected))
+
+
+def test_main_gzip_input(tmp_path: Path, monkeypatch, trace_with_pipelined):
+    input_file = tmp_path.joinpath("trace.out.gz")
+    input_file.write_bytes(gzip.compress(trace_with_pipelined.read_bytes()))
+    output_dir = tmp_path.joinpath("output")
+
+    monkeypatch.setattr(
+        sys, "argv", ["uscope", "-i", str(input_file), "-o", str(output_dir)],
+    )
+    main()
+
+    data = json.loads(output_dir.joinpath("trace_0.json").read_text())
+    assert any(e.get("args", {}).get("SeqNum") == 55 for e in data)
+
+
+def test_main_pretty(tmp_path: Path, monkeypatch, trace_with_pipelined):
+    outputs = {}
+    for flags in ([], ["--pretty"]):
+        output_dir = tmp_path.joinpath(f"output{len(flags)}")
+        monkeypatch.setattr(
+            sys, "argv", ["uscope", "-i", str(trace_with_pipelined), "-o", str(output_dir)] + flags,
+        )
+        main()
+        outputs[bool(flags)] = output_dir.joinpath("trace_with_pipelined_0.json").read_text()
+
+    data = json.loads(outputs[True])
+    assert outputs[True] == json.dumps(data, indent=2)
+    assert json.loads(outputs[False]) == data
+    assert len(outputs[False]) < len(outputs[True])
+
+
+def test_main_gzip_output(tmp_path: Path, monkeypatch, trace_with_pipelined):
+    output_dir = tmp_path.joinpath("output")
+    monkeypatch.setattr(
+        sys, "argv",
+        ["uscope", "-i", str(trace_with_pipelined), "-o", str(output_dir), "-z", "--gzip-level", "1"],
+    )
+    main()
+
+    data = json.loads(gzip.decompress(output_dir.joinpath("trace_with_pipelined_0.json.gz").read_bytes()))
+    assert any(e.get("args", {}).get("SeqNum") == 55 for e in data)
+
+
+@pytest.mark.parametrize("extra, threads", [([], 8), (["-j", "2"], 4), (["-j", "0"], 1),
+                                           (["-j", "2", "--gzip-threads", "3"], 3)])
+def test_main_gzip_threads(tmp_path: Path, monkeypatch, trace_with_pipelined, extra, threads):
+    created = []
+    init = ParallelGzipWriter.__init__
+
+    def record(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        created.append(self.threads)
+
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(ParallelGzipWriter, "__init__", record)
+    monkeypatch.setattr(
+        sys, "argv",
+        ["uscope", "-q", "-i", str(trace_with_pipelined), "-o", str(tmp_path), "-z", "--no-cache",
+         *extra],
+    )
+    main()
+    assert created == [threads]
+
+
+def test_main_seq_range(tmp_path: Path, monkeypatch, trace_with_pipelined):
+    output_dir = tmp_path.joinpath("output")
+    monkeypatch.setattr(
+        sys, "argv",
+        ["uscope", "-i", str(trace_with_pipelined), "-o", str(output_dir), "--seq-range", "54:"],
+    )
+    main()
+
+    data = json.loads(output_dir.joinpath("trace_with_pipelined_0.json").read_text())
+    seq_nums = {e["args"]["SeqNum"] for e in data if e["ph"] == "X"}
+    assert seq_nums == {54, 55}
+
+
+def test_main_parse_cache(tmp_path: Path, monkeypatch, trace_with_pipelined):
+    output_dir = tmp_path.joinpath("output")
+    argv = ["uscope", "-i", str(trace_with_pipelined), "-o", str(output_dir)]
+    output_file = output_dir.joinpath("trace_with_pipelined_0.json")
+    cache_file = cache_path(str(trace_with_pipelined))
+
+    monkeypatch.setattr(sys, "argv", argv + ["--no-cache"])
+    main()
+    assert not cache_file.exists()
+    expected = output_file.read_text()
+
+    monkeypatch.setattr(sys, "argv", argv)
+    main()
+    assert cache_file.exists()
+    assert output_file.read_text() == expected
+
+    monkeypatch.setattr("uScope.main.MmapPipeViewParser", None)
+    main()
+    assert output_file.read_text() == expected
+    assert not Path(str(trace_with_pipelined) + ".uscope-cache").exists()
+
+
+def test_main_parse_cache_columnar(tmp_path: Path, monkeypatch, trace_with_pipelined):
+    pytest.importorskip("numpy")
+    argv = ["uscope", "-i", str(trace_with_pipelined), "-o", str(tmp_path), "--columnar"]
+    monkeypatch.setattr(sys, "argv", argv)
+    main()
+    expected = tmp_path.joinpath("trace_with_pipelined_0.json").read_text()
+
+    # Loaded into the table without parsing or building Instruction objects
+    monkeypatch.setattr("uScope.main.MmapPipeViewParser", None)
+    monkeypatch.setattr("uScope.main.load_cache", None)
+    main()
+    assert tmp_path.joinpath("trace_with_pipelined_0.json").read_text() == expected
+
+
+def test_main_parse_cache_unwritable(tmp_path: Path, monkeypatch, caplog, trace_with_pipelined):
+    # A file where the cache directory would go
+    blocked = tmp_path.joinpath("blocked")
+    blocked.write_text("")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(blocked))
+    monkeypatch.setattr(
+        sys, "argv", ["uscope", "-i", str(trace_with_pipelined), "-o", str(tmp_path / "out")]
+    )
+    with caplog.at_level(logging.INFO):
+        main()
+    assert tmp_path.joinpath("out", "trace_with_pipelined_0.json").exists()
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
+
+
+def test_main_columnar(tmp_path: Path, monkeypatch, large_trace):
+    pytest.importorskip("numpy")
+    argv = ["uscope", "-i", str(large_trace), "--no-cache"]
+
+    monkeypatch.setattr(sys, "argv", argv + ["-o", str(tmp_path / "objects")])
+    main()
+    monkeypatch.setattr(sys, "argv", argv + ["-o", str(tmp_path / "columnar"), "--columnar"])
+    main()
+
+    for core_id in (0, 1):
+        name = f"large_trace_{core_id}.json"
+        expected = tmp_path.joinpath("objects", name).read_text()
+        assert tmp_path.joinpath("columnar", name).read_text() == expected
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_main_parallel_cores(tmp_path: Path, monkeypatch, large_trace, columnar):
+    if columnar:
+        pytest.importorskip("numpy")
+    argv = ["uscope", "-i", str(large_trace), "--no-cache"] + (["--columnar"] if columnar else [])
+
+    monkeypatch.setattr(sys, "argv", argv + ["-o", str(tmp_path / "serial")])
+    main()
+    monkeypatch.setattr(sys, "argv", argv + ["-o", str(tmp_path / "parallel"), "--jobs", "2"])
+    main()
+
+    for core_id in (0, 1):
+        name = f"large_trace_{core_id}.json"
+        expected = tmp_path.joinpath("serial", name).read_text()
+        assert tmp_path.joinpath("parallel", name).read_text() == expected
+
+
+@pytest.mark.parametrize("jobs", ["-1", "two"])
+def test_main_invalid_jobs(monkeypatch, capsys, trace_with_pipelined, jobs):
+    monkeypatch.setattr(sys, "argv", ["uscope", "-i", str(trace_with_pipelined), "-j", jobs])
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 2
+    assert "expected a non-negative integer" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("extra", [[], ["--columnar", "--format", "perfetto-proto"]])
+def test_main_jobs_serial_formatting(tmp_path: Path, monkeypatch, caplog, trace_with_pipelined,
+                                     extra):
+    if extra:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(
+        sys, "argv",
+        ["uscope", "-i", str(trace_with_pipelined), "-o", str(tmp_path), "--no-cache",
+         "-j", "2", *extra],
+    )
+    with caplog.at_level(logging.INFO, logger="uScope.main"):
+        main()
+    assert "Formatting events in a single process" in caplog.text
+
+
+def test_main_follow(tmp_path: Path, monkeypatch, trace_with_pipelined):
+    output_dir = tmp_path.joinpath("output")
+    monkeypatch.setattr(
+        sys, "argv",
+        ["uscope", "-i", str(trace_with_pipelined), "-o", str(output_dir),
+         "--follow", "--follow-timeout", "0", "--follow-chunk-events", "10"],
+    )
+    main()
+
+    parts = sorted(output_dir.glob("trace_with_pipelined_0.*.json"))
+    assert [p.name for p in parts][:2] == ["trace_with_pipelined_0.0000.json", "trace_with_pipelined_0.0001.json"]
+    seq_nums = set()
+    for part in parts:
+        data = json.loads(part.read_text())
+        assert any(e["name"] == "process_name" for e in data)
+        seq_nums.update(e["args"]["SeqNum"] for e in data if e["ph"] == "X")
+    assert seq_nums == {53, 54, 55}
+
+
+@pytest.mark.parametrize("flags", [["--split-every-ticks", "1000"], ["--max-events-per-file", "5"]])
+def test_main_split(tmp_path: Path, monkeypatch, trace_with_pipelined, flags):
+    output_dir = tmp_path.joinpath("output")
+    monkeypatch.setattr(
+        sys, "argv", ["uscope", "-i", str(trace_with_pipelined), "-o", str(output_dir)] + flags,
+    )
+    main()
+
+    manifest = json.loads(output_dir.joinpath("trace_with_pipelined_0_manifest.json").read_text())
+    assert len(manifest["files"]) > 1
+    seq_nums = set()
+    for entry in manifest["files"]:
+        data = json.loads(output_dir.joinpath(entry["file"]).read_text())
+        durations = [e for e in data if e["ph"] == "X"]
+        assert any(e["name"] == "process_name" for e in data)
+        assert len(data) == entry["events"] and len(durations) == entry["duration_events"]
+        assert entry["first_tick"] == min(e["ts"] for e in durations)
+        assert entry["last_tick"] == max(e["ts"] + e["dur"] for e in durations)
+        if "window" in entry:
+            assert all(entry["window"][0] <= e["ts"] < entry["window"][1] for e in durations)
+        seq_nums.update(e["args"]["SeqNum"] for e in durations)
+    assert seq_nums == {53, 54, 55}
+
+
+def test_main_stdin(tmp_path: Path, trace_with_pipelined):
+    output_dir = tmp_path.joinpath("output")
+    result = subprocess.run(
+        [sys.executable, "-m", "uScope", "-i", "-", "-o", str(output_dir), "--stream", "-q"],
+        input=gzip.compress(trace_with_pipelined.read_bytes()),
+        capture_output=True,
+    )
+
+    assert result.returncode == 0, result.stderr.decode()
+    data = json.loads(output_dir.joinpath("stdin_0.json").read_text())
+    assert {e["args"]["SeqNum"] for e in data if e["ph"] == "X"} == {53, 54, 55}
+
+
+# Needed only by some options, and slow to import
+LAZY_MODULES = ["numpy", "tqdm", "concurrent.futures.process", "concurrent.futures.thread",
+                "gzip", "bz2", "lzma", "uScope.parallel_gzip", "uScope.table",
+                "uScope.perfetto", "uScope.sqlite_export"]
+
+
+@pytest.mark.parametrize("mode", [[], ["--stream"]])
+def test_main_lazy_imports(tmp_path: Path, trace_with_pipelined, mode):
+    argv = ["uScope", "-q", "-i", str(trace_with_pipelined), "-o", str(tmp_path), *mode]
+    script = (
+        "import sys\n"
+        "from uScope.main import main\n"
+        f"sys.argv = {argv!r}\n"
+        "main()\n"
+        f"print([name for name in {LAZY_MODULES!r} if name in sys.modules])\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+    assert tmp_path.joinpath("trace_with_pipelined_0.json").exists()
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_main_batch(tmp_path: Path, monkeypatch, capsys, trace_with_pipelined, jobs):
+    inputs = tmp_path.joinpath("inputs")
+    inputs.mkdir()
+    inputs.joinpath("a.out").write_bytes(trace_with_pipelined.read_bytes())
+    inputs.joinpath("b.out.gz").write_bytes(gzip.compress(trace_with_pipelined.read_bytes()))
+    inputs.joinpath("bad.out").write_text("not a trace\n")
+    inputs.joinpath("notes.txt").write_text("not picked up\n")
+    other = tmp_path.joinpath("other")
+    other.mkdir()
+    other.joinpath("a.out").write_bytes(trace_with_pipelined.read_bytes())
+    output_dir = tmp_path.joinpath("output")
+    monkeypatch.setattr(
+        sys, "argv",
+        ["uscope", "-i", str(inputs), "-i", str(other.joinpath("*.out")),
+         str(tmp_path.joinpath("missing.out")), "-o", str(output_dir), "-j", jobs, "-q"],
+    )
+
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+
+    assert exc_info.value.code == 1
+    for name in ("a_0.json", "b_0.json"):
+        data = json.loads(output_dir.joinpath(name).read_text())
+        assert {e["args"]["SeqNum"] for e in data if e["ph"] == "X"} == {53, 54, 55}
+
+    report = json.loads(output_dir.joinpath("batch_report.json").read_text())
+    results = {Path(r["input_file"]).relative_to(tmp_path).as_posix(): r for r in report["results"]}
+    assert list(results) == ["inputs/a.out", "inputs/b.out.gz", "inputs/bad.out", "other/a.out",
+                             "missing.out"]
+    assert report["failed"] == 3
+    assert results["inputs/a.out"]["status"] == "ok"
+    assert results["inputs/a.out"]["outputs"] == [str(output_dir.joinpath("a_0.json"))]
+    assert results["inputs/b.out.gz"]["events"] > 0
+    assert "No instructions" in results["inputs/bad.out"]["error"]
+    assert "collide" in results["other/a.out"]["error"]
+    assert "FileNotFoundError" in results["missing.out"]["error"]
+
+    summary = capsys.readouterr().out
+    assert "2 of 5 traces converted, 3 failed" in summary
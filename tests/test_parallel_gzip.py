@@ -0,0 +1,40 @@
+import gzip
+import random
+import zlib
+
+import pytest
+
+from uScope.parallel_gzip import ParallelGzipWriter
+
+
+@pytest.mark.parametrize("threads", [1, 3])
+@pytest.mark.parametrize("level", [0, 1, 9])
+def test_roundtrip(tmp_path, monkeypatch, threads, level):
+    monkeypatch.setattr(ParallelGzipWriter, "BLOCK_SIZE", 1000)
+    rng = random.Random(level)
+    data = b"".join(
+        b'{"name":"ADD","ts":%d,"dur":%d}\n' % (rng.randrange(10**6), rng.randrange(100))
+        for _ in range(2000)
+    )
+
+    path = tmp_path.joinpath("out.gz")
+    with ParallelGzipWriter(str(path), level, threads) as f:
+        for start in range(0, len(data), 777):
+            f.write(data[start : start + 777])
+            if start // 777 % 3 == 0:
+                f.flush()
+
+    compressed = path.read_bytes()
+    assert gzip.decompress(compressed) == data
+    # One gzip member, not several concatenated ones
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    assert decompressor.decompress(compressed) == data and not decompressor.unused_data
+
+
+def test_empty_and_invalid_level(tmp_path):
+    path = tmp_path.joinpath("empty.gz")
+    ParallelGzipWriter(str(path)).close()
+    assert gzip.decompress(path.read_bytes()) == b""
+
+    with pytest.raises(ValueError):
+        ParallelGzipWriter(str(tmp_path.joinpath("bad.gz")), 10)
@@ -1,7 +1,21 @@
 # tests/test_parser.py
+import bz2
+import gzip
+import lzma
+import os
+import threading
+
 import pytest
 
-from uScope.parser import PipeViewParser
+from uScope.parser import (
+    PipeViewParser,
+    MmapPipeViewParser,
+    ParallelPipeViewParser,
+    detect_compression,
+    split_trace,
+    TraceWindow,
+    is_regular_file,
+)
 from uScope.O3 import PipelineStage, Instruction
 
 
@@ -387,3 +401,241 @@ def test_parse_unordered(trace_with_unordered):
         ),
     }
     assert_instructions(parser, expected, all_stages)
+
+
+def test_iter_file_matches_parse_file(trace_with_unordered):
+    parser = PipeViewParser()
+    parser.parse_file(str(trace_with_unordered))
+
+    streamed = list(PipeViewParser().iter_file(str(trace_with_unordered)))
+
+    assert [instr.seq_num for instr in streamed] == [2, 5, 7, 4]
+    assert streamed == list(parser.instructions.values())
+
+
+def test_iter_file_skips_invalid_lines(trace_with_invalid_lines):
+    streamed = list(PipeViewParser().iter_file(str(trace_with_invalid_lines)))
+
+    assert len(streamed) == 1
+    assert streamed[0].stages[PipelineStage.RETIRE] == 1500
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+
+@pytest.mark.parametrize("kind, compress", [
+    ("gzip", gzip.compress),
+    ("bz2", bz2.compress),
+    ("xz", lzma.compress),
+    ("zstd", _zstd_compress),
+])
+def test_parse_compressed(trace_with_pipelined, tmp_path, kind, compress):
+    expected = PipeViewParser()
+    expected.parse_file(str(trace_with_pipelined))
+
+    # Name without a compression suffix: detection relies on magic bytes only
+    compressed = tmp_path.joinpath("trace.bin")
+    compressed.write_bytes(compress(trace_with_pipelined.read_bytes()))
+    assert detect_compression(str(compressed)) == kind
+
+    parser = PipeViewParser()
+    parser.parse_file(str(compressed))
+    assert parser.instructions == expected.instructions
+    assert list(PipeViewParser().iter_file(str(compressed))) == list(expected.instructions.values())
+
+
+def test_detect_plain_text(trace_with_pipelined):
+    assert detect_compression(str(trace_with_pipelined)) is None
+
+
+@pytest.mark.parametrize("jobs", [2, 3])
+def test_parallel_parse_matches_serial(monkeypatch, large_trace, jobs):
+    # Single-CPU machines parse serially
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    expected = PipeViewParser()
+    expected.parse_file(str(large_trace))
+
+    parser = ParallelPipeViewParser(jobs, min_chunk_size=1024)
+    parser.parse_file(str(large_trace))
+
+    assert list(parser.instructions.items()) == list(expected.instructions.items())
+    assert parser.get_core_ids() == [0, 1]
+
+
+def test_parallel_parse_single_cpu(monkeypatch, large_trace):
+    import concurrent.futures
+
+    monkeypatch.setattr(os, "cpu_count", lambda: 1)
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", None)
+    expected = MmapPipeViewParser()
+    expected.parse_file(str(large_trace))
+
+    parser = ParallelPipeViewParser(4, min_chunk_size=1024)
+    parser.parse_file(str(large_trace))
+    assert list(parser.instructions.items()) == list(expected.instructions.items())
+
+
+def test_parallel_parse_window_stops_across_chunks(monkeypatch, tmp_path):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    lines = []
+    for seq in range(1, 401):
+        # Out of order: a record far past the window early in the file, and
+        # records inside it in the chunks after that one
+        fetch = 10**9 if seq == 50 else 1000 * seq
+        lines += [f"O3PipeView:fetch:{fetch}:0x{seq:x}:0:{seq}:add x1, x2, x3:IntAlu",
+                  f"O3PipeView:retire:{fetch + 500}"]
+    trace_file = tmp_path.joinpath("unsorted.out")
+    trace_file.write_text("\n".join(lines) + "\n")
+    window = TraceWindow(end_tick=300_000, end_tick_slack=0)
+
+    expected = MmapPipeViewParser(window)
+    expected.parse_file(str(trace_file))
+    assert max(seq for _, seq in expected.instructions) == 49
+
+    parser = ParallelPipeViewParser(2, min_chunk_size=1024, window=window)
+    parser.parse_file(str(trace_file))
+    assert list(parser.instructions.items()) == list(expected.instructions.items())
+    assert parser.done
+
+
+def test_split_trace_aligned_on_fetch(large_trace):
+    ranges = split_trace(str(large_trace), 8)
+    data = large_trace.read_bytes()
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert data[start:].startswith(b"O3PipeView:fetch:")
+
+
+@pytest.mark.parametrize("trace", [
+    "trace_with_in_order",
+    "trace_with_squashed",
+    "trace_with_missing_stages",
+    "trace_with_empty_lines",
+    "trace_with_invalid_lines",
+    "trace_with_pipelined",
+    "trace_with_unordered",
+    "large_trace",
+])
+def test_mmap_parser_matches_text_parser(request, trace):
+    trace_file = str(request.getfixturevalue(trace))
+    expected = PipeViewParser()
+    expected.parse_file(trace_file)
+
+    parser = MmapPipeViewParser()
+    parser.parse_file(trace_file)
+
+    assert list(parser.instructions.items()) == list(expected.instructions.items())
+
+
+def test_mmap_parser_irregular_lines(tmp_path):
+    trace_file = tmp_path.joinpath("irregular.out")
+    trace_file.write_bytes(
+        b"O3PipeView:fetch:1000:0x1000:0:1: add x1, x2, x3 :IntAlu\r\n"
+        b"  O3PipeView:DECODE:1100\r\n"
+        b"O3PipeView:issue:1300\n"
+        b"O3PipeView:bogus:1350\n"
+        b"O3PipeView:retire:1500:store:1700\n"
+        b"O3PipeView:fetch:2000:0x1004:0:2:nop:IntAlu\n"
+        b"O3PipeView:retire:2500"
+    )
+    expected = PipeViewParser()
+    expected.parse_file(str(trace_file))
+
+    parser = MmapPipeViewParser()
+    parser.parse_file(str(trace_file))
+
+    assert list(parser.instructions.items()) == list(expected.instructions.items())
+    assert parser.instructions[(0, 1)].store_tick == 1700
+
+
+@pytest.mark.parametrize("parser_cls", [PipeViewParser, MmapPipeViewParser])
+@pytest.mark.parametrize("window", [
+    TraceWindow(start_tick=50000, end_tick=150000),
+    TraceWindow(first_seq=100, last_seq=400),
+    TraceWindow(start_tick=100000, first_seq=300),
+])
+def test_parse_window(large_trace, parser_cls, window):
+    full = PipeViewParser()
+    full.parse_file(str(large_trace))
+    expected = {
+        key: instr
+        for key, instr in full.instructions.items()
+        if window.contains(instr.stages[PipelineStage.FETCH], instr.seq_num)
+    }
+
+    parser = parser_cls(window)
+    parser.parse_file(str(large_trace))
+
+    assert expected
+    assert list(parser.instructions.items()) == list(expected.items())
+
+
+@pytest.mark.parametrize("parser_cls", [PipeViewParser, MmapPipeViewParser])
+def test_parse_window_stops_early(trace_with_pipelined, tmp_path, parser_cls):
+    trace_file = tmp_path.joinpath("trace.out")
+    trace_file.write_text(
+        trace_with_pipelined.read_text()
+        + "O3PipeView:fetch:500000:0x1000:0:60:nop:IntAlu\n"
+        + "O3PipeView:fetch:not-a-tick:0x1000:0:61:nop:IntAlu\n"
+    )
+
+    parser = parser_cls(TraceWindow(end_tick=137000, end_tick_slack=1000))
+    parser.parse_file(str(trace_file))
+
+    assert parser.done
+    assert sorted(seq for _, seq in parser.instructions) == [53, 54, 55]
+
+
+def test_iter_file_window(trace_with_pipelined):
+    parser = PipeViewParser(TraceWindow(first_seq=54, last_seq=54))
+    assert [instr.seq_num for instr in parser.iter_file(str(trace_with_pipelined))] == [54]
+
+
+def test_follow_file(trace_with_pipelined, tmp_path, monkeypatch):
+    content = trace_with_pipelined.read_bytes()
+    # Appended in pieces that cut through lines, as gem5 would while running
+    pieces = [content[:100], content[100:250], content[250:]]
+    trace_file = tmp_path.joinpath("live.out")
+    trace_file.write_bytes(pieces.pop(0))
+
+    def fake_sleep(_):
+        if pieces:
+            with open(trace_file, "ab") as f:
+                f.write(pieces.pop(0))
+
+    monkeypatch.setattr("uScope.parser.time.sleep", fake_sleep)
+
+    parser = PipeViewParser()
+    batches = list(parser.follow_file(str(trace_file), poll_interval=1.0, idle_timeout=2.0))
+    followed = [instr for batch in batches for instr in batch]
+    last = parser.flush()
+    if last is not None:
+        followed.append(last)
+
+    expected = PipeViewParser()
+    expected.parse_file(str(trace_with_pipelined))
+    assert followed == list(expected.instructions.values())
+    assert len(batches) > 1
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="named pipes not supported")
+def test_parse_named_pipe(trace_with_pipelined, tmp_path):
+    expected = PipeViewParser()
+    expected.parse_file(str(trace_with_pipelined))
+
+    fifo = tmp_path.joinpath("trace.fifo")
+    os.mkfifo(fifo)
+    data = gzip.compress(trace_with_pipelined.read_bytes())
+    writer = threading.Thread(target=fifo.write_bytes, args=(data,))
+    writer.start()
+
+    parser = MmapPipeViewParser()
+    parser.parse_file(str(fifo))
+    writer.join()
+
+    assert not is_regular_file(str(fifo))
+    assert list(parser.instructions.items()) == list(expected.instructions.items())
@@ -0,0 +1,165 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from uScope.config import Config
+from uScope.converter import ChromeTracingConverter
+from uScope.events import DurationEvent, MetadataEvent
+from uScope.main import main
+from uScope.parser import PipeViewParser
+from uScope.perfetto import PerfettoProtoWriter, _varint
+
+
+def decode(data: bytes) -> dict:
+    """Minimal protobuf decoder: field number -> list of raw values."""
+    fields = {}
+    pos = 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = read_varint(data, pos)
+        elif wire_type == 1:
+            value, pos = data[pos : pos + 8], pos + 8
+        else:
+            assert wire_type == 2
+            size, pos = read_varint(data, pos)
+            value, pos = data[pos : pos + size], pos + size
+        fields.setdefault(field, []).append(value)
+    return fields
+
+
+def read_varint(data: bytes, pos: int):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, pos
+
+
+def read_slices(path: Path):
+    """Replay a trace into (process, lane, name, category, ts, dur, args) slices."""
+    tracks, processes, interned = {}, {}, {}
+    open_slices, slices = {}, []
+    for packet in decode(path.read_bytes())[1]:
+        packet = decode(packet)
+        assert packet[10] == [1]
+        for descriptor in map(decode, packet.get(60, [])):
+            uuid = descriptor[1][0]
+            if 3 in descriptor:
+                processes[uuid] = decode(descriptor[3][0])[6][0].decode()
+            else:
+                tracks[uuid] = (descriptor[5][0], descriptor[2][0].decode(), descriptor[12][0])
+        for data in map(decode, packet.get(12, [])):
+            for field, entries in data.items():
+                for entry in map(decode, entries):
+                    interned[(field, entry[1][0])] = entry[2][0].decode()
+        for event in map(decode, packet.get(11, [])):
+            ts = packet[8][0]
+            track = event[11][0]
+            if event[9] == [1]:
+                args = {}
+                for annotation in map(decode, event.get(4, [])):
+                    name = interned[(3, annotation[1][0])]
+                    if 17 in annotation:
+                        args[name] = interned[(29, annotation[17][0])]
+                    else:
+                        args[name] = annotation[4][0]
+                open_slices.setdefault(track, []).append(
+                    (interned[(2, event[10][0])], interned[(1, event[3][0])], ts, args)
+                )
+            else:
+                name, category, start, args = open_slices[track].pop()
+                parent, lane, _ = tracks[track]
+                if parent in tracks:
+                    # A track for overlapping slices, nested under its lane
+                    parent, lane, _ = tracks[parent]
+                slices.append((processes[parent], lane, name, category, start, ts - start, args))
+    assert not any(open_slices.values())
+    return slices, tracks
+
+
+def json_slices(events):
+    processes = {e["pid"]: e["args"]["name"] for e in events if e["name"] == "process_name"}
+    lanes = {(e["pid"], e["tid"]): e["args"]["name"] for e in events if e["name"] == "thread_name"}
+    return [
+        (processes[e["pid"]], lanes[(e["pid"], e["tid"])], e["name"], e["cat"],
+         e["ts"] * 1000, e["dur"] * 1000, e["args"])
+        for e in events if e["ph"] == "X"
+    ]
+
+
+def sort_key(slice_):
+    return slice_[:6] + (sorted(slice_[6].items()),)
+
+
+def test_varint():
+    assert _varint(0) == b"\x00"
+    assert _varint(300) == b"\xac\x02"
+    assert _varint(-1) == b"\xff" * 9 + b"\x01"
+
+
+@pytest.mark.parametrize("lane_mode", ["greedy", "optimal"])
+def test_proto_matches_json(tmp_path: Path, trace_with_pipelined, config: Config, lane_mode):
+    parser = PipeViewParser()
+    parser.parse_file(str(trace_with_pipelined))
+    converter = ChromeTracingConverter(parser, config, lane_mode=lane_mode)
+    events = converter.convert_events(progress=False)
+
+    output = tmp_path.joinpath("trace.pftrace")
+    writer = PerfettoProtoWriter(str(output))
+    writer.write(events)
+    writer.close()
+    assert writer.count == len(events)
+
+    slices, tracks = read_slices(output)
+    expected = json_slices([e.to_dict() for e in events])
+    assert sorted(slices, key=sort_key) == sorted(expected, key=sort_key)
+    ranks = {(e.pid, e.tid): e.args["sort_index"] for e in events if e.name == "thread_sort_index"}
+    for uuid, (parent, _, rank) in tracks.items():
+        assert rank == ranks[((parent >> 32) - 1, (uuid & 0xFFFFFFFF) - 1)]
+
+
+def test_overlapping_slices_in_one_lane(tmp_path: Path):
+    def slice_(name, ts, dur):
+        return DurationEvent(name, 1, ts, dur, "Fetch", {"SeqNum": ts}, tid=0)
+
+    output = tmp_path.joinpath("trace.pftrace")
+    writer = PerfettoProtoWriter(str(output))
+    writer.write([
+        MetadataEvent("process_name", 1, {"name": "Fetch"}),
+        MetadataEvent("thread_name", 1, {"name": "00"}, tid=0),
+        slice_("a", 10, 20),
+        slice_("b", 15, 20),
+        slice_("c", 30, 5),
+    ])
+    # Still open on the child track from the first write
+    writer.write([slice_("d", 33, 1)])
+    writer.close()
+
+    slices, tracks = read_slices(output)
+    assert sorted(s[2:5] for s in slices) == [
+        ("a", "Fetch", 10_000), ("b", "Fetch", 15_000), ("c", "Fetch", 30_000),
+        ("d", "Fetch", 33_000),
+    ]
+    assert {s[2]: s[5] for s in slices} == {"a": 20_000, "b": 20_000, "c": 5_000, "d": 1_000}
+    assert {s[1] for s in slices} == {"00"}
+    children = [track for track in tracks.values() if track[0] in tracks]
+    assert [name for _, name, _ in children] == ["00 #1", "00 #2"]
+
+
+def test_main_perfetto_proto(tmp_path: Path, monkeypatch, trace_with_pipelined):
+    output_dir = tmp_path.joinpath("output")
+    monkeypatch.setattr(
+        sys, "argv",
+        ["uscope", "-i", str(trace_with_pipelined), "-o", str(output_dir),
+         "--format", "perfetto-proto", "--stream"],
+    )
+    main()
+
+    slices, _ = read_slices(output_dir.joinpath("trace_with_pipelined_0.pftrace"))
+    assert {s[6]["SeqNum"] for s in slices} == {53, 54, 55}
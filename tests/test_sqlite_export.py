@@ -0,0 +1,90 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+from uScope.config import Config
+from uScope.converter import ChromeTracingConverter
+from uScope.events import DurationEvent
+from uScope.main import main
+from uScope.parser import PipeViewParser
+from uScope.sqlite_export import SqliteTraceWriter
+
+
+def query(path: Path, sql: str):
+    db = sqlite3.connect(str(path))
+    try:
+        return db.execute(sql).fetchall()
+    finally:
+        db.close()
+
+
+def test_sqlite_writer(tmp_path: Path, trace_with_pipelined, config: Config):
+    parser = PipeViewParser()
+    parser.parse_file(str(trace_with_pipelined))
+    events = ChromeTracingConverter(parser, config).convert_events(progress=False)
+
+    output = tmp_path.joinpath("trace.sqlite")
+    writer = SqliteTraceWriter(str(output))
+    writer.write_instructions(parser.instructions.values())
+    writer.write(events)
+    writer.close()
+    assert writer.count == len(events)
+
+    rows = query(output, "SELECT seq_num, pc, fetch_tick, retire_tick, squashed "
+                         "FROM instructions ORDER BY seq_num")
+    assert rows == [
+        (instr.seq_num, instr.pc, instr.ticks[0] or None, instr.ticks[-1] or None,
+         instr.is_squashed)
+        for instr in sorted(parser.instructions.values(), key=lambda instr: instr.seq_num)
+    ]
+
+    slices = [e for e in events if isinstance(e, DurationEvent)]
+    assert sorted(query(output, "SELECT name, pid, tid, ts, dur, seq_num FROM events")) == sorted(
+        (e.name, e.pid, e.tid, e.ts, e.dur, e.args["SeqNum"]) for e in slices
+    )
+    names = {(e.pid, e.tid): e.args["name"] for e in events if e.name == "thread_name"}
+    assert {(pid, tid): name for pid, tid, name in
+            query(output, "SELECT pid, tid, name FROM tracks WHERE tid IS NOT NULL")} == names
+
+
+def test_sqlite_writer_table(tmp_path: Path, trace_with_pipelined):
+    pytest.importorskip("numpy")
+    parser = PipeViewParser()
+    parser.parse_file(str(trace_with_pipelined))
+
+    outputs = tmp_path.joinpath("objects.sqlite"), tmp_path.joinpath("table.sqlite")
+    writer = SqliteTraceWriter(str(outputs[0]))
+    writer.write_instructions(parser.instructions.values())
+    writer.close()
+    writer = SqliteTraceWriter(str(outputs[1]))
+    writer.write_table(parser.to_table())
+    writer.close()
+    assert writer.instruction_count == len(parser.instructions)
+
+    sql = "SELECT * FROM instructions ORDER BY core_id, seq_num"
+    assert query(outputs[0], sql) == query(outputs[1], sql)
+
+
+@pytest.mark.parametrize("mode", [[], ["--stream"]])
+def test_main_sqlite(tmp_path: Path, monkeypatch, trace_with_pipelined, mode):
+    output_dir = tmp_path.joinpath("output")
+    for _ in range(2):
+        # The second run replaces the database
+        monkeypatch.setattr(
+            sys, "argv",
+            ["uscope", "-i", str(trace_with_pipelined), "-o", str(output_dir),
+             "--format", "sqlite", *mode],
+        )
+        main()
+
+    output = output_dir.joinpath("trace_with_pipelined_0.sqlite")
+    assert query(output, "PRAGMA journal_mode") == [("wal",)]
+    rows = query(output, "SELECT seq_num, issue_tick - dispatch_tick FROM instructions "
+                         "WHERE pc IS NOT NULL ORDER BY seq_num")
+    assert [seq_num for seq_num, _ in rows] == [53, 54, 55]
+    assert all(wait >= 0 for _, wait in rows)
+    indexes = {name for name, in query(output, "SELECT name FROM sqlite_master "
+                                               "WHERE type = 'index'")}
+    assert {"instructions_pc", "instructions_seq_num", "instructions_opclass"} <= indexes
@@ -0,0 +1,82 @@
+import pickle
+
+import pytest
+
+from uScope.O3 import Instruction, PipelineStage
+from uScope.parser import PipeViewParser
+from uScope.store import InstructionStore
+
+
+def make_instr(seq_num: int, core_id: int = 0, retire: int = 160, disasm: str = "add") -> Instruction:
+    return Instruction(
+        seq_num, hex(0x1000 + 4 * seq_num), disasm, "IntAlu",
+        stages={PipelineStage.FETCH: 100, PipelineStage.RETIRE: retire},
+        store_tick=0, core_id=core_id,
+    )
+
+
+def test_store_behaves_like_dict():
+    store = InstructionStore()
+    expected = {}
+    for seq_num in (5, 1, 3, 2, 4):
+        for core_id in (1, 0):
+            key = (core_id, seq_num)
+            store[key] = expected[key] = make_instr(seq_num, core_id)
+    # Overwrites keep the position of the key
+    store[0, 3] = expected[0, 3] = make_instr(3, 0, retire=0, disasm="ld")
+    store[1, 2] = expected[1, 2] = None
+
+    assert store == expected
+    assert list(store) == list(expected)
+    assert list(store.items()) == list(expected.items())
+    assert len(store) == 10
+    assert store[0, 3].is_squashed and store[0, 3].mnemonic == "LD"
+    assert (1, 2) in store and (2, 2) not in store and "x" not in store
+    with pytest.raises(KeyError):
+        store[2, 2]
+
+
+def test_store_delete_and_reinsert():
+    store = InstructionStore((key, make_instr(key[1])) for key in [(0, 1), (0, 2), (0, 3)])
+
+    del store[0, 2]
+    assert list(store) == [(0, 1), (0, 3)]
+    with pytest.raises(KeyError):
+        del store[0, 2]
+
+    store[0, 2] = make_instr(2)
+    assert list(store) == [(0, 1), (0, 3), (0, 2)]
+    assert len(store) == 3
+
+
+def test_store_rejects_mismatched_key():
+    with pytest.raises(ValueError):
+        InstructionStore()[0, 2] = make_instr(1)
+
+
+def test_store_drop_invalid_and_split():
+    store = InstructionStore()
+    for seq_num in range(1, 200):
+        store[seq_num % 3, seq_num] = make_instr(seq_num, seq_num % 3)
+    store[0, 300] = None
+    store[1, 301] = Instruction(301, "0x0", "nop", "No_OpClass", core_id=1)
+
+    store.drop_invalid()
+    assert len(store) == 199 and (0, 300) not in store and (1, 301) not in store
+
+    shards = store.split_by_core()
+    assert list(shards) == [1, 2, 0]
+    for core_id, shard in shards.items():
+        assert shard == {key: instr for key, instr in store.items() if key[0] == core_id}
+    assert pickle.loads(pickle.dumps(store)) == store
+
+
+def test_parser_keeps_instructions_in_store(large_trace):
+    parser = PipeViewParser()
+    parser.parse_file(str(large_trace))
+    instructions = parser.instructions
+
+    assert isinstance(instructions, InstructionStore)
+    assert dict(instructions.items()) == instructions
+    # Rows only: no Python object per instruction
+    assert instructions.strings and len(instructions.strings) < len(instructions)
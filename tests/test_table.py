@@ -0,0 +1,144 @@
+import io
+import json
+
+import pytest
+
+from uScope.O3 import Instruction, PipelineStage
+from uScope.converter import ChromeTracingConverter
+from uScope.parser import PipeViewParser
+from uScope.writer import JsonArrayWriter
+
+np = pytest.importorskip("numpy")
+
+from uScope.intervals import stage_intervals  # noqa: E402
+from uScope.table import InstructionTable  # noqa: E402
+
+
+@pytest.fixture
+def parsed(large_trace) -> PipeViewParser:
+    parser = PipeViewParser()
+    parser.parse_file(str(large_trace))
+    return parser
+
+
+def test_table_roundtrip(parsed):
+    table = parsed.to_table()
+
+    assert len(table) == len(parsed.instructions)
+    assert table.to_instructions() == parsed.instructions
+    assert table.nbytes <= 100 * len(table)
+
+
+def test_table_sort_and_filter(parsed):
+    table = parsed.to_table()
+    by_seq = sorted(parsed.instructions.values(), key=lambda instr: instr.seq_num)
+
+    assert list(table.sort_by_seq()) == by_seq
+    assert list(table.sort_by_seq().committed()) == [i for i in by_seq if not i.is_squashed]
+    assert table.core_ids() == parsed.get_core_ids()
+
+
+def test_table_split_by_core(parsed):
+    tables = parsed.to_table().split_by_core()
+
+    assert list(tables) == parsed.get_core_ids()
+    for core_id, core_table in tables.items():
+        assert core_table.to_instructions() == {
+            key: instr for key, instr in parsed.instructions.items() if instr.core_id == core_id
+        }
+
+
+@pytest.mark.parametrize("only_committed", [False, True])
+def test_convert_from_table(parsed, config, only_committed):
+    table = parsed.to_table().split_by_core()[0]
+    core_parser = PipeViewParser()
+    core_parser.instructions = {
+        key: instr for key, instr in parsed.instructions.items() if instr.core_id == 0
+    }
+    expected = ChromeTracingConverter(
+        core_parser, config, only_committed=only_committed
+    ).convert(progress=False)
+    converted = ChromeTracingConverter(
+        PipeViewParser(), config, only_committed=only_committed, table=table
+    ).convert(progress=False)
+    assert converted == expected
+
+
+@pytest.mark.parametrize(
+    "trace",
+    ["trace_with_pipelined", "trace_with_unordered", "trace_with_missing_stages", "large_trace"],
+)
+@pytest.mark.parametrize(
+    "flags",
+    [{}, {"exclude_exec": True}, {"exclude_pipeline": True}, {"store_completions": False},
+     {"lane_mode": "optimal"}],
+)
+def test_table_conversion_matches_objects(request, config, trace, flags):
+    parser = PipeViewParser()
+    parser.parse_file(str(request.getfixturevalue(trace)))
+    table = parser.to_table().split_by_core()[0]
+    parser.instructions = table.to_instructions()
+
+    expected = ChromeTracingConverter(parser, config, **flags).convert(progress=False)
+    converted = ChromeTracingConverter(parser, config, table=table, **flags).convert(progress=False)
+    assert converted == expected
+
+
+def test_stage_intervals_sorts_by_tick_then_stage_order():
+    instr = Instruction(
+        seq_num=1, pc="0x1000", disasm="nop", opclass="IntAlu",
+        stages={PipelineStage.FETCH: 100, PipelineStage.RENAME: 200,
+                PipelineStage.DECODE: 200, PipelineStage.ISSUE: 150,
+                PipelineStage.RETIRE: 0},
+        stage_order=[PipelineStage.FETCH, PipelineStage.RENAME, PipelineStage.DECODE,
+                     PipelineStage.ISSUE, PipelineStage.RETIRE],
+    )
+    intervals = stage_intervals(InstructionTable.from_instructions([instr]))
+
+    stages = [PipelineStage.FETCH, PipelineStage.ISSUE, PipelineStage.RENAME, PipelineStage.DECODE]
+    assert intervals.slot.tolist() == [stage.ordinal for stage in stages]
+    assert intervals.start.tolist() == [100, 150, 200, 200]
+    assert intervals.dur.tolist() == [50, 50, 1, 1]
+
+
+def _written(events, **kwargs) -> str:
+    out = io.StringIO()
+    writer = JsonArrayWriter(out, **kwargs)
+    writer.write(events)
+    writer.close()
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("indent, backend", [(2, None), (None, None), (None, "json")])
+@pytest.mark.parametrize("jobs", [1, 2, 3])
+def test_write_table_matches_convert(parsed, config, jobs, indent, backend):
+    table = parsed.to_table().split_by_core()[0]
+    events = ChromeTracingConverter(PipeViewParser(), config, table=table).convert_events(progress=False)
+
+    out = io.StringIO()
+    writer = JsonArrayWriter(out, indent=indent, backend=backend)
+    converter = ChromeTracingConverter(PipeViewParser(), config, table=table)
+    assert converter.write_table(writer, jobs, progress=False) == len(events)
+    writer.close()
+
+    assert out.getvalue() == _written(events, indent=indent, backend=backend)
+    if indent is not None:
+        assert out.getvalue() == json.dumps([e.to_dict() for e in events], indent=indent)
+
+
+@pytest.mark.parametrize("indent", [2, None])
+def test_write_table_events_without_color(parsed, config, indent):
+    class PartialColors(type(config)):
+        def get_color_for_instr(self, instr):
+            return None if instr.opclass == "IntAlu" else super().get_color_for_instr(instr)
+
+    config = PartialColors(config.as_dict())
+    table = parsed.to_table().split_by_core()[0]
+    events = ChromeTracingConverter(PipeViewParser(), config, table=table).convert_events(progress=False)
+    assert any(getattr(e, "cname", "") is None for e in events)
+
+    out = io.StringIO()
+    writer = JsonArrayWriter(out, indent=indent)
+    ChromeTracingConverter(PipeViewParser(), config, table=table).write_table(writer, progress=False)
+    writer.close()
+    assert out.getvalue() == _written(events, indent=indent)
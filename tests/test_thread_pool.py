@@ -45,3 +45,119 @@ def test_reuse_earliest_lane():
     assert pid == 100
     assert manager.pool[0][0] == 20
     assert manager.pool[1][0] == 10
+
+
+def reference_assign_lane(pool, max_width, start_time, end_time):
+    for i, (last_end, tid) in enumerate(pool):
+        if last_end <= start_time:
+            pool[i] = (end_time, tid)
+            return tid
+    if len(pool) < max_width:
+        pool.append((end_time, len(pool)))
+        return len(pool) - 1
+    earliest_idx = min(range(len(pool)), key=lambda i: pool[i][0])
+    pool[earliest_idx] = (end_time, pool[earliest_idx][1])
+    return pool[earliest_idx][1]
+
+
+@pytest.mark.parametrize("max_width", [1, 3, 8, 256])
+@pytest.mark.parametrize("tree_min_lanes", [1, 5, StageLaneManager.TREE_MIN_LANES])
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_linear_scan(max_width, tree_min_lanes, seed):
+    import random
+
+    rng = random.Random(seed)
+    metadata = []
+    manager = StageLaneManager(
+        max_width=max_width, pid=100, lane_name_prefix="Test", metadata_events=metadata
+    )
+    manager.TREE_MIN_LANES = tree_min_lanes
+    pool = [(0, 0)]
+
+    tick = 0
+    for _ in range(2000):
+        # Mostly increasing starts with some going backwards, like seq-ordered stages
+        tick += rng.randint(-20, 30)
+        start = max(1, tick)
+        end = start + rng.choice([1, rng.randint(1, 200)])
+        _, tid = manager.assign_lane(start, end)
+        assert tid == reference_assign_lane(pool, max_width, start, end)
+
+    assert manager.pool == pool
+    assert len(metadata) == 2 * len(pool)
+
+
+@pytest.mark.parametrize("tree_min_lanes", [1, 5, StageLaneManager.TREE_MIN_LANES])
+@pytest.mark.parametrize("seed", range(3))
+def test_assign_lanes_matches_assign_lane(tree_min_lanes, seed):
+    import random
+
+    rng = random.Random(seed)
+    starts, ends = [], []
+    tick = 0
+    for _ in range(2000):
+        tick += rng.randint(-20, 60)
+        starts.append(max(1, tick))
+        ends.append(starts[-1] + rng.choice([1, rng.randint(1, 100)]))
+
+    def make_manager():
+        manager = StageLaneManager(
+            max_width=8, pid=100, lane_name_prefix="Test", metadata_events=[]
+        )
+        manager.TREE_MIN_LANES = tree_min_lanes
+        manager.assign_lane(0, 50)
+        return manager
+
+    expected = make_manager()
+    tids = [expected.assign_lane(start, end)[1] for start, end in zip(starts, ends)]
+
+    manager = make_manager()
+    free_from = manager.free_from()
+    overlapping = []
+    for i, start in enumerate(starts):
+        if start < free_from:
+            overlapping.append(i)
+        free_from = max(free_from, ends[i])
+
+    assert len(overlapping) < len(starts)
+    assert manager.assign_lanes(starts, ends, overlapping) == tids
+    assert manager.pool == expected.pool
+    assert manager._tree == expected._tree
+    assert manager.metadata_events == expected.metadata_events
+
+
+def test_optimal_lanes_use_max_overlap():
+    from uScope.thread_pool import assign_optimal_lanes
+
+    pids = [1, 1, 1, 1, 2, 2]
+    starts = [0, 5, 10, 12, 0, 3]
+    ends = [10, 12, 15, 13, 3, 4]
+
+    tids, lanes = assign_optimal_lanes(pids, starts, ends)
+
+    # [0,10) and [5,12) overlap; [10,15) reuses lane 0 and [12,13) lane 1
+    assert tids == [0, 1, 0, 1, 0, 0]
+    assert lanes == {1: 2, 2: 1}
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_optimal_lanes_never_overlap(seed):
+    import random
+
+    from uScope.thread_pool import assign_optimal_lanes
+
+    rng = random.Random(seed)
+    starts = [rng.randint(0, 1000) for _ in range(500)]
+    ends = [start + rng.randint(1, 100) for start in starts]
+    pids = [0] * len(starts)
+
+    tids, lanes = assign_optimal_lanes(pids, starts, ends)
+
+    by_lane = {}
+    for tid, start, end in zip(tids, starts, ends):
+        by_lane.setdefault(tid, []).append((start, end))
+    for intervals in by_lane.values():
+        intervals.sort()
+        assert all(a_end <= b_start for (_, a_end), (b_start, _) in zip(intervals, intervals[1:]))
+    max_overlap = max(sum(s <= t < e for s, e in zip(starts, ends)) for t in range(1100))
+    assert lanes[0] == max_overlap
@@ -0,0 +1,138 @@
+import io
+import json
+
+import pytest
+
+from uScope.events import DurationEvent, MetadataEvent
+from uScope.writer import (
+    JsonArrayWriter, RollingTraceWriter, compact_dumps, event_format, format_events, string_encoder
+)
+
+
+@pytest.mark.parametrize("events", [
+    [],
+    [{"name": "a", "pid": 1, "args": {"x": 1}}],
+    [{"name": "a", "pid": 1, "args": {}}, {"name": "b", "pid": 2, "tid": 3}],
+])
+def test_json_array_writer_matches_json_dump(events):
+    out = io.StringIO()
+    writer = JsonArrayWriter(out, indent=2)
+    for event in events:
+        writer.write([event])
+    writer.close()
+
+    assert out.getvalue() == json.dumps(events, indent=2)
+    assert writer.count == len(events)
+
+
+def test_json_array_writer_chunks():
+    events = [{"name": str(i), "pid": i, "args": {"i": i}} for i in range(5)]
+    out = io.StringIO()
+    writer = JsonArrayWriter(out, indent=2)
+    writer.write(events[:1])
+    writer.write_chunk(format_events(events[1:3], indent=2), 2)
+    writer.write_chunk("", 0)
+    writer.write_chunk(format_events(events[3:], indent=2), 2)
+    writer.close()
+
+    assert out.getvalue() == json.dumps(events, indent=2)
+    assert writer.count == len(events)
+
+
+def test_json_array_writer_event_objects():
+    events = [
+        MetadataEvent(name="process_name", pid=1, args={"name": "Fetch"}),
+        DurationEvent(name="ADD", pid=1, ts=10, dur=2, cat="Fetch", args={"SeqNum": 1}, tid=0),
+    ]
+    out = io.StringIO()
+    writer = JsonArrayWriter(out, indent=2)
+    writer.write(events[:1])
+    writer.write_chunk(format_events(events[1:], indent=2), 1)
+    writer.close()
+
+    assert out.getvalue() == json.dumps([e.to_dict() for e in events], indent=2)
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson", "ujson"])
+def test_compact_writer(backend, monkeypatch):
+    try:
+        compact_dumps(backend)
+    except ImportError:
+        pytest.skip(f"{backend} is not installed")
+    monkeypatch.setattr(JsonArrayWriter, "BUFFER_EVENTS", 2)
+    events = [{"name": f"a/{i}\u00b5\"", "pid": i, "args": {"i": i}} for i in range(4)]
+    events.append(DurationEvent(name="ADD", pid=1, ts=10, dur=2, cat="Fetch", args={}, tid=0))
+    out = io.StringIO()
+    writer = JsonArrayWriter(out, backend=backend)
+    writer.write(events[:3])
+    writer.write_chunk(format_events(events[3:], backend=backend), 2)
+    writer.close()
+
+    text = out.getvalue()
+    assert json.loads(text) == events[:4] + [events[4].to_dict()]
+    assert text.count("\n") == len(events) + 1
+    assert ", " not in text and ": " not in text
+    assert "\u00b5" in text and "a/0" in text
+    assert writer.count == len(events)
+
+
+@pytest.mark.parametrize("indent, backend", [(2, None), (None, "json"), (None, "orjson")])
+def test_event_format_matches_format_events(indent, backend):
+    try:
+        compact_dumps(backend)
+    except ImportError:
+        pytest.skip(f"{backend} is not installed")
+    shape = DurationEvent("{0}", "{1}", "{2}", "{3}", "{4}", {"PC": "{5}", "Disasm": "{6}"},
+                          "{7}", "X", "{8}")
+    event = DurationEvent("ADD", 1, 10, 2, "Fetch", {"PC": "0x10", "Disasm": "add r1, 50% \"\u00b5\""},
+                          "good", "X", 0)
+    encode = string_encoder(indent, backend)
+
+    fields = (encode(event.name), event.pid, event.ts, event.dur, encode(event.cat),
+              encode(event.args["PC"]), encode(event.args["Disasm"]), encode(event.cname), event.tid)
+    assert event_format(shape, indent, backend) % fields == format_events([event], indent, backend)
+
+def test_rolling_writer_parts_are_self_contained(tmp_path):
+    writer = RollingTraceWriter(lambda part: str(tmp_path.joinpath(f"part{part}.json")), max_events=2)
+    writer.write([{"ph": "M", "name": "process_name", "pid": 1}])
+    writer.write([{"ph": "X", "ts": ts, "pid": 1} for ts in range(3)])
+    writer.write([{"ph": "M", "name": "thread_name", "pid": 1, "tid": 1}])
+    writer.write([{"ph": "X", "ts": ts, "pid": 1} for ts in range(3, 5)])
+    writer.close()
+
+    parts = [json.loads(open(path).read()) for path in writer.files]
+    assert [len([e for e in part if e["ph"] == "X"]) for part in parts] == [2, 2, 1]
+    assert [e["name"] for e in parts[0] if e["ph"] == "M"] == ["process_name"]
+    assert [e["name"] for e in parts[2] if e["ph"] == "M"] == ["process_name", "thread_name"]
+    assert writer.count == 7
+
+
+def test_rolling_writer_splits_by_ticks(tmp_path):
+    manifest = tmp_path.joinpath("manifest.json")
+    writer = RollingTraceWriter(
+        lambda part: str(tmp_path.joinpath(f"part{part}.json")), max_events=3,
+        split_every_ticks=100, manifest_path=str(manifest),
+    )
+    writer.write([{"ph": "M", "name": "process_name", "pid": 1}])
+    writer.write([{"ph": "X", "ts": ts, "dur": 10, "pid": 1} for ts in (0, 50, 120, 90, 130, 140, 150, 320)])
+    writer.close()
+
+    parts = [json.loads(open(path).read()) for path in writer.files]
+    assert [[e["ts"] for e in part if e["ph"] == "X"] for part in parts] == [
+        [0, 50], [120, 90, 130], [140, 150], [320]
+    ]
+    assert all(part[0]["name"] == "process_name" for part in parts)
+    assert json.loads(manifest.read_text()) == {
+        "split_every_ticks": 100,
+        "max_events_per_file": 3,
+        "files": [
+            {"file": "part0.json", "first_tick": 0, "last_tick": 60, "window": [0, 100],
+             "events": 3, "duration_events": 2},
+            {"file": "part1.json", "first_tick": 90, "last_tick": 140, "window": [100, 200],
+             "events": 4, "duration_events": 3},
+            {"file": "part2.json", "first_tick": 140, "last_tick": 160, "window": [100, 200],
+             "events": 3, "duration_events": 2},
+            {"file": "part3.json", "first_tick": 320, "last_tick": 330, "window": [300, 400],
+             "events": 2, "duration_events": 1},
+        ],
+    }